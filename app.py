@@ -1,9 +1,22 @@
 import streamlit as st
 import os # <--- Importante para verificar se o arquivo existe
-from views import login, dashboard, simulacao, oraculo, historico
+import importlib
+from views import login
 from core import database
 from services import auth_service
 
+# Página do menu -> módulo em views/ (importado só quando a página é aberta,
+# assim a tela de login não paga o custo de pandas/plotly/PDF)
+PAGINAS = {
+    "Simulação": "simulacao",
+    "Oráculo": "oraculo",
+    "Aluguel x Compra": "comparativo",
+    "Dashboard": "dashboard",
+    "Histórico": "historico",
+    "Importar Leads": "importacao",
+    "Propostas em Lote": "propostas_lote",
+}
+
 # Configuração da Página
 st.set_page_config(
     page_title="Sistema Imobiliário",
@@ -11,7 +24,7 @@ st.set_page_config(
     layout="wide"
 )
 
-# Inicializa o Banco de Dados
+# Inicializa o Banco de Dados (uma vez por processo)
 database.inicializar_banco()
 
 # CSS Personalizado
@@ -42,7 +55,7 @@ else:
         
         menu = st.radio(
             "Navegação", 
-            ["Simulação", "Oráculo", "Dashboard", "Histórico"]
+            list(PAGINAS)
         )
         
         st.markdown("---")
@@ -50,11 +63,4 @@ else:
             auth_service.realizar_logout()
 
     # --- ROTEAMENTO DE PÁGINAS ---
-    if menu == "Simulação":
-        simulacao.render()
-    elif menu == "Oráculo":
-        oraculo.render()
-    elif menu == "Dashboard":
-        dashboard.render()
-    elif menu == "Histórico":
-        historico.render()
\ No newline at end of file
+    importlib.import_module(f"views.{PAGINAS[menu]}").render()
@@ -1,38 +1,179 @@
-import plotly.graph_objects as go
-import plotly.express as px
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+import numpy as np
 import pandas as pd
+from core.inicializacao import modulo_sob_demanda
+
+# plotly só é carregado quando o primeiro gráfico for montado
+go = modulo_sob_demanda("plotly.graph_objects")
+px = modulo_sob_demanda("plotly.express")
+
+# ==========================================
+# 🧠 CACHE DE FIGURAS (LRU compartilhado entre sessões)
+# ==========================================
+# A cada rerun o Streamlit pedia a figura de novo e o Plotly remontava tudo.
+# A chave é o hash dos DADOS (conteúdo do DataFrame) + o estilo pedido, então
+# a mesma tabela vista por outro corretor ou no rerun seguinte reaproveita a
+# figura pronta. Cada chamada recebe uma cópia (go.Figure(fig)), que pode ser
+# alterada sem afetar o cache nem as outras sessões.
+
+TAMANHO_CACHE_FIGURAS = 128
+
+# Séries mais longas que isso são reduzidas com LTTB (None desliga)
+PONTOS_MAXIMOS = 120
+# Barras diárias do dashboard acima disso viram semanas (e depois meses)
+BARRAS_MAXIMAS = 366
+
+_cache_figuras = OrderedDict()
+_cache_figuras_lock = threading.Lock()
+_cache_figuras_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+def _hash_argumento(h, valor):
+    if isinstance(valor, pd.DataFrame):
+        h.update(repr((list(valor.columns), [str(t) for t in valor.dtypes])).encode())
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, pd.Series):
+        h.update(repr((valor.name, str(valor.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, np.ndarray):
+        h.update(repr((valor.shape, str(valor.dtype))).encode())
+        h.update(np.ascontiguousarray(valor).tobytes())
+    else:
+        h.update(repr(valor).encode())
+
+def _chave_figura(nome, args, kwargs):
+    h = hashlib.blake2b(nome.encode(), digest_size=16)
+    for valor in args:
+        _hash_argumento(h, valor)
+    for chave in sorted(kwargs):
+        h.update(chave.encode())
+        _hash_argumento(h, kwargs[chave])
+    return h.hexdigest()
+
+def figura_em_cache(funcao):
+    """
+    Guarda a figura montada por `funcao` pelo hash dos argumentos (dados + estilo).
+    Cada chamada devolve uma cópia própria; a guardada nunca sai do cache.
+    """
+    @wraps(funcao)
+    def _com_cache(*args, **kwargs):
+        chave = _chave_figura(funcao.__name__, args, kwargs)
+        with _cache_figuras_lock:
+            fig = _cache_figuras.get(chave)
+            if fig is not None:
+                _cache_figuras.move_to_end(chave)
+                _cache_figuras_stats['hits'] += 1
+        if fig is None:
+            fig = funcao(*args, **kwargs)
+            with _cache_figuras_lock:
+                _cache_figuras_stats['misses'] += 1
+                _cache_figuras[chave] = fig
+                while len(_cache_figuras) > TAMANHO_CACHE_FIGURAS:
+                    _cache_figuras.popitem(last=False)
+                    _cache_figuras_stats['evictions'] += 1
+        return go.Figure(fig)
+    return _com_cache
+
+def estatisticas_cache_figuras():
+    """Contadores do cache de figuras (para monitoramento)."""
+    with _cache_figuras_lock:
+        stats = dict(_cache_figuras_stats)
+        stats['tamanho'] = len(_cache_figuras)
+    stats['capacidade'] = TAMANHO_CACHE_FIGURAS
+    consultas = stats['hits'] + stats['misses']
+    stats['taxa_acerto'] = stats['hits'] / consultas if consultas else 0.0
+    return stats
+
+def limpar_cache_figuras():
+    """Esvazia o cache de figuras e zera os contadores."""
+    with _cache_figuras_lock:
+        _cache_figuras.clear()
+        for k in _cache_figuras_stats:
+            _cache_figuras_stats[k] = 0
+
+# ==========================================
+# 📉 SÉRIES LONGAS (LTTB)
+# ==========================================
+
+def lttb(x, y, pontos):
+    """
+    Índices de `pontos` pontos da série escolhidos pelo Largest-Triangle-Three-Buckets:
+    em cada faixa fica o ponto que forma o maior triângulo com o vizinho já escolhido
+    e a média da faixa seguinte, então picos, vales e curvas continuam no desenho.
+    O primeiro e o último ponto sempre ficam.
+    """
+    total = len(x)
+    if pontos is None or pontos < 3 or pontos >= total:
+        return np.arange(total)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # pontos-2 faixas entre o primeiro e o último ponto
+    bordas = np.linspace(1, total - 1, pontos - 1).astype(np.int64)
+    indices = np.empty(pontos, dtype=np.int64)
+    indices[0], indices[-1] = 0, total - 1
+    a = 0
+    for i in range(pontos - 2):
+        ini, fim = bordas[i], bordas[i + 1]
+        prox_fim = bordas[i + 2] if i + 2 < len(bordas) else total
+        media_x, media_y = x[fim:prox_fim].mean(), y[fim:prox_fim].mean()
+        area = np.abs((x[a] - media_x) * (y[ini:fim] - y[a]) - (x[a] - x[ini:fim]) * (media_y - y[a]))
+        a = ini + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+def reduzir_serie(df, x, colunas, max_pontos=PONTOS_MAXIMOS):
+    """
+    Linhas de `df` que bastam para desenhar `colunas` contra `x`: a união dos pontos
+    LTTB de cada coluna (no total, até max_pontos). Série curta volta inteira.
+    """
+    if max_pontos is None or len(df) <= max_pontos:
+        return df
+    por_coluna = max(max_pontos // len(colunas), 3)
+    indices = np.unique(np.concatenate([lttb(df[x], df[c], por_coluna) for c in colunas]))
+    return df.iloc[indices]
+
+def _valores(serie, casas=2):
+    """Valores arredondados (centavos): o JSON enviado ao navegador fica bem menor."""
+    return np.round(np.asarray(serie, dtype=float), casas)
 
 # ==========================================
 # 🏠 GRÁFICOS DA SIMULAÇÃO (View Simulacao)
 # ==========================================
 
-def plot_amortizacao(df):
+@figura_em_cache
+def plot_amortizacao(df, max_pontos=PONTOS_MAXIMOS):
     """
     Gera um gráfico de área empilhada mostrando a composição da parcela
     (Amortização vs Juros) ao longo dos meses.
     """
+    df = reduzir_serie(df, 'Mes', ['Amortizacao', 'Juros'], max_pontos)
     fig = go.Figure()
 
     # Camada de Amortização (Verde)
     fig.add_trace(go.Scatter(
-        x=df['Mes'],
-        y=df['Amortizacao'],
+        x=df['Mes'].to_numpy(),
+        y=_valores(df['Amortizacao']),
         mode='lines',
         name='Amortização (Abate Dívida)',
         stackgroup='one',
         line=dict(width=0, color='#10b981'), # Verde
-        fillcolor='rgba(16, 185, 129, 0.6)'
+        fillcolor='rgba(16, 185, 129, 0.6)',
+        hovertemplate='R$ %{y:,.2f}'
     ))
 
     # Camada de Juros (Vermelho)
     fig.add_trace(go.Scatter(
-        x=df['Mes'],
-        y=df['Juros'],
+        x=df['Mes'].to_numpy(),
+        y=_valores(df['Juros']),
         mode='lines',
         name='Juros (Custo)',
         stackgroup='one',
         line=dict(width=0, color='#ef4444'), # Vermelho
-        fillcolor='rgba(239, 68, 68, 0.6)'
+        fillcolor='rgba(239, 68, 68, 0.6)',
+        hovertemplate='R$ %{y:,.2f}'
     ))
 
     fig.update_layout(
@@ -46,6 +187,80 @@ def plot_amortizacao(df):
     )
     return fig
 
+@figura_em_cache
+def plot_faixas_parcela(df_faixas, max_pontos=PONTOS_MAXIMOS):
+    """
+    Faixa de incerteza da parcela (P10 a P90) com a mediana (P50) no meio,
+    para financiamentos corrigidos por índice (Monte Carlo).
+    """
+    df_faixas = reduzir_serie(df_faixas, 'Mes', ['Parcela P90', 'Parcela P10', 'Parcela P50'], max_pontos)
+    meses = df_faixas['Mes'].to_numpy()
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=meses, y=_valores(df_faixas['Parcela P90']),
+        mode='lines', name='P90 (Pessimista)',
+        line=dict(width=0, color='#ef4444')
+    ))
+    fig.add_trace(go.Scatter(
+        x=meses, y=_valores(df_faixas['Parcela P10']),
+        mode='lines', name='P10 (Otimista)',
+        fill='tonexty', fillcolor='rgba(59, 130, 246, 0.2)',
+        line=dict(width=0, color='#10b981')
+    ))
+    fig.add_trace(go.Scatter(
+        x=meses, y=_valores(df_faixas['Parcela P50']),
+        mode='lines', name='P50 (Mediana)',
+        line=dict(width=2, color='#3b82f6')
+    ))
+
+    fig.update_layout(
+        title="Parcela com Indexador (P10 / P50 / P90)",
+        xaxis_title="Meses",
+        yaxis_title="Valor (R$)",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        hovermode="x unified",
+        margin=dict(l=20, r=20, t=60, b=20),
+        height=400
+    )
+    return fig
+
+@figura_em_cache
+def plot_aluguel_vs_compra(df_projecao, mes_cruzamento=None, max_pontos=PONTOS_MAXIMOS):
+    """
+    Linhas cruzadas: patrimônio de quem compra vs. quem aluga e investe.
+    """
+    df_projecao = reduzir_serie(df_projecao, 'Mes', ['Patrimonio Compra', 'Patrimonio Aluguel'], max_pontos)
+    anos = _valores(df_projecao['Mes'] / 12, 3)
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=anos, y=_valores(df_projecao['Patrimonio Compra']),
+        mode='lines', name='Comprar (Imóvel - Dívida)',
+        line=dict(width=3, color='#10b981')
+    ))
+    fig.add_trace(go.Scatter(
+        x=anos, y=_valores(df_projecao['Patrimonio Aluguel']),
+        mode='lines', name='Alugar + Investir (CDI)',
+        line=dict(width=3, color='#f59e0b')
+    ))
+
+    if mes_cruzamento:
+        fig.add_vline(x=mes_cruzamento / 12, line_dash="dash", line_color="#94a3b8",
+                      annotation_text=f"Virada: ano {mes_cruzamento / 12:.1f}")
+
+    fig.update_layout(
+        title="Patrimônio ao Longo do Tempo",
+        xaxis_title="Anos",
+        yaxis_title="Patrimônio (R$)",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        hovermode="x unified",
+        margin=dict(l=20, r=20, t=60, b=20),
+        height=400
+    )
+    return fig
+
+@figura_em_cache
 def plot_composicao(saldo_devedor, total_juros):
     """
     Gera um gráfico de Rosca (Donut) comparando o valor original vs juros.
@@ -69,6 +284,26 @@ def plot_composicao(saldo_devedor, total_juros):
     )
     return fig
 
+@figura_em_cache
+def mapa_calor_poder_compra(mapa):
+    """
+    Mapa de calor do poder de compra (linhas = taxa, colunas = prazo em anos).
+    """
+    fig = px.imshow(
+        mapa.values,
+        x=[f"{p} anos" for p in mapa.columns],
+        y=[f"{t:.1f}%" for t in mapa.index],
+        color_continuous_scale='Blues',
+        aspect='auto',
+        labels=dict(x="Prazo", y="Taxa", color="Poder de Compra"),
+    )
+    fig.update_traces(hovertemplate="Prazo: %{x}<br>Taxa: %{y}<br>Imóvel até: R$ %{z:,.0f}<extra></extra>")
+    fig.update_layout(
+        height=450,
+        margin=dict(l=20, r=20, t=20, b=20)
+    )
+    return fig
+
 # ==========================================
 # 📊 GRÁFICOS DO DASHBOARD (View Dashboard)
 # ==========================================
@@ -87,25 +322,45 @@ def grafico_timeline_simulacoes(df):
         # Agrupa por dia
         contagem = df.groupby(df['data_criacao'].dt.date).size().reset_index(name='Quantidade')
         contagem.columns = ['Data', 'Quantidade']
-        
-        fig = px.bar(
-            contagem, 
-            x='Data', 
-            y='Quantidade', 
-            title="Evolução de Simulações por Dia",
-            color_discrete_sequence=['#3b82f6']
-        )
-        
-        fig.update_layout(
-            xaxis_title="Data",
-            yaxis_title="Volume",
-            height=350,
-            margin=dict(l=20, r=20, t=40, b=20)
-        )
-        return fig
+        return grafico_timeline_diario(contagem)
     else:
         return go.Figure()
 
+@figura_em_cache
+def grafico_timeline_diario(contagem, max_barras=BARRAS_MAXIMAS):
+    """
+    Barras por dia a partir da contagem já agrupada (colunas Data, Quantidade).
+    Períodos longos (mais de max_barras dias) são somados por semana ou por mês.
+    """
+    if contagem.empty:
+        return go.Figure()
+
+    periodo = "Dia"
+    for frequencia, nome in (("W-SUN", "Semana"), ("M", "Mês")):
+        if max_barras is None or len(contagem) <= max_barras:
+            break
+        contagem = (
+            contagem.assign(Data=pd.to_datetime(contagem['Data']).dt.to_period(frequencia).dt.start_time)
+            .groupby('Data', as_index=False)['Quantidade'].sum()
+        )
+        periodo = nome
+
+    fig = px.bar(
+        contagem, 
+        x='Data', 
+        y='Quantidade', 
+        title=f"Evolução de Simulações por {periodo}",
+        color_discrete_sequence=['#3b82f6']
+    )
+    
+    fig.update_layout(
+        xaxis_title="Data",
+        yaxis_title="Volume",
+        height=350,
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+    return fig
+
 def grafico_pizza_status(df): # <--- NOME CORRIGIDO AQUI
     """
     Mostra a distribuição dos status (Pizza).
@@ -115,7 +370,16 @@ def grafico_pizza_status(df): # <--- NOME CORRIGIDO AQUI
         
     contagem = df['status'].value_counts().reset_index()
     contagem.columns = ['Status', 'Quantidade']
-    
+    return grafico_status_resumo(contagem)
+
+@figura_em_cache
+def grafico_status_resumo(contagem):
+    """
+    Pizza de status a partir da contagem já agrupada (colunas Status, Quantidade).
+    """
+    if contagem.empty:
+        return go.Figure()
+
     fig = px.pie(
         contagem, 
         names='Status', 
@@ -129,4 +393,4 @@ def grafico_pizza_status(df): # <--- NOME CORRIGIDO AQUI
         height=350,
         margin=dict(l=20, r=20, t=40, b=20)
     )
-    return fig
\ No newline at end of file
+    return fig
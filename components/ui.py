@@ -1,5 +1,6 @@
 import streamlit as st
 import os
+from core import relatorios
 
 def inject_custom_css():
     """Injeta o CSS global para deixar o app com cara de software premium"""
@@ -59,4 +60,33 @@ def formatar_moeda(valor):
     """
     if valor is None:
         return "R$ 0,00"
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
\ No newline at end of file
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def botao_proposta_pdf(dados, chave, rotulo="📄 PDF", **opcoes):
+    """
+    PDF da proposta em dois passos: o clique gera o PDF (pool de PDFs, com cache)
+    e só então aparece o botão de download, que continua ali enquanto os dados
+    não mudarem. Se a geração falhar, mostra o erro em vez de baixar um arquivo vazio.
+    """
+    versao = relatorios.chave_proposta(dados)
+    pedido = st.session_state.get(chave) == versao
+    if not pedido and st.button(rotulo, key=f"{chave}_gerar", **opcoes):
+        pedido = True
+    if not pedido:
+        return
+
+    try:
+        pdf = relatorios.gerar_proposta_pdf(dados)
+    except Exception as e:
+        print(f"Erro ao gerar PDF: {e}")
+        pdf = None
+    if not pdf:
+        st.session_state.pop(chave, None)
+        st.error("❌ Não foi possível gerar o PDF da proposta.")
+        return
+
+    st.session_state[chave] = versao
+    st.download_button(
+        f"⬇️ Baixar {rotulo.split(' ', 1)[-1]}", pdf, file_name=relatorios.nome_arquivo_proposta(dados),
+        mime="application/pdf", key=f"{chave}_baixar", **opcoes
+    )
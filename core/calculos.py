@@ -1,5 +1,82 @@
+import numpy as np
 import pandas as pd
-import math
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# Colunas padrão de toda tabela de amortização
+COLUNAS = ['Mes', 'Parcela', 'Amortizacao', 'Juros', 'Saldo Devedor']
+
+def taxa_mensal(taxa_anual):
+    """Converte a taxa anual (%) para mensal (decimal). Aceita número ou array."""
+    return (np.asarray(taxa_anual, dtype=float) / 100) / 12
+
+def parcela_price(valor_financiado, i, meses):
+    """
+    PMT da Tabela Price. Funciona com escalares ou arrays (broadcast).
+    Taxa zero vira divisão simples, sem dividir por zero.
+    """
+    valor_financiado = np.asarray(valor_financiado, dtype=float)
+    i = np.asarray(i, dtype=float)
+    meses = np.asarray(meses, dtype=float)
+
+    fator = (1 + i) ** meses
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pmt = valor_financiado * (i * fator) / (fator - 1)
+    return np.where(i == 0, valor_financiado / meses, pmt)
+
+def saldos_sac(valor_financiado, meses, k):
+    """Saldo devedor SAC após k parcelas: cai em linha reta até zero."""
+    return np.maximum(valor_financiado * (1 - k / meses), 0)
+
+def saldos_price(valor_financiado, i, meses, k):
+    """
+    Saldo devedor Price após k parcelas (forma fechada, progressão geométrica):
+    S_k = P * [(1+i)^n - (1+i)^k] / [(1+i)^n - 1]
+    """
+    i = np.asarray(i, dtype=float)
+    fator_n = (1 + i) ** meses
+    fator_k = (1 + i) ** k
+    with np.errstate(divide='ignore', invalid='ignore'):
+        saldo = valor_financiado * (fator_n - fator_k) / (fator_n - 1)
+    saldo = np.where(i == 0, valor_financiado * (1 - k / meses), saldo)
+    return np.maximum(saldo, 0)
+
+def _montar_tabela(mes, parcela, amortizacao, juros, saldo, copy=None):
+    """Monta o DataFrame direto das colunas (sem lista de listas)."""
+    return pd.DataFrame({
+        'Mes': mes,
+        'Parcela': parcela,
+        'Amortizacao': amortizacao,
+        'Juros': juros,
+        'Saldo Devedor': saldo,
+    }, columns=COLUNAS, copy=copy)
+
+def _linhas_sac(valor_financiado, i, meses, mes):
+    """Linhas do SAC só para os meses pedidos (forma fechada, sem depender dos meses anteriores)."""
+    # No SAC, a amortização é constante
+    amortizacao = valor_financiado / meses
+
+    # O saldo do SAC é linear, então qualquer mês sai direto da fórmula
+    saldo = saldos_sac(valor_financiado, meses, mes)
+    saldo_anterior = saldos_sac(valor_financiado, meses, mes - 1)
+    juros = saldo_anterior * i
+    parcela = amortizacao + juros
+
+    return _montar_tabela(mes, parcela, np.full(len(mes), amortizacao), juros, saldo)
+
+def _linhas_price(valor_financiado, i, meses, mes):
+    """Linhas da Price só para os meses pedidos (forma fechada, progressão geométrica)."""
+    # Fórmula do PMT (Pagamento Periódico)
+    parcela_fixa = float(parcela_price(valor_financiado, i, meses))
+
+    saldo = saldos_price(valor_financiado, i, meses, mes)
+    saldo_anterior = saldos_price(valor_financiado, i, meses, mes - 1)
+    juros = saldo_anterior * i
+    amortizacao = parcela_fixa - juros
+
+    return _montar_tabela(mes, np.full(len(mes), parcela_fixa), amortizacao, juros, saldo)
 
 def calcular_sac(valor_financiado, taxa_anual, meses):
     """
@@ -9,28 +86,10 @@ def calcular_sac(valor_financiado, taxa_anual, meses):
     - Parcela decrescente
     """
     # Converter taxa anual para mensal
-    i = (taxa_anual / 100) / 12
-    
-    # No SAC, a amortização é constante
-    amortizacao = valor_financiado / meses
-    
-    dados = []
-    saldo_devedor = valor_financiado
-    
-    for n in range(1, meses + 1):
-        juros = saldo_devedor * i
-        parcela = amortizacao + juros
-        saldo_devedor -= amortizacao
-        
-        # Correção de arredondamento para não ficar -0.00
-        if saldo_devedor < 0:
-            saldo_devedor = 0
-            
-        dados.append([n, parcela, amortizacao, juros, saldo_devedor])
-        
-    # Cria o DataFrame
-    df = pd.DataFrame(dados, columns=['Mes', 'Parcela', 'Amortizacao', 'Juros', 'Saldo Devedor'])
-    return df
+    i = float(taxa_mensal(taxa_anual))
+
+    # Vetorizado: todos os meses de uma vez
+    return _linhas_sac(valor_financiado, i, meses, np.arange(1, meses + 1))
 
 def calcular_price(valor_financiado, taxa_anual, meses):
     """
@@ -39,26 +98,639 @@ def calcular_price(valor_financiado, taxa_anual, meses):
     - Juros decrescentes
     - Amortização crescente
     """
-    i = (taxa_anual / 100) / 12
-    
-    # Fórmula do PMT (Pagamento Periódico)
-    if i == 0:
-        parcela_fixa = valor_financiado / meses
+    i = float(taxa_mensal(taxa_anual))
+
+    # Vetorizado: todos os meses de uma vez
+    return _linhas_price(valor_financiado, i, meses, np.arange(1, meses + 1))
+
+# ==========================================
+# 📦 CÁLCULO EM LOTE (Grade de Cenários)
+# ==========================================
+
+# Comprometimento de renda usado pelos bancos (parcela <= 30% da renda)
+COMPROMETIMENTO_RENDA = 0.30
+
+# Limite de células (meses x cenários) por bloco, para manter a memória sob controle
+MAX_CELULAS_BLOCO = 500_000
+
+SISTEMAS = ('SAC', 'PRICE')
+
+def normalizar_sistema(sistema):
+    sistema = str(sistema).upper()
+    if sistema not in SISTEMAS:
+        raise ValueError(f"Sistema de amortização inválido: {sistema} (use SAC ou PRICE)")
+    return sistema
+
+def _preparar_lote(valores_financiados, taxas_anuais, meses):
+    """Aplica o broadcast entre os parâmetros do lote e achata tudo em vetores 1-D."""
+    valores, taxas, prazos = np.broadcast_arrays(
+        np.asarray(valores_financiados, dtype=float),
+        np.asarray(taxas_anuais, dtype=float),
+        np.asarray(meses, dtype=int),
+    )
+    return valores.ravel(), taxas.ravel(), prazos.ravel()
+
+def _blocos_cenarios(valores, taxas, prazos, sistema, max_celulas=MAX_CELULAS_BLOCO):
+    """
+    Percorre os cenários em blocos, gerando as matrizes meses x cenários
+    (parcela, juros, saldo anterior) de cada bloco.
+    Meses além do prazo de cada cenário vêm zerados.
+    """
+    i = taxa_mensal(taxas)
+    horizonte = int(prazos.max()) if prazos.size else 0
+    tamanho_bloco = max(1, max_celulas // max(horizonte, 1))
+    k = np.arange(1, horizonte + 1)[:, None]  # coluna de meses (broadcast contra os cenários)
+
+    for ini in range(0, prazos.size, tamanho_bloco):
+        fim = min(ini + tamanho_bloco, prazos.size)
+        P, ib, nb = valores[ini:fim], i[ini:fim], prazos[ini:fim]
+
+        ativo = k <= nb
+        if sistema == 'SAC':
+            saldo_anterior = saldos_sac(P, nb, k - 1)
+            juros = saldo_anterior * ib
+            parcela = P / nb + juros
+        else:
+            saldo_anterior = saldos_price(P, ib, nb, k - 1)
+            juros = saldo_anterior * ib
+            parcela = np.broadcast_to(parcela_price(P, ib, nb), juros.shape)
+
+        yield (
+            slice(ini, fim),
+            np.where(ativo, parcela, 0.0),
+            np.where(ativo, juros, 0.0),
+            np.where(ativo, saldo_anterior, 0.0),
+        )
+
+def simular_cenarios(valores_financiados, taxas_anuais, meses, sistema='SAC', max_celulas=MAX_CELULAS_BLOCO):
+    """
+    Calcula muitos financiamentos de uma vez e devolve só o resumo de cada um.
+
+    Os três parâmetros aceitam número ou array (com broadcast entre eles).
+    O cálculo é feito numa matriz meses x cenários, quebrada em blocos
+    de no máximo `max_celulas` células.
+
+    Retorna um DataFrame com uma linha por cenário:
+    Valor Financiado, Taxa Anual, Meses, Sistema, Primeira Parcela,
+    Ultima Parcela, Total Pago, Total Juros, Renda Minima.
+    """
+    sistema = normalizar_sistema(sistema)
+    valores, taxas, prazos = _preparar_lote(valores_financiados, taxas_anuais, meses)
+
+    qtd = valores.size
+    primeira = np.empty(qtd)
+    ultima = np.empty(qtd)
+    total_pago = np.empty(qtd)
+    total_juros = np.empty(qtd)
+
+    for bloco, parcela, juros, _ in _blocos_cenarios(valores, taxas, prazos, sistema, max_celulas):
+        primeira[bloco] = parcela[0]
+        ultima[bloco] = parcela[prazos[bloco] - 1, np.arange(parcela.shape[1])]
+        total_pago[bloco] = parcela.sum(axis=0)
+        total_juros[bloco] = juros.sum(axis=0)
+
+    return pd.DataFrame({
+        'Valor Financiado': valores,
+        'Taxa Anual': taxas,
+        'Meses': prazos,
+        'Sistema': sistema,
+        'Primeira Parcela': primeira,
+        'Ultima Parcela': ultima,
+        'Total Pago': total_pago,
+        'Total Juros': total_juros,
+        'Renda Minima': primeira / COMPROMETIMENTO_RENDA,
+    })
+
+def grade_cenarios(valor_imovel, taxas_anuais, prazos_anos, percentuais_entrada, sistema='SAC'):
+    """
+    Monta a grade completa taxa x prazo x entrada (ex: 10 x 10 x 6)
+    para um imóvel e calcula todos os cenários numa chamada só.
+    """
+    taxas, anos, entradas = np.meshgrid(
+        np.asarray(taxas_anuais, dtype=float),
+        np.asarray(prazos_anos, dtype=int),
+        np.asarray(percentuais_entrada, dtype=float),
+        indexing='ij',
+    )
+    financiado = valor_imovel * (1 - entradas / 100)
+
+    df = simular_cenarios(financiado, taxas, anos * 12, sistema)
+    df.insert(0, 'Entrada (%)', entradas.ravel())
+    df.insert(1, 'Prazo (Anos)', anos.ravel())
+    return df
+
+# ==========================================
+# 🧠 CACHE DE TABELAS (LRU compartilhado entre sessões)
+# ==========================================
+
+# Quantas tabelas diferentes ficam guardadas na memória do servidor
+TAMANHO_CACHE = 256
+
+_cache_tabelas = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+def _chave_cache(valor_financiado, taxa_anual, meses, sistema):
+    """Normaliza as entradas: valor em centavos, taxa com 4 casas, prazo inteiro."""
+    return (
+        round(float(valor_financiado), 2),
+        round(float(taxa_anual), 4),
+        int(meses),
+        normalizar_sistema(sistema),
+    )
+
+def tabela_amortizacao(valor_financiado, taxa_anual, meses, sistema='SAC'):
+    """
+    Versão com cache de calcular_sac / calcular_price.
+
+    Tabelas idênticas (mesmo valor, taxa, prazo e sistema) são calculadas
+    uma vez só e compartilhadas por todos os corretores. O DataFrame
+    devolvido é somente leitura: quem precisar alterar deve usar .copy().
+    """
+    chave = _chave_cache(valor_financiado, taxa_anual, meses, sistema)
+
+    with _cache_lock:
+        colunas = _cache_tabelas.get(chave)
+        if colunas is not None:
+            _cache_tabelas.move_to_end(chave)
+            _cache_stats['hits'] += 1
+
+    if colunas is None:
+        valor, taxa, prazo, sistema = chave
+        calcular = calcular_sac if sistema == 'SAC' else calcular_price
+        df = calcular(valor, taxa, prazo)
+
+        colunas = {}
+        for col in COLUNAS:
+            arr = df[col].to_numpy(copy=True)
+            arr.flags.writeable = False
+            colunas[col] = arr
+
+        with _cache_lock:
+            _cache_stats['misses'] += 1
+            _cache_tabelas[chave] = colunas
+            _cache_tabelas.move_to_end(chave)
+            while len(_cache_tabelas) > TAMANHO_CACHE:
+                _cache_tabelas.popitem(last=False)
+                _cache_stats['evictions'] += 1
+
+    # DataFrame novo a cada chamada (sem cópia dos dados), para que ninguém
+    # consiga adicionar/remover colunas da entrada guardada no cache
+    return _montar_tabela(*(colunas[col] for col in COLUNAS), copy=False)
+
+def estatisticas_cache():
+    """Contadores do cache de tabelas (para monitoramento)."""
+    with _cache_lock:
+        stats = dict(_cache_stats)
+        stats['tamanho'] = len(_cache_tabelas)
+    stats['capacidade'] = TAMANHO_CACHE
+    consultas = stats['hits'] + stats['misses']
+    stats['taxa_acerto'] = stats['hits'] / consultas if consultas else 0.0
+    return stats
+
+def limpar_cache():
+    """Esvazia o cache de tabelas e zera os contadores."""
+    with _cache_lock:
+        _cache_tabelas.clear()
+        for k in _cache_stats:
+            _cache_stats[k] = 0
+
+# ==========================================
+# 🚀 AMORTIZAÇÃO EXTRA ("E se eu der um lance?")
+# ==========================================
+
+# Modos de abatimento aceitos pelo banco
+MODOS_EXTRA = ('prazo', 'parcela')
+
+def _fator_prazo(i, sistema, m):
+    """
+    Quanto saldo cada R$ 1 de parcela-base 'sustenta' por m meses:
+    - SAC: m (a amortização é saldo / meses restantes)
+    - PRICE: fator de valor presente (1 - (1+i)^-m) / i
+    """
+    m = np.asarray(m, dtype=float)
+    if sistema == 'SAC' or i == 0:
+        return m
+    return (1 - (1 + i) ** (-m)) / i
+
+def _vetor_extras(meses, extra_mensal=0.0, extra_periodico=0.0, intervalo_periodico=12):
+    """Extras (meses x cenários): valor mensal fixo + lance a cada `intervalo_periodico` meses (ex: FGTS anual)."""
+    k = np.arange(1, meses + 1)[:, None]
+    extra_mensal = np.atleast_1d(np.asarray(extra_mensal, dtype=float))[None, :]
+    extra_periodico = np.atleast_1d(np.asarray(extra_periodico, dtype=float))[None, :]
+    lance = (k % intervalo_periodico == 0) if intervalo_periodico else np.zeros_like(k, dtype=bool)
+    return extra_mensal + np.where(lance, extra_periodico, 0.0)
+
+def _motor_amortizacao_extra(valor_financiado, taxa_anual, meses, sistema, extras, modo):
+    """
+    Calcula de uma vez várias tabelas com amortização extra (uma por coluna de `extras`).
+
+    Sem laço mês a mês: entre um lance e outro o saldo segue a fórmula fechada,
+    então tudo vira soma acumulada (cumsum) ao longo dos meses.
+    - modo 'prazo': a parcela-base não muda e o saldo zera mais cedo.
+    - modo 'parcela': o prazo não muda e a parcela-base cai a cada lance.
+    """
+    sistema = normalizar_sistema(sistema)
+    if modo not in MODOS_EXTRA:
+        raise ValueError(f"Modo inválido: {modo} (use 'prazo' ou 'parcela')")
+
+    i = float(taxa_mensal(taxa_anual))
+    P = float(valor_financiado)
+    n = int(meses)
+    k = np.arange(1, n + 1)[:, None]
+    extras = np.broadcast_to(np.asarray(extras, dtype=float), (n, extras.shape[1]))
+
+    # Parcela-base: amortização fixa no SAC, PMT na PRICE
+    base_inicial = P / n if sistema == 'SAC' else float(parcela_price(P, i, n))
+
+    if modo == 'prazo':
+        crescimento = (1 + i) if sistema == 'PRICE' else 1.0
+        desconto = crescimento ** (-k.astype(float))
+        base = np.full(extras.shape, base_inicial)
+        saldo = (P - np.cumsum((base + extras) * desconto, axis=0)) / desconto
     else:
-        parcela_fixa = valor_financiado * (i * (1 + i)**meses) / ((1 + i)**meses - 1)
-        
-    dados = []
-    saldo_devedor = valor_financiado
-    
-    for n in range(1, meses + 1):
-        juros = saldo_devedor * i
-        amortizacao = parcela_fixa - juros
-        saldo_devedor -= amortizacao
-        
-        if saldo_devedor < 0:
-            saldo_devedor = 0
-            
-        dados.append([n, parcela_fixa, amortizacao, juros, saldo_devedor])
-        
-    df = pd.DataFrame(dados, columns=['Mes', 'Parcela', 'Amortizacao', 'Juros', 'Saldo Devedor'])
-    return df
\ No newline at end of file
+        restante = _fator_prazo(i, sistema, n - k)
+        # Cada lance reduz a parcela-base em extra / fator dos meses restantes
+        with np.errstate(divide='ignore', invalid='ignore'):
+            queda = np.where(restante > 0, extras / restante, 0.0)
+        queda_acumulada = np.vstack([np.zeros((1, extras.shape[1])), np.cumsum(queda, axis=0)[:-1]])
+        base = base_inicial - queda_acumulada
+        saldo = base * restante - extras
+
+    saldo_anterior = np.vstack([np.full((1, extras.shape[1]), P), saldo[:-1]])
+    juros = saldo_anterior * i
+    if sistema == 'SAC':
+        amortizacao = base.copy()
+    else:
+        amortizacao = base - juros
+
+    # Mês em que a dívida zera (o último pagamento é ajustado ao saldo que sobrou)
+    tolerancia = 1e-6 * max(P, 1.0)
+    quitado = saldo <= tolerancia
+    fim = np.where(quitado.any(axis=0), quitado.argmax(axis=0), n - 1)
+    colunas = np.arange(extras.shape[1])
+
+    ultimo_saldo = saldo_anterior[fim, colunas]
+    amortizacao[fim, colunas] = np.minimum(amortizacao[fim, colunas], ultimo_saldo)
+    extras = extras.copy()
+    extras[fim, colunas] = ultimo_saldo - amortizacao[fim, colunas]
+    saldo[fim, colunas] = 0.0
+
+    ativo = (k - 1) <= fim
+    amortizacao = np.where(ativo, amortizacao, 0.0)
+    juros = np.where(ativo, juros, 0.0)
+    extras = np.where(ativo, extras, 0.0)
+    saldo = np.where(ativo, np.maximum(saldo, 0.0), 0.0)
+    parcela = amortizacao + juros
+
+    return {
+        'parcela': parcela, 'amortizacao': amortizacao, 'juros': juros,
+        'extra': extras, 'saldo': saldo, 'fim': fim + 1,
+    }
+
+def calcular_amortizacao_extra(valor_financiado, taxa_anual, meses, sistema='SAC',
+                               extra_mensal=0.0, extra_periodico=0.0, intervalo_periodico=12, modo='prazo'):
+    """
+    Tabela de amortização com pagamentos extras.
+
+    - extra_mensal: valor extra pago todo mês
+    - extra_periodico / intervalo_periodico: lance a cada N meses (ex: FGTS a cada 12)
+    - modo: 'prazo' (reduz o prazo) ou 'parcela' (reduz a parcela)
+
+    Retorna as colunas padrão + 'Amortizacao Extra', só até o mês da quitação.
+    """
+    extras = _vetor_extras(int(meses), extra_mensal, extra_periodico, intervalo_periodico)
+    r = _motor_amortizacao_extra(valor_financiado, taxa_anual, meses, sistema, extras, modo)
+
+    fim = int(r['fim'][0])
+    df = _montar_tabela(
+        np.arange(1, fim + 1), r['parcela'][:fim, 0], r['amortizacao'][:fim, 0],
+        r['juros'][:fim, 0], r['saldo'][:fim, 0],
+    )
+    df.insert(4, 'Amortizacao Extra', r['extra'][:fim, 0])
+    return df
+
+def comparar_amortizacoes_extras(valor_financiado, taxa_anual, meses, sistema='SAC',
+                                 extras_mensais=(0.0,), extra_periodico=0.0, intervalo_periodico=12, modo='prazo'):
+    """
+    Modo em lote: compara vários valores de extra mensal de uma vez
+    (ex: R$ 0, 200, 500, 1000...) para o mesmo financiamento.
+
+    Retorna um DataFrame com uma linha por valor de extra.
+    """
+    meses = int(meses)
+    extras_mensais = np.atleast_1d(np.asarray(extras_mensais, dtype=float))
+
+    # Coluna 0 = cenário sem nenhum extra (referência para a economia)
+    mensais = np.concatenate([[0.0], extras_mensais])
+    periodicos = np.concatenate([[0.0], np.full(extras_mensais.size, float(extra_periodico))])
+    extras = _vetor_extras(meses, mensais, periodicos, intervalo_periodico)
+
+    r = _motor_amortizacao_extra(valor_financiado, taxa_anual, meses, sistema, extras, modo)
+    total_juros = r['juros'].sum(axis=0)
+    novo_prazo = r['fim']
+
+    return pd.DataFrame({
+        'Extra Mensal': extras_mensais,
+        'Novo Prazo': novo_prazo[1:],
+        'Meses Economizados': meses - novo_prazo[1:],
+        'Primeira Parcela': r['parcela'][0, 1:],
+        'Ultima Parcela': r['parcela'][novo_prazo[1:] - 1, np.arange(1, mensais.size)],
+        'Total Extras': r['extra'].sum(axis=0)[1:],
+        'Total Juros': total_juros[1:],
+        'Economia Juros': total_juros[0] - total_juros[1:],
+    })
+
+# ==========================================
+# 🧾 SEGUROS, TAXAS E C.E.T. (Custo Efetivo Total)
+# ==========================================
+
+def encargos_mensais(saldo_anterior, valor_imovel, mip_mensal=0.0, dfi_mensal=0.0, taxa_administracao=0.0):
+    """
+    Seguros e taxas cobrados junto com cada parcela (aceita arrays):
+    - MIP: % ao mês sobre o saldo devedor (seguro de morte e invalidez)
+    - DFI: % ao mês sobre o valor do imóvel (seguro de danos físicos)
+    - Taxa de administração: valor fixo em R$ por mês
+    """
+    saldo_anterior = np.asarray(saldo_anterior, dtype=float)
+    encargos = saldo_anterior * (mip_mensal / 100) + valor_imovel * (dfi_mensal / 100) + taxa_administracao
+    # Depois da quitação não há mais cobrança
+    return np.where(saldo_anterior > 0, encargos, 0.0)
+
+def adicionar_encargos(df, valor_imovel, mip_mensal=0.0, dfi_mensal=0.0, taxa_administracao=0.0):
+    """
+    Devolve uma cópia da tabela com as colunas 'Seguros/Taxas' e 'Parcela Total'.
+    Funciona também com tabelas do cache (somente leitura) e com amortização extra.
+    """
+    saldo_anterior = df['Saldo Devedor'].to_numpy() + df['Amortizacao'].to_numpy()
+    if 'Amortizacao Extra' in df.columns:
+        saldo_anterior = saldo_anterior + df['Amortizacao Extra'].to_numpy()
+
+    encargos = encargos_mensais(saldo_anterior, valor_imovel, mip_mensal, dfi_mensal, taxa_administracao)
+    return df.assign(**{
+        'Seguros/Taxas': encargos,
+        'Parcela Total': df['Parcela'].to_numpy() + encargos,
+    })
+
+def resolver_tir(valor_liquido, fluxos, chute=0.01, tolerancia=1e-12, max_iter=100):
+    """
+    Taxa interna de retorno mensal de um ou vários fluxos de caixa.
+
+    - valor_liquido: quanto o cliente recebeu de fato no mês 0 (número ou vetor)
+    - fluxos: pagamentos dos meses 1..n (vetor) ou matriz meses x cenários
+
+    Newton-Raphson vetorizado, com bisseção de segurança quando o passo
+    sai do intervalo conhecido (todas as colunas são resolvidas juntas).
+    """
+    fluxos = np.asarray(fluxos, dtype=float)
+    um_so = fluxos.ndim == 1
+    if um_so:
+        fluxos = fluxos[:, None]
+    qtd = fluxos.shape[1]
+
+    valor_liquido = np.broadcast_to(np.asarray(valor_liquido, dtype=float), (qtd,))
+    t = np.arange(1, fluxos.shape[0] + 1)[:, None]
+
+    # VPL(r) = soma(F_t / (1+r)^t) - V  é decrescente em r
+    baixo = np.full(qtd, -0.99)
+    alto = np.full(qtd, 1.0)
+    r = np.array(np.broadcast_to(np.asarray(chute, dtype=float), (qtd,)))
+
+    for _ in range(max_iter):
+        desconto = (1 + r) ** (-t)
+        vpl = (fluxos * desconto).sum(axis=0) - valor_liquido
+        derivada = -(t * fluxos * desconto).sum(axis=0) / (1 + r)
+
+        baixo = np.where(vpl > 0, r, baixo)
+        alto = np.where(vpl <= 0, r, alto)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            novo = r - vpl / derivada
+        fora = ~np.isfinite(novo) | (novo <= baixo) | (novo >= alto)
+        novo = np.where(fora, (baixo + alto) / 2, novo)
+
+        convergiu = np.abs(novo - r) < tolerancia
+        r = novo
+        if convergiu.all():
+            break
+
+    return r[0] if um_so else r
+
+def taxa_anual_efetiva(taxa_mensal_decimal):
+    """Converte taxa mensal (decimal) em taxa anual efetiva (%): (1+i)^12 - 1."""
+    return ((1 + np.asarray(taxa_mensal_decimal)) ** 12 - 1) * 100
+
+def calcular_cet(valor_financiado, fluxos, custos_iniciais=0.0):
+    """
+    C.E.T. anual (%) a partir dos pagamentos mensais totais (parcela + seguros + taxas).
+    `custos_iniciais` (tarifa de avaliação, IOF, etc.) são descontados do valor liberado.
+    Aceita um fluxo (vetor) ou vários (matriz meses x cenários).
+    """
+    valor_liquido = np.asarray(valor_financiado, dtype=float) - custos_iniciais
+    return taxa_anual_efetiva(resolver_tir(valor_liquido, fluxos))
+
+def cet_tabela(df, valor_financiado, custos_iniciais=0.0):
+    """CET de uma tabela já calculada (usa 'Parcela Total' quando houver encargos)."""
+    coluna = 'Parcela Total' if 'Parcela Total' in df.columns else 'Parcela'
+    fluxo = df[coluna].to_numpy()
+    if 'Amortizacao Extra' in df.columns:
+        fluxo = fluxo + df['Amortizacao Extra'].to_numpy()
+    return float(calcular_cet(valor_financiado, fluxo, custos_iniciais))
+
+def cet_cenarios(valores_financiados, taxas_anuais, meses, sistema='SAC', valor_imovel=None,
+                 mip_mensal=0.0, dfi_mensal=0.0, taxa_administracao=0.0, custos_iniciais=0.0,
+                 max_celulas=MAX_CELULAS_BLOCO):
+    """
+    CET anual (%) de milhares de cenários de uma vez (mesmo broadcast de simular_cenarios).
+    `valor_imovel` (para o DFI) e `custos_iniciais` também aceitam vetores.
+    Retorna um vetor com um CET por cenário, na mesma ordem de simular_cenarios.
+    """
+    sistema = normalizar_sistema(sistema)
+    valores, taxas, prazos = _preparar_lote(valores_financiados, taxas_anuais, meses)
+
+    imoveis = np.broadcast_to(
+        np.asarray(valores if valor_imovel is None else valor_imovel, dtype=float), valores.shape
+    )
+    custos = np.broadcast_to(np.asarray(custos_iniciais, dtype=float), valores.shape)
+    cet = np.empty(valores.size)
+
+    for bloco, parcela, _, saldo_anterior in _blocos_cenarios(valores, taxas, prazos, sistema, max_celulas):
+        encargos = encargos_mensais(saldo_anterior, imoveis[bloco], mip_mensal, dfi_mensal, taxa_administracao)
+        # A taxa do contrato é um ótimo chute inicial (o CET fica logo acima dela)
+        chute = taxa_mensal(taxas[bloco])
+        tir = resolver_tir(valores[bloco] - custos[bloco], parcela + encargos, chute=chute)
+        cet[bloco] = taxa_anual_efetiva(tir)
+
+    return cet
+
+# ==========================================
+# ⚡ RESUMO O(1) E TABELA SOB DEMANDA
+# ==========================================
+
+@dataclass(frozen=True)
+class ResumoFinanciamento:
+    """Os números que a tela mostra nos KPIs, sem montar a tabela inteira."""
+    valor_financiado: float
+    taxa_anual: float
+    meses: int
+    sistema: str
+    primeira_parcela: float
+    ultima_parcela: float
+    total_pago: float
+    total_juros: float
+
+    @property
+    def renda_minima(self):
+        return self.primeira_parcela / COMPROMETIMENTO_RENDA
+
+def resumo_financiamento(valor_financiado, taxa_anual, meses, sistema='SAC'):
+    """
+    Resumo do financiamento por fórmula fechada (O(1), não depende do prazo):
+    - SAC: juros totais = i * P * (n + 1) / 2
+    - PRICE: total pago = n * PMT
+    """
+    sistema = normalizar_sistema(sistema)
+    P = float(valor_financiado)
+    n = int(meses)
+    i = float(taxa_mensal(taxa_anual))
+
+    if sistema == 'SAC':
+        amortizacao = P / n
+        primeira = amortizacao + P * i
+        ultima = amortizacao * (1 + i)
+        total_juros = i * P * (n + 1) / 2
+        total_pago = P + total_juros
+    else:
+        primeira = ultima = float(parcela_price(P, i, n))
+        total_pago = primeira * n
+        total_juros = total_pago - P
+
+    return ResumoFinanciamento(
+        valor_financiado=P, taxa_anual=float(taxa_anual), meses=n, sistema=sistema,
+        primeira_parcela=primeira, ultima_parcela=ultima,
+        total_pago=total_pago, total_juros=total_juros,
+    )
+
+def _somas_desconto(v, n):
+    """S0 = Σ v^k e S1 = Σ k·v^k (k = 1..n), por fórmula fechada."""
+    if abs(1 - v) < 1e-12:
+        return float(n), n * (n + 1) / 2
+    vn = v ** n
+    s0 = v * (1 - vn) / (1 - v)
+    s1 = v * (1 - (n + 1) * vn + n * vn * v) / (1 - v) ** 2
+    return s0, s1
+
+def cet_financiamento(valor_financiado, taxa_anual, meses, sistema='SAC', valor_imovel=None,
+                      mip_mensal=0.0, dfi_mensal=0.0, taxa_administracao=0.0, custos_iniciais=0.0,
+                      tolerancia=1e-13, max_iter=50):
+    """
+    CET anual (%) de UM financiamento sem montar a tabela (mesmo valor de cet_cenarios).
+    Com o MIP sobre o saldo, o pagamento do mês k é linear em k no SAC e geométrico
+    na PRICE, então o valor presente do fluxo tem fórmula fechada: cada passo do
+    Newton custa O(1), qualquer que seja o prazo.
+    """
+    sistema = normalizar_sistema(sistema)
+    P = float(valor_financiado)
+    n = int(meses)
+    i = float(taxa_mensal(taxa_anual))
+    if P <= 0 or n <= 0 or i <= 0:
+        return float(cet_cenarios(P, taxa_anual, n, sistema, valor_imovel, mip_mensal,
+                                  dfi_mensal, taxa_administracao, custos_iniciais)[0])
+
+    m = mip_mensal / 100
+    fixo = (P if valor_imovel is None else float(valor_imovel)) * (dfi_mensal / 100) + taxa_administracao
+    liquido = P - custos_iniciais
+
+    if sistema == 'SAC':
+        # saldo anterior do mês k = P + A - A·k  ->  pagamento = alfa + beta·k
+        A = P / n
+        alfa = A + fixo + (i + m) * (P + A)
+        beta = -(i + m) * A
+
+        def vpl(r):
+            s0, s1 = _somas_desconto(1 / (1 + r), n)
+            return alfa * s0 + beta * s1 - liquido
+    else:
+        # saldo anterior do mês k = (P - PMT/i)(1+i)^(k-1) + PMT/i
+        pmt = float(parcela_price(P, i, n))
+        constante = pmt + fixo + m * pmt / i
+        geometrico = m * (P - pmt / i)
+
+        def vpl(r):
+            v = 1 / (1 + r)
+            s0, _ = _somas_desconto(v, n)
+            qv = (1 + i) * v
+            g = v * (1 - qv ** n) / (1 - qv) if abs(1 - qv) > 1e-12 else n * v
+            return constante * s0 + geometrico * g - liquido
+
+    # Newton com derivada numérica, partindo da taxa do contrato
+    r, h = i, 1e-7
+    for _ in range(max_iter):
+        derivada = (vpl(r + h) - vpl(r - h)) / (2 * h)
+        passo = vpl(r) / derivada
+        r -= passo
+        if abs(passo) < tolerancia:
+            break
+    return float(taxa_anual_efetiva(r))
+
+class TabelaLazy:
+    """
+    Tabela de amortização que só é montada quando alguém pede as linhas.
+
+    - resumo: KPIs em O(1), sem nenhuma linha
+    - linhas(inicio, fim): só os meses pedidos (ex: primeiro ano, página da tabela)
+    - completa(): a tabela inteira, via cache compartilhado (somente leitura)
+    """
+
+    def __init__(self, valor_financiado, taxa_anual, meses, sistema='SAC'):
+        self.valor_financiado = float(valor_financiado)
+        self.taxa_anual = float(taxa_anual)
+        self.meses = int(meses)
+        self.sistema = normalizar_sistema(sistema)
+        self._resumo = None
+
+    def __len__(self):
+        return self.meses
+
+    @property
+    def resumo(self):
+        if self._resumo is None:
+            self._resumo = resumo_financiamento(self.valor_financiado, self.taxa_anual, self.meses, self.sistema)
+        return self._resumo
+
+    def linhas(self, inicio=1, fim=None):
+        """Linhas dos meses `inicio` até `fim` (inclusive, contando a partir de 1)."""
+        fim = self.meses if fim is None else min(int(fim), self.meses)
+        mes = np.arange(max(int(inicio), 1), fim + 1)
+        i = float(taxa_mensal(self.taxa_anual))
+        calcular = _linhas_sac if self.sistema == 'SAC' else _linhas_price
+        return calcular(self.valor_financiado, i, self.meses, mes)
+
+    def completa(self):
+        return tabela_amortizacao(self.valor_financiado, self.taxa_anual, self.meses, self.sistema)
+
+
+# ==========================================
+# 💾 TABELA COMPACTA (para guardar junto da simulação salva)
+# ==========================================
+# As colunas numéricas viram UM bloco float64 (coluna após coluna) comprimido
+# com zlib: poucos KB por tabela de 360 meses. O 'Mes' não é guardado (é 1..n).
+# Na leitura, cada coluna é uma view do buffer descomprimido (sem cópia) e,
+# como no cache, o DataFrame é somente leitura.
+
+FORMATO_TABELA = "zlib-f64-colunas-v1"
+
+def compactar_tabela(df):
+    """Retorna (bytes comprimidos, lista de colunas guardadas)."""
+    colunas = [c for c in df.columns if c != 'Mes']
+    bloco = np.empty((len(colunas), len(df)), dtype='<f8')
+    for k, coluna in enumerate(colunas):
+        bloco[k] = df[coluna].to_numpy(dtype=float)
+    return zlib.compress(bloco.tobytes(), 6), colunas
+
+def carregar_tabela_compacta(dados, colunas):
+    """Reconstrói o DataFrame a partir do que compactar_tabela gerou (colunas sem cópia)."""
+    bloco = np.frombuffer(zlib.decompress(dados), dtype='<f8').reshape(len(colunas), -1)
+    tabela = {'Mes': np.arange(1, bloco.shape[1] + 1)}
+    tabela.update(zip(colunas, bloco))
+    return pd.DataFrame(tabela, copy=False)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+from core.calculos import tabela_amortizacao
+
+# ==========================================
+# 🏠 ALUGUEL vs. COMPRA (Projeção de Patrimônio)
+# ==========================================
+# Compra: paga as parcelas, o imóvel valoriza e o saldo devedor cai.
+# Aluguel: investe a entrada (e os custos de compra) no CDI e paga aluguel.
+# Para ser justo, quem gasta MENOS no mês investe a diferença no CDI.
+# CDI e valorização aceitam arrays: cada combinação vira um cenário (coluna).
+
+def _acumular(aporte_inicial, aportes, taxa):
+    """
+    Carteira que rende `taxa` ao mês e recebe `aportes` (meses x cenários) no fim de cada mês:
+    W_t = (1+r)^t * [W_0 + soma(aporte_j / (1+r)^j)]   (soma acumulada, sem laço)
+    """
+    t = np.arange(1, aportes.shape[0] + 1)[:, None]
+    crescimento = (1 + taxa) ** t
+    return crescimento * (aporte_inicial + np.cumsum(aportes / crescimento, axis=0))
+
+def projetar_aluguel_vs_compra(valor_imovel, entrada, taxa_anual, meses, aluguel_inicial,
+                               cdi_anual, valorizacao_anual, sistema='SAC', reajuste_aluguel=None,
+                               custos_compra=0.0, horizonte_meses=None, aliquota_ir=0.15):
+    """
+    Projeta mês a mês o patrimônio dos dois caminhos.
+
+    - cdi_anual / valorizacao_anual: % ao ano (número ou array, com broadcast entre eles)
+    - reajuste_aluguel: % ao ano (None = acompanha a valorização do imóvel)
+    - custos_compra: ITBI, escritura etc. (quem aluga investe esse valor também)
+    - aliquota_ir: imposto sobre o rendimento do CDI
+
+    Retorna um dict com 'mes', 'cdi', 'valorizacao', 'patrimonio_compra',
+    'patrimonio_aluguel' (meses x cenários) e 'cruzamento' (mês em que
+    comprar passa a valer mais; NaN se não acontecer no horizonte).
+    """
+    horizonte = int(horizonte_meses or meses)
+    cdi, valorizacao = np.broadcast_arrays(
+        np.asarray(cdi_anual, dtype=float), np.asarray(valorizacao_anual, dtype=float)
+    )
+    cdi, valorizacao = cdi.ravel(), valorizacao.ravel()
+    reajuste = valorizacao if reajuste_aluguel is None else np.broadcast_to(
+        np.asarray(reajuste_aluguel, dtype=float), valorizacao.shape
+    )
+
+    # Parcelas e saldo vêm da mesma tabela (cacheada) do simulador
+    tabela = tabela_amortizacao(valor_imovel - entrada, taxa_anual, meses, sistema)
+    parcela = np.zeros(horizonte)
+    saldo = np.zeros(horizonte)
+    limite = min(horizonte, len(tabela))
+    parcela[:limite] = tabela['Parcela'].to_numpy()[:limite]
+    saldo[:limite] = tabela['Saldo Devedor'].to_numpy()[:limite]
+    parcela, saldo = parcela[:, None], saldo[:, None]
+
+    mes = np.arange(1, horizonte + 1)[:, None]
+    rendimento = ((1 + cdi / 100) ** (1 / 12) - 1) * (1 - aliquota_ir)
+    imovel = valor_imovel * (1 + valorizacao / 100) ** (mes / 12)
+
+    # Aluguel reajustado uma vez por ano
+    aluguel = aluguel_inicial * (1 + reajuste / 100) ** ((mes - 1) // 12)
+
+    diferenca = parcela - aluguel
+    carteira_aluguel = _acumular(entrada + custos_compra, np.maximum(diferenca, 0.0), rendimento)
+    carteira_compra = _acumular(0.0, np.maximum(-diferenca, 0.0), rendimento)
+
+    patrimonio_compra = imovel - saldo + carteira_compra
+    patrimonio_aluguel = carteira_aluguel
+
+    compra_na_frente = patrimonio_compra >= patrimonio_aluguel
+    cruzamento = np.where(compra_na_frente.any(axis=0), compra_na_frente.argmax(axis=0) + 1, np.nan)
+
+    return {
+        'mes': mes.ravel(),
+        'cdi': cdi,
+        'valorizacao': valorizacao,
+        'patrimonio_compra': patrimonio_compra,
+        'patrimonio_aluguel': patrimonio_aluguel,
+        'cruzamento': cruzamento,
+    }
+
+def tabela_projecao(projecao, cenario=0):
+    """DataFrame mês a mês de um cenário (para o gráfico de linhas cruzadas)."""
+    return pd.DataFrame({
+        'Mes': projecao['mes'],
+        'Patrimonio Compra': projecao['patrimonio_compra'][:, cenario],
+        'Patrimonio Aluguel': projecao['patrimonio_aluguel'][:, cenario],
+    })
+
+def resumo_horizontes(projecao, horizontes_anos=(5, 10, 20, 30)):
+    """
+    Uma linha por cenário x horizonte: patrimônio de cada caminho,
+    diferença (compra - aluguel) e o mês do cruzamento.
+    """
+    meses = np.asarray(horizontes_anos, dtype=int) * 12
+    meses = meses[meses <= len(projecao['mes'])]
+    qtd = projecao['cdi'].size
+
+    compra = projecao['patrimonio_compra'][meses - 1]    # horizontes x cenários
+    aluguel = projecao['patrimonio_aluguel'][meses - 1]
+
+    return pd.DataFrame({
+        'CDI (%)': np.tile(projecao['cdi'], meses.size),
+        'Valorizacao (%)': np.tile(projecao['valorizacao'], meses.size),
+        'Horizonte (Anos)': np.repeat(meses // 12, qtd),
+        'Patrimonio Compra': compra.ravel(),
+        'Patrimonio Aluguel': aluguel.ravel(),
+        'Diferenca': (compra - aluguel).ravel(),
+        'Cruzamento (Mes)': np.tile(projecao['cruzamento'], meses.size),
+    })
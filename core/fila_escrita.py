@@ -0,0 +1,137 @@
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+
+# ==========================================
+# ✍️ FILA DE ESCRITA (Write-behind)
+# ==========================================
+# Em vez de cada clique em "Salvar" disputar o lock de escrita do banco
+# (no SQLite só existe UM escritor por vez), as gravações entram numa fila
+# e UMA thread dedicada grava tudo em transações agrupadas.
+# Quem enfileira recebe um Future: pode seguir em frente ou esperar o resultado.
+# A fila é limitada: se encher, quem enfileira espera (backpressure).
+
+TAMANHO_FILA = 1_000      # operações pendentes antes de segurar quem enfileira
+TAMANHO_GRUPO = 100       # operações gravadas por transação
+TIMEOUT_ENFILEIRAR = 10   # segundos esperando vaga na fila cheia
+
+_FIM = object()
+
+_fila = None
+_thread = None
+_engine = None
+_ao_gravar = None
+_lock = threading.Lock()
+
+def iniciar(engine, tamanho_fila=TAMANHO_FILA, tamanho_grupo=TAMANHO_GRUPO, ao_gravar=None):
+    """
+    Cria a fila e a thread escritora (uma vez por processo).
+    `ao_gravar()` roda depois de cada commit e ANTES de liberar os Futures
+    (ex.: invalidar caches de leitura).
+    """
+    global _fila, _thread, _engine, _ao_gravar
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _engine = engine
+        _ao_gravar = ao_gravar
+        _fila = queue.Queue(maxsize=tamanho_fila)
+        _thread = threading.Thread(
+            target=_escritor, args=(_fila, int(tamanho_grupo)), name="fila-escrita", daemon=True
+        )
+        _thread.start()
+
+def ativa():
+    return _thread is not None and _thread.is_alive()
+
+def enfileirar(operacao, *args, timeout=TIMEOUT_ENFILEIRAR):
+    """
+    Agenda `operacao(conn, *args)` para a thread escritora e devolve um Future
+    com o retorno da operação (ou a exceção).
+    Levanta queue.Full se a fila continuar cheia depois de `timeout` segundos.
+    """
+    if not ativa():
+        raise RuntimeError("Fila de escrita não iniciada (chame fila_escrita.iniciar).")
+    futuro = Future()
+    _fila.put((operacao, args, futuro), timeout=timeout)
+    return futuro
+
+def _avisar_gravacao():
+    if _ao_gravar is not None:
+        try:
+            _ao_gravar()
+        except Exception as e:
+            print(f"Erro no aviso da fila de escrita: {e}")
+
+def _executar_grupo(grupo):
+    """Grava o grupo numa transação só; se falhar, refaz uma a uma para isolar a culpada."""
+    try:
+        with _engine.begin() as conn:
+            resultados = [operacao(conn, *args) for operacao, args, _ in grupo]
+    except Exception:
+        for operacao, args, futuro in grupo:
+            try:
+                with _engine.begin() as conn:
+                    resultado = operacao(conn, *args)
+            except Exception as e:
+                print(f"Erro na fila de escrita: {e}")
+                futuro.set_exception(e)
+                continue
+            _avisar_gravacao()
+            futuro.set_result(resultado)
+        return
+
+    _avisar_gravacao()
+    for (_, _, futuro), resultado in zip(grupo, resultados):
+        futuro.set_result(resultado)
+
+def _escritor(fila, tamanho_grupo):
+    while True:
+        item = fila.get()
+        grupo, encerrar = [], item is _FIM
+        if not encerrar:
+            grupo.append(item)
+        # Junta o que já estiver esperando (sem bloquear) no mesmo grupo
+        while not encerrar and len(grupo) < tamanho_grupo:
+            try:
+                item = fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is _FIM:
+                encerrar = True
+            else:
+                grupo.append(item)
+
+        if grupo:
+            _executar_grupo(grupo)
+        for _ in range(len(grupo) + (1 if encerrar else 0)):
+            fila.task_done()
+        if encerrar:
+            return
+
+def descarregar(timeout=None):
+    """Espera a fila esvaziar (tudo gravado). Retorna False se estourar o timeout."""
+    if not ativa():
+        return True
+    if timeout is None:
+        _fila.join()
+        return True
+    evento = threading.Event()
+    threading.Thread(target=lambda: (_fila.join(), evento.set()), daemon=True).start()
+    return evento.wait(timeout)
+
+def pendentes():
+    """Operações na fila esperando a thread escritora (para monitoramento)."""
+    return _fila.qsize() if _fila is not None else 0
+
+@atexit.register
+def encerrar(timeout=30):
+    """Grava o que estiver pendente e para a thread (roda sozinho ao desligar o servidor)."""
+    global _thread
+    with _lock:
+        if not ativa():
+            return
+        _fila.put(_FIM)
+        _thread.join(timeout)
+        _thread = None
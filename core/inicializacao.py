@@ -0,0 +1,96 @@
+import importlib
+import re
+import subprocess
+import sys
+import threading
+
+# ==========================================
+# 🚀 INICIALIZAÇÃO RÁPIDA (imports sob demanda + relatório de importação)
+# ==========================================
+# Bibliotecas pesadas (plotly, xhtml2pdf/reportlab, jinja2, openpyxl) só são
+# carregadas quando alguém usa de verdade, e não ao abrir a tela de login.
+# Para ver o custo de importação: python -m core.inicializacao
+
+# O que NÃO pode ser carregado no caminho da tela de login
+MODULOS_PESADOS = ('plotly', 'xhtml2pdf', 'reportlab', 'openpyxl', 'jinja2')
+
+# Importado antes de medir: o custo (e o que ele mesmo carrega) não é nosso
+MODULOS_BASE = ('streamlit',)
+
+# Módulos importados pelo app.py antes do login
+MODULOS_INICIAIS = ('views.login', 'core.database', 'services.auth_service')
+
+class _ModuloSobDemanda:
+    """Representa um módulo que só é importado no primeiro acesso a um atributo."""
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+        self._lock = threading.Lock()
+
+    def _carregar(self):
+        if self._modulo is None:
+            with self._lock:
+                if self._modulo is None:
+                    self._modulo = importlib.import_module(self._nome)
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._carregar(), atributo)
+
+    def __repr__(self):
+        estado = "carregado" if self._modulo is not None else "sob demanda"
+        return f"<módulo {self._nome} ({estado})>"
+
+def modulo_sob_demanda(nome):
+    """Ex.: go = modulo_sob_demanda('plotly.graph_objects'); o import acontece no primeiro go.Figure()."""
+    return _ModuloSobDemanda(nome)
+
+_LINHA_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def medir_importacao(modulos=MODULOS_INICIAIS, base=MODULOS_BASE):
+    """
+    Importa `base` e depois `modulos` num interpretador novo com `-X importtime`.
+    Retorna lista de (modulo, self_ms, cumulativo_ms, nivel) só do que veio depois da base.
+    """
+    codigo = "; ".join(f"import {m}" for m in tuple(base) + tuple(modulos))
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    medidas = []
+    for linha in saida.splitlines():
+        achou = _LINHA_IMPORTTIME.match(linha)
+        if achou:
+            proprio, cumulativo, recuo, nome = achou.groups()
+            medidas.append((nome, int(proprio) / 1000, int(cumulativo) / 1000, (len(recuo) - 1) // 2))
+
+    # O -X importtime imprime cada módulo quando ele TERMINA: tudo até a última
+    # linha de 1º nível da base foi carregado pela base
+    fim_base = max((k for k, m in enumerate(medidas) if m[3] == 0 and m[0] in base), default=-1)
+    return medidas[fim_base + 1:]
+
+def relatorio_importacao(modulos=MODULOS_INICIAIS, top=15):
+    """
+    Texto com o tempo total, os `top` módulos mais caros (cumulativo, só o 1º nível)
+    e a lista de pesados carregados indevidamente. Retorna (texto, pesados_encontrados).
+    """
+    medidas = medir_importacao(modulos)
+    raiz = [m for m in medidas if m[3] == 0]
+    total = sum(m[2] for m in raiz)
+    pesados = sorted({m[0].split('.')[0] for m in medidas if m[0].split('.')[0] in MODULOS_PESADOS})
+
+    linhas = [f"⏱️ Importação de {', '.join(modulos)}: {total:.0f} ms"]
+    for nome, _, cumulativo, _ in sorted(raiz, key=lambda m: -m[2])[:top]:
+        linhas.append(f"  {cumulativo:8.1f} ms  {nome}")
+    if pesados:
+        linhas.append(f"⚠️ Módulos pesados carregados no início: {', '.join(pesados)}")
+    else:
+        linhas.append("✅ Nenhum módulo pesado carregado no início.")
+    return "\n".join(linhas), pesados
+
+if __name__ == "__main__":
+    # Uso: python -m core.inicializacao [modulo ...]   (sai com erro se carregar algo pesado)
+    texto, pesados = relatorio_importacao(tuple(sys.argv[1:]) or MODULOS_INICIAIS)
+    print(texto)
+    sys.exit(1 if pesados else 0)
@@ -0,0 +1,264 @@
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import DateTime, bindparam, inspect, text
+from core import resumo_diario
+
+# ==========================================
+# 🧱 MIGRAÇÕES VERSIONADAS DO BANCO
+# ==========================================
+# Cada migração roda UMA vez, dentro de uma transação, e fica registrada
+# na tabela `schema_versao`. Bancos antigos (criados antes das migrações)
+# são atualizados no lugar, sem perder dados.
+# Para evoluir o banco: crie uma função _mNNN_... e adicione em MIGRACOES.
+# Várias réplicas podem subir juntas: cada transação de migração segura um
+# lock do BANCO (advisory lock no PostgreSQL, BEGIN IMMEDIATE no SQLite) e
+# relê a versão antes de aplicar, então só uma aplica e as outras pulam.
+
+TABELA_VERSAO = "schema_versao"
+
+# Chave do pg_advisory_xact_lock das migrações (qualquer bigint fixo do app)
+CHAVE_LOCK_MIGRACOES = 7_420_001
+
+log = logging.getLogger(__name__)
+
+def _tipo_id_automatico(conn):
+    """Chave que o banco preenche sozinho (como o create_all do SQLAlchemy fazia)."""
+    return "INTEGER NOT NULL PRIMARY KEY" if conn.dialect.name == "sqlite" else "SERIAL PRIMARY KEY"
+
+def _tipo_data_hora(conn):
+    """PostgreSQL não tem DATETIME."""
+    return "DATETIME" if conn.dialect.name == "sqlite" else "TIMESTAMP"
+
+def _m001_criar_simulacoes(conn):
+    """Esquema original (igual ao que inicializar_banco criava)."""
+    conn.execute(text(f"""
+    CREATE TABLE IF NOT EXISTS simulacoes (
+        id {_tipo_id_automatico(conn)},
+        cliente VARCHAR,
+        valor_imovel FLOAT,
+        entrada FLOAT,
+        parcela FLOAT,
+        status VARCHAR,
+        usuario_criacao VARCHAR,
+        data_criacao VARCHAR
+    )
+    """))
+
+def _m002_data_criacao_timestamp(conn):
+    """data_criacao deixa de ser texto formatado e vira TIMESTAMP de verdade."""
+    if conn.dialect.name == "sqlite":
+        # SQLite não altera tipo de coluna: recria a tabela e copia os dados.
+        # O formato gravado é o mesmo que o SQLAlchemy usa para DateTime no SQLite.
+        conn.execute(text("""
+        CREATE TABLE simulacoes_nova (
+            id INTEGER NOT NULL PRIMARY KEY,
+            cliente VARCHAR,
+            valor_imovel FLOAT,
+            entrada FLOAT,
+            parcela FLOAT,
+            status VARCHAR,
+            usuario_criacao VARCHAR,
+            data_criacao DATETIME
+        )
+        """))
+        conn.execute(text("""
+        INSERT INTO simulacoes_nova
+            (id, cliente, valor_imovel, entrada, parcela, status, usuario_criacao, data_criacao)
+        SELECT id, cliente, valor_imovel, entrada, parcela, status, usuario_criacao,
+               COALESCE(datetime(data_criacao) || '.000000', data_criacao)
+        FROM simulacoes
+        """))
+        conn.execute(text("DROP TABLE simulacoes"))
+        conn.execute(text("ALTER TABLE simulacoes_nova RENAME TO simulacoes"))
+    else:
+        conn.execute(text("""
+        ALTER TABLE simulacoes
+        ALTER COLUMN data_criacao TYPE TIMESTAMP USING data_criacao::timestamp
+        """))
+
+def _m003_indices_simulacoes(conn):
+    """Índices para o histórico por corretor e para filtros de data."""
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_simulacoes_usuario_id ON simulacoes (usuario_criacao, id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_simulacoes_data_criacao ON simulacoes (data_criacao)"
+    ))
+
+def _m004_status_lead(conn):
+    """Coluna do funil de vendas (CRM leve do ROADMAP): Novo -> Visita -> Proposta -> Vendido."""
+    conn.execute(text("ALTER TABLE simulacoes ADD COLUMN status_lead VARCHAR DEFAULT 'Novo'"))
+    conn.execute(text("UPDATE simulacoes SET status_lead = 'Novo' WHERE status_lead IS NULL"))
+
+def _m005_resumo_diario(conn):
+    """Tabela de resumo diário do dashboard, já preenchida com o histórico existente."""
+    resumo_diario.criar_tabela(conn)
+    resumo_diario.reconstruir(conn)
+
+def _m006_exclusao_logica_e_arquivo(conn):
+    """
+    Exclusão lógica (excluida_em) e tabela de arquivo para simulações antigas.
+    O arquivo tem as mesmas colunas (mesmos ids) + a data em que foi arquivada.
+    """
+    data_hora = _tipo_data_hora(conn)
+    conn.execute(text(f"ALTER TABLE simulacoes ADD COLUMN excluida_em {data_hora}"))
+    conn.execute(text(f"""
+    CREATE TABLE IF NOT EXISTS simulacoes_arquivo (
+        id INTEGER NOT NULL PRIMARY KEY,
+        cliente VARCHAR,
+        valor_imovel FLOAT,
+        entrada FLOAT,
+        parcela FLOAT,
+        status VARCHAR,
+        usuario_criacao VARCHAR,
+        data_criacao {data_hora},
+        status_lead VARCHAR,
+        excluida_em {data_hora},
+        arquivada_em {data_hora}
+    )
+    """))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_simulacoes_arquivo_usuario_id ON simulacoes_arquivo (usuario_criacao, id)"
+    ))
+
+def _m007_tabelas_salvas(conn):
+    """
+    Entradas + tabela de amortização compacta de cada simulação salva
+    (tabela à parte para não engordar as consultas do histórico).
+    """
+    tipo_binario = "BLOB" if conn.dialect.name == "sqlite" else "BYTEA"
+    conn.execute(text(f"""
+    CREATE TABLE IF NOT EXISTS simulacoes_tabelas (
+        simulacao_id INTEGER NOT NULL PRIMARY KEY,
+        sistema VARCHAR,
+        valor_financiado FLOAT,
+        taxa_anual FLOAT,
+        meses INTEGER,
+        parametros VARCHAR,
+        formato VARCHAR,
+        colunas VARCHAR,
+        tabela {tipo_binario}
+    )
+    """))
+
+def _m008_id_automatico_postgres(conn):
+    """
+    No PostgreSQL a 001 criava `id INTEGER` sem gerador (todo INSERT sem id falhava).
+    Bancos criados assim ganham uma IDENTITY que continua do maior id existente.
+    """
+    if conn.dialect.name == "sqlite":
+        return
+    padrao, identidade = conn.execute(text("""
+    SELECT column_default, is_identity FROM information_schema.columns
+    WHERE table_name = 'simulacoes' AND column_name = 'id' AND table_schema = current_schema()
+    """)).one()
+    if padrao is not None or identidade == "YES":
+        return
+    proximo = conn.execute(text("SELECT COALESCE(MAX(id), 0) + 1 FROM simulacoes")).scalar()
+    conn.execute(text(
+        f"ALTER TABLE simulacoes ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY (START WITH {int(proximo)})"
+    ))
+
+def _m009_geracao_dados(conn):
+    """
+    Contador de alterações das simulações, incrementado na mesma transação de
+    toda escrita. Os caches de consulta de todos os processos comparam com ele.
+    """
+    conn.execute(text("""
+    CREATE TABLE IF NOT EXISTS geracao_dados (
+        nome VARCHAR(40) NOT NULL PRIMARY KEY,
+        geracao INTEGER NOT NULL
+    )
+    """))
+    conn.execute(text("INSERT INTO geracao_dados (nome, geracao) VALUES ('simulacoes', 0)"))
+
+MIGRACOES = [
+    (1, "Cria tabela simulacoes", _m001_criar_simulacoes),
+    (2, "data_criacao como TIMESTAMP", _m002_data_criacao_timestamp),
+    (3, "Índices (usuario_criacao, id) e (data_criacao)", _m003_indices_simulacoes),
+    (4, "Coluna status_lead", _m004_status_lead),
+    (5, "Resumo diário (dia, corretor, status)", _m005_resumo_diario),
+    (6, "Exclusão lógica e tabela simulacoes_arquivo", _m006_exclusao_logica_e_arquivo),
+    (7, "Tabela simulacoes_tabelas (entradas + tabela compacta)", _m007_tabelas_salvas),
+    (8, "id automático em simulacoes (PostgreSQL)", _m008_id_automatico_postgres),
+    (9, "Tabela geracao_dados (invalidação do cache entre processos)", _m009_geracao_dados),
+]
+
+def _registrar_versao(conn, numero, descricao):
+    conn.execute(
+        text(f"INSERT INTO {TABELA_VERSAO} (versao, descricao, aplicada_em) VALUES (:v, :d, :dt)")
+        .bindparams(bindparam("dt", type_=DateTime)),
+        {"v": numero, "d": descricao, "dt": datetime.now()},
+    )
+
+def versao_atual(conn):
+    """Versão do esquema gravada no banco (0 = banco vazio)."""
+    inspetor = inspect(conn)
+    if not inspetor.has_table(TABELA_VERSAO):
+        # Banco criado antes das migrações: a tabela original já existe
+        return 1 if inspetor.has_table("simulacoes") else 0
+    return conn.execute(text(f"SELECT COALESCE(MAX(versao), 0) FROM {TABELA_VERSAO}")).scalar()
+
+@contextmanager
+def _transacao_exclusiva(engine):
+    """Transação que só um processo por vez consegue abrir (commit no fim, rollback se falhar)."""
+    with engine.connect() as conn:
+        if conn.dialect.name != "sqlite":
+            with conn.begin():
+                if conn.dialect.name == "postgresql":
+                    conn.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": CHAVE_LOCK_MIGRACOES})
+                yield conn
+            return
+        # O pysqlite não abre transação antes de DDL: abrimos nós, já com o lock de escrita
+        driver = conn.connection.driver_connection
+        nivel = driver.isolation_level
+        driver.isolation_level = None
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        finally:
+            driver.isolation_level = nivel
+
+def executar_migracoes(engine):
+    """Aplica as migrações pendentes, uma transação por versão. Retorna a versão final."""
+    with _transacao_exclusiva(engine) as conn:
+        versao = versao_atual(conn)
+        conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_VERSAO} (
+            versao INTEGER NOT NULL PRIMARY KEY,
+            descricao VARCHAR,
+            aplicada_em TIMESTAMP
+        )
+        """))
+        if versao == 1 and not conn.execute(text(f"SELECT 1 FROM {TABELA_VERSAO}")).first():
+            # Registra o esquema legado como versão 1
+            _registrar_versao(conn, 1, MIGRACOES[0][1] + " (legado)")
+
+    for numero, descricao, migracao in MIGRACOES:
+        if numero <= versao:
+            continue
+        with _transacao_exclusiva(engine) as conn:
+            # Outra réplica pode ter aplicado enquanto esperávamos o lock
+            aplicar = versao_atual(conn) < numero
+            if aplicar:
+                migracao(conn)
+                _registrar_versao(conn, numero, descricao)
+        if aplicar:
+            log.info("Migração %03d aplicada: %s", numero, descricao)
+        else:
+            log.info("Migração %03d já aplicada por outro processo: %s", numero, descricao)
+        versao = numero
+
+    return versao
+
+if __name__ == "__main__":
+    # Uso: python -m core.migracoes
+    from core.database import get_engine
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    log.info("Esquema na versão %s", executar_migracoes(get_engine()))
@@ -0,0 +1,187 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from core.calculos import normalizar_sistema, taxa_mensal
+
+# ==========================================
+# 🎲 MONTE CARLO - FINANCIAMENTO INDEXADO (TR / IPCA / Pós-fixado)
+# ==========================================
+# Cada caminho é um futuro possível do indexador. Os cálculos são feitos
+# numa matriz meses x caminhos (sem laço por caminho) e os caminhos são
+# divididos entre os núcleos da máquina por um pool de processos.
+
+PROCESSOS = ('passeio', 'reversao', 'historico')
+MODOS = ('correcao', 'flutuante')
+
+# Abaixo disso não compensa o custo de mandar o trabalho para outros processos
+MIN_CAMINHOS_POR_PROCESSO = 2_000
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def _obter_pool(workers):
+    """Pool de processos único por servidor (criado no primeiro uso e reaproveitado)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # 'spawn' evita herdar as threads do Streamlit no fork
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+@atexit.register
+def _encerrar_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _gerar_indices(rng, meses, caminhos, processo, inicial, media, volatilidade, velocidade, historico, piso):
+    """
+    Gera a matriz meses x caminhos do indexador, já em taxa MENSAL (decimal).
+    - passeio: passeio aleatório do índice anual (%)
+    - reversao: volta para a média `media` com velocidade `velocidade` (ao ano)
+    - historico: reamostra blocos de 12 meses de uma série histórica mensal (%)
+    """
+    if processo == 'historico':
+        serie = np.asarray(historico, dtype=float)
+        if serie.size == 0:
+            raise ValueError("Informe a série histórica mensal do índice (%).")
+        bloco = min(12, serie.size)
+        qtd_blocos = -(-meses // bloco)
+        inicios = rng.integers(0, serie.size - bloco + 1, size=(qtd_blocos, 1, caminhos))
+        posicoes = (inicios + np.arange(bloco)[None, :, None]).reshape(qtd_blocos * bloco, caminhos)[:meses]
+        return serie[posicoes] / 100
+
+    choques = rng.standard_normal((meses, caminhos)) * (volatilidade / np.sqrt(12))
+    if processo == 'passeio':
+        nivel = inicial + np.cumsum(choques, axis=0)
+    else:
+        nivel = np.empty((meses, caminhos))
+        atual = np.full(caminhos, float(inicial))
+        for t in range(meses):
+            atual = atual + (velocidade / 12) * (media - atual) + choques[t]
+            nivel[t] = atual
+
+    nivel = np.maximum(nivel, piso)
+    return (1 + nivel / 100) ** (1 / 12) - 1
+
+def _fator_anuidade(i, m):
+    """(1 - (1+i)^-m) / i, com taxa zero virando m. Aceita arrays."""
+    m = np.asarray(m, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fator = (1 - (1 + i) ** (-m)) / i
+    return np.where(i == 0, m, fator)
+
+def _tabelas_indexadas(indices, valor_financiado, taxa_anual, meses, sistema, modo):
+    """
+    Parcela e saldo (meses x caminhos) para cada caminho do indexador, em forma fechada:
+    - correcao: saldo corrigido pelo índice todo mês, juros fixos do contrato
+      (SAC: amortização = saldo corrigido / meses restantes; PRICE: PMT cresce com o índice)
+    - flutuante: taxa do mês = spread (taxa_anual) + índice, sem correção do saldo
+    """
+    P, n = float(valor_financiado), int(meses)
+    k = np.arange(1, n + 1)[:, None]
+    restante_antes, restante_depois = n - k + 1, n - k
+
+    if modo == 'correcao':
+        i = float(taxa_mensal(taxa_anual))
+        correcao = np.cumprod(1 + indices, axis=0)
+        if sistema == 'SAC':
+            saldo = P * correcao * restante_depois / n
+            parcela = P * correcao / n + (P * correcao * restante_antes / n) * i
+        else:
+            anuidade_total = float(_fator_anuidade(i, n))
+            parcela = (P / anuidade_total) * correcao
+            saldo = P * correcao * _fator_anuidade(i, restante_depois) / anuidade_total
+    else:
+        i = taxa_mensal(taxa_anual) + indices
+        if sistema == 'SAC':
+            saldo = np.broadcast_to(P * restante_depois / n, indices.shape)
+            parcela = P / n + (P * restante_antes / n) * i
+        else:
+            anuidade_antes = _fator_anuidade(i, restante_antes)
+            saldo = P * np.cumprod(_fator_anuidade(i, restante_depois) / anuidade_antes, axis=0)
+            saldo_anterior = np.vstack([np.full((1, indices.shape[1]), P), saldo[:-1]])
+            parcela = saldo_anterior / anuidade_antes
+
+    return parcela, np.maximum(saldo, 0.0)
+
+def _simular_bloco(semente, caminhos, parametros):
+    """Trabalho de um processo: gera `caminhos` futuros e devolve parcelas e saldos (float32)."""
+    rng = np.random.default_rng(semente)
+    indices = _gerar_indices(
+        rng, parametros['meses'], caminhos, parametros['processo'],
+        parametros['inicial'], parametros['media'], parametros['volatilidade'],
+        parametros['velocidade'], parametros['historico'], parametros['piso'],
+    )
+    parcela, saldo = _tabelas_indexadas(
+        indices, parametros['valor_financiado'], parametros['taxa_anual'],
+        parametros['meses'], parametros['sistema'], parametros['modo'],
+    )
+    return parcela.astype(np.float32), saldo.astype(np.float32)
+
+def simular_monte_carlo(valor_financiado, taxa_anual, meses, sistema='SAC', modo='correcao',
+                        processo='reversao', inicial=4.0, media=4.0, volatilidade=1.5, velocidade=0.5,
+                        historico=None, piso=0.0, caminhos=20_000, percentis=(10, 50, 90),
+                        semente=None, processos=None):
+    """
+    Simula milhares de futuros do indexador e devolve as faixas de percentis
+    da parcela e do saldo devedor, mês a mês.
+
+    - modo 'correcao': TR/IPCA corrigem o saldo; `taxa_anual` é o juro fixo do contrato
+    - modo 'flutuante': a taxa do mês é `taxa_anual` (spread) + índice
+    - processo: 'passeio', 'reversao' ou 'historico' (série mensal em % em `historico`)
+    - inicial / media / volatilidade / piso: em % ao ano
+    - processos: nº de processos (None = todos os núcleos; 1 = roda aqui mesmo)
+
+    Retorna um DataFrame com 'Mes', 'Parcela P10', 'Parcela P50', ..., 'Saldo P90'.
+    """
+    sistema = normalizar_sistema(sistema)
+    if modo not in MODOS:
+        raise ValueError(f"Modo inválido: {modo} (use 'correcao' ou 'flutuante')")
+    if processo not in PROCESSOS:
+        raise ValueError(f"Processo inválido: {processo} (use {', '.join(PROCESSOS)})")
+
+    parametros = {
+        'valor_financiado': float(valor_financiado), 'taxa_anual': float(taxa_anual),
+        'meses': int(meses), 'sistema': sistema, 'modo': modo, 'processo': processo,
+        'inicial': float(inicial), 'media': float(media), 'volatilidade': float(volatilidade),
+        'velocidade': float(velocidade), 'piso': float(piso),
+        'historico': None if historico is None else np.asarray(historico, dtype=float),
+    }
+
+    workers = processos or os.cpu_count() or 1
+    workers = max(1, min(workers, caminhos // MIN_CAMINHOS_POR_PROCESSO))
+
+    # Uma semente independente por bloco (resultado reprodutível com `semente`)
+    sementes = np.random.SeedSequence(semente).spawn(workers)
+    tamanhos = [len(b) for b in np.array_split(np.arange(caminhos), workers)]
+
+    if workers == 1:
+        resultados = [_simular_bloco(sementes[0], caminhos, parametros)]
+    else:
+        pool = _obter_pool(workers)
+        futuros = [pool.submit(_simular_bloco, s, t, parametros) for s, t in zip(sementes, tamanhos)]
+        resultados = [f.result() for f in futuros]
+
+    parcelas = np.concatenate([r[0] for r in resultados], axis=1)
+    saldos = np.concatenate([r[1] for r in resultados], axis=1)
+
+    faixas_parcela = np.percentile(parcelas, percentis, axis=1)
+    faixas_saldo = np.percentile(saldos, percentis, axis=1)
+
+    colunas = {'Mes': np.arange(1, int(meses) + 1)}
+    for p, linha in zip(percentis, faixas_parcela):
+        colunas[f'Parcela P{p}'] = linha.astype(float)
+    for p, linha in zip(percentis, faixas_saldo):
+        colunas[f'Saldo P{p}'] = linha.astype(float)
+    return pd.DataFrame(colunas)
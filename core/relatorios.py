@@ -1,37 +1,111 @@
-from xhtml2pdf import pisa
-from jinja2 import Environment, FileSystemLoader
 import pandas as pd
 import io
 import os
+import base64
+import mimetypes
+import json
+import atexit
+import hashlib
+import threading
+import zipfile
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
+from core.inicializacao import modulo_sob_demanda
+
+# Pilhas pesadas (xhtml2pdf/reportlab e jinja2) só carregam no primeiro PDF
+pisa = modulo_sob_demanda("xhtml2pdf.pisa")
+jinja2 = modulo_sob_demanda("jinja2")
+
+# ==========================================
+# 🧩 TEMPLATES E ASSETS (carregados uma vez por processo)
+# ==========================================
+# O Environment do Jinja é único: cada template é lido e compilado uma vez.
+# Em desenvolvimento, RELATORIOS_RECARREGAR=1 faz o Jinja conferir o mtime
+# do arquivo a cada uso e recompilar quando ele mudar.
+# Imagens/CSS referenciados no HTML são lidos do disco uma vez e entregues
+# ao xhtml2pdf como data URI (sem stat/open por PDF).
+
+PASTA_TEMPLATES = "templates"
+RECARREGAR_TEMPLATES = os.environ.get("RELATORIOS_RECARREGAR", "").lower() in ("1", "true", "sim")
+
+# Assets usados pelos templates (pré-carregados junto com o Environment)
+ASSETS_PADRAO = ("assets/img/logo.png",)
+
+_ambiente = None
+_templates_lock = threading.Lock()
+_assets = {}
+
+def _resolver_asset(uri):
+    """Lê o arquivo uma vez e devolve um data URI (ou o próprio uri se não existir)."""
+    # Caminho absoluto da pasta do projeto
+    path = uri if os.path.isabs(uri) else os.path.join(os.getcwd(), uri)
+
+    if not os.path.isfile(path):
+        print(f"⚠️ Aviso: Imagem não encontrada no caminho: {path}")
+        return uri
+
+    tipo = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    with open(path, "rb") as f:
+        return f"data:{tipo};base64,{base64.b64encode(f.read()).decode('ascii')}"
+
+def precarregar_assets(uris=ASSETS_PADRAO):
+    for uri in uris:
+        link_callback(uri, None)
 
 # --- CONFIGURAÇÃO PARA IMAGENS NO PDF ---
 def link_callback(uri, rel):
     """
-    Converte caminhos relativos de HTML (assets/img/logo.png)
-    para caminhos absolutos do sistema (/home/joao/projeto/assets/img/logo.png)
+    Converte caminhos relativos de HTML (assets/img/logo.png) no conteúdo do
+    arquivo, lido uma única vez (o resultado, inclusive "não encontrado", fica guardado).
     """
-    # Se for caminho absoluto, não mexe
-    if uri.startswith("http") or os.path.isabs(uri):
+    # Links externos e data URIs passam direto
+    if uri.startswith(("http", "data:")):
         return uri
-        
-    # Caminho absoluto da pasta do projeto
-    base_dir = os.getcwd()
-    
-    # Monta o caminho completo
-    path = os.path.join(base_dir, uri)
-    
-    if not os.path.isfile(path):
-        print(f"⚠️ Aviso: Imagem não encontrada no caminho: {path}")
-        return uri
-        
-    return path
+
+    resolvido = _assets.get(uri)
+    if resolvido is None:
+        resolvido = _assets.setdefault(uri, _resolver_asset(uri))
+    return resolvido
+
+def ambiente_templates():
+    """Environment único do Jinja (templates compilados ficam em cache dentro dele)."""
+    global _ambiente
+    if _ambiente is None:
+        with _templates_lock:
+            if _ambiente is None:
+                template_dir = os.path.join(os.getcwd(), PASTA_TEMPLATES)
+                _ambiente = jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(template_dir),
+                    auto_reload=RECARREGAR_TEMPLATES,
+                    cache_size=-1,   # sem limite: são poucos templates
+                )
+                precarregar_assets()
+    return _ambiente
+
+def renderizador(template_name):
+    """
+    Função de render reaproveitável para um template.
+    Aceita um contexto (dict) -> str, ou uma lista de contextos -> lista de str.
+    """
+    def renderizar(contextos):
+        # Sem modo dev é só um lookup no cache; com modo dev o Jinja confere o mtime
+        template = ambiente_templates().get_template(template_name)
+        if isinstance(contextos, dict):
+            return template.render(contextos)
+        return [template.render(contexto) for contexto in contextos]
+    return renderizar
+
+def limpar_cache_templates():
+    """Descarta templates compilados e assets carregados (ex.: depois de trocar o logo)."""
+    global _ambiente
+    with _templates_lock:
+        _ambiente = None
+        _assets.clear()
 
 def render_html(template_name, context):
-    template_dir = os.path.join(os.getcwd(), 'templates')
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template(template_name)
-    return template.render(context)
+    return ambiente_templates().get_template(template_name).render(context)
 
 def formatar_moeda(valor):
     try:
@@ -39,11 +113,53 @@ def formatar_moeda(valor):
     except:
         return valor
 
-def gerar_proposta_pdf(dados):
-    # Prepara dados
-    dados_formatados = dados.copy()
-    dados_formatados['data_hoje'] = datetime.now().strftime('%d/%m/%Y')
-    
+# ==========================================
+# 📄 PDF SOB DEMANDA (pool em segundo plano + cache por conteúdo)
+# ==========================================
+# O PDF só é gerado quando o corretor clica em baixar, num pool pequeno de
+# threads, e volta como bytes em memória (nada de arquivo no disco).
+# PDFs iguais (mesmos dados, mesmo dia) saem do cache, limitado em bytes.
+
+WORKERS_PDF = 2
+TAMANHO_CACHE_PDF = 64 * 1024 * 1024   # bytes
+
+_pool_pdf = None
+_pdf_lock = threading.Lock()
+_cache_pdf = OrderedDict()
+_cache_pdf_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+_pdf_em_andamento = {}
+
+def _obter_pool_pdf():
+    global _pool_pdf
+    with _pdf_lock:
+        if _pool_pdf is None:
+            _pool_pdf = ThreadPoolExecutor(max_workers=WORKERS_PDF, thread_name_prefix="pdf")
+        return _pool_pdf
+
+@atexit.register
+def _encerrar_pool_pdf():
+    global _pool_pdf
+    if _pool_pdf is not None:
+        _pool_pdf.shutdown(wait=False, cancel_futures=True)
+        _pool_pdf = None
+
+def _dados_do_dia(dados):
+    dados = dict(dados)
+    dados['data_hoje'] = datetime.now().strftime('%d/%m/%Y')
+    return dados
+
+def chave_proposta(dados):
+    """Hash do conteúdo da proposta (inclui a data, que sai impressa no PDF)."""
+    conteudo = json.dumps(_dados_do_dia(dados), sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+def nome_arquivo_proposta(dados):
+    return f"proposta_{str(dados.get('cliente') or 'Visitante').replace(' ', '_')}.pdf"
+
+def _renderizar_pdf(dados):
+    """Jinja + xhtml2pdf direto para a memória. Retorna os bytes ou None se falhar."""
+    dados_formatados = _dados_do_dia(dados)
+
     campos_moeda = ['valor_imovel', 'entrada', 'saldo_devedor', 'parcela', 'custo_doc', 'total_necessario']
     for campo in campos_moeda:
         if campo in dados_formatados:
@@ -57,32 +173,272 @@ def gerar_proposta_pdf(dados):
         return None
 
     # Gera PDF
-    output_filename = f"proposta_{dados['cliente'].replace(' ', '_')}.pdf"
-    
-    with open(output_filename, "w+b") as result_file:
-        pisa_status = pisa.CreatePDF(
-            source_html,
-            dest=result_file,
-            link_callback=link_callback  # <--- O SEGREDO ESTÁ AQUI
-        )
+    saida = io.BytesIO()
+    pisa_status = pisa.CreatePDF(
+        source_html,
+        dest=saida,
+        link_callback=link_callback  # <--- O SEGREDO ESTÁ AQUI
+    )
 
     if pisa_status.err:
         return None
-        
-    return output_filename
+
+    return saida.getvalue()
+
+def _guardar_pdf(chave, pdf):
+    with _pdf_lock:
+        _pdf_em_andamento.pop(chave, None)
+        if pdf is None or len(pdf) > TAMANHO_CACHE_PDF:
+            return
+        _cache_pdf[chave] = pdf
+        _cache_pdf_stats['bytes'] += len(pdf)
+        while _cache_pdf_stats['bytes'] > TAMANHO_CACHE_PDF:
+            _, antigo = _cache_pdf.popitem(last=False)
+            _cache_pdf_stats['bytes'] -= len(antigo)
+            _cache_pdf_stats['evictions'] += 1
+
+def solicitar_proposta_pdf(dados):
+    """
+    Agenda o PDF no pool e devolve um Future com os bytes (None se falhar).
+    Se o mesmo PDF já estiver no cache ou sendo gerado, reaproveita.
+    """
+    chave = chave_proposta(dados)
+    with _pdf_lock:
+        pdf = _cache_pdf.get(chave)
+        if pdf is not None:
+            _cache_pdf.move_to_end(chave)
+            _cache_pdf_stats['hits'] += 1
+            pronto = Future()
+            pronto.set_result(pdf)
+            return pronto
+        if chave in _pdf_em_andamento:
+            _cache_pdf_stats['hits'] += 1
+            return _pdf_em_andamento[chave]
+        _cache_pdf_stats['misses'] += 1
+        futuro = Future()
+        _pdf_em_andamento[chave] = futuro
+
+    def _gerar():
+        pdf = None
+        try:
+            pdf = _renderizar_pdf(dados)
+        except Exception as e:
+            print(f"Erro ao gerar PDF: {e}")
+        finally:
+            _guardar_pdf(chave, pdf)
+            futuro.set_result(pdf)
+
+    _obter_pool_pdf().submit(_gerar)
+    return futuro
+
+def gerar_proposta_pdf(dados, timeout=60):
+    """PDF da proposta em bytes (None se falhar). Para usar como `data` de um st.download_button."""
+    return solicitar_proposta_pdf(dados).result(timeout)
+
+def estatisticas_cache_pdf():
+    """Contadores do cache de PDFs (para monitoramento)."""
+    with _pdf_lock:
+        stats = dict(_cache_pdf_stats)
+        stats['tamanho'] = len(_cache_pdf)
+        stats['em_andamento'] = len(_pdf_em_andamento)
+    stats['capacidade_bytes'] = TAMANHO_CACHE_PDF
+    return stats
+
+# ==========================================
+# 📦 PROPOSTAS EM LOTE (vários PDFs num ZIP)
+# ==========================================
+# O xhtml2pdf é Python puro (preso ao GIL): para centenas de propostas,
+# cada núcleo da máquina ganha um processo. Os PDFs vão sendo gravados no
+# ZIP assim que ficam prontos, com poucos grupos em andamento por vez,
+# então a memória não cresce com o tamanho do lote.
+
+PROPOSTAS_POR_TAREFA = 8
+
+_pool_lote = None
+_pool_lote_workers = 0
+_pool_lote_lock = threading.Lock()
+
+def _obter_pool_lote(workers):
+    """Pool de processos para os lotes (criado no primeiro uso e reaproveitado)."""
+    global _pool_lote, _pool_lote_workers
+    with _pool_lote_lock:
+        if _pool_lote is None or _pool_lote_workers != workers:
+            if _pool_lote is not None:
+                _pool_lote.shutdown(wait=False)
+            # 'spawn' evita herdar as threads do Streamlit no fork
+            _pool_lote = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_lote_workers = workers
+        return _pool_lote
+
+@atexit.register
+def _encerrar_pool_lote():
+    global _pool_lote
+    if _pool_lote is not None:
+        _pool_lote.shutdown(wait=False, cancel_futures=True)
+        _pool_lote = None
+
+def _renderizar_grupo(grupo):
+    """Trabalho de um processo: [(indice, dados)] -> [(indice, bytes ou None)]."""
+    return [(indice, _renderizar_pdf(dados)) for indice, dados in grupo]
+
+def gerar_propostas_zip(propostas, destino, processos=None, ao_progredir=None):
+    """
+    Gera o PDF de cada proposta (lista de dicts no formato de gerar_proposta_pdf)
+    e grava tudo no ZIP `destino` (caminho ou arquivo aberto em modo binário).
+
+    - processos: nº de processos (None = todos os núcleos; 1 = roda aqui mesmo)
+    - ao_progredir: função opcional (feitas, total)
+
+    Retorna a lista de índices que falharam.
+    """
+    propostas = list(propostas)
+    total = len(propostas)
+    grupos = [
+        list(enumerate(propostas))[ini:ini + PROPOSTAS_POR_TAREFA]
+        for ini in range(0, total, PROPOSTAS_POR_TAREFA)
+    ]
+    workers = max(1, min(processos or os.cpu_count() or 1, len(grupos)))
+    falhas, feitas = [], 0
+
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+        def _gravar(resultado):
+            nonlocal feitas
+            for indice, pdf in resultado:
+                if pdf is None:
+                    falhas.append(indice)
+                else:
+                    nome = f"{indice + 1:04d}_{nome_arquivo_proposta(propostas[indice])}"
+                    arquivo_zip.writestr(nome, pdf)
+            feitas += len(resultado)
+            if ao_progredir:
+                ao_progredir(feitas, total)
+
+        if workers == 1:
+            for grupo in grupos:
+                _gravar(_renderizar_grupo(grupo))
+            return falhas
+
+        # No máximo 2 grupos por processo em andamento (memória constante)
+        pool = _obter_pool_lote(workers)
+        pendentes = set()
+        for grupo in grupos:
+            if len(pendentes) >= 2 * workers:
+                prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    _gravar(futuro.result())
+            pendentes.add(pool.submit(_renderizar_grupo, grupo))
+        for futuro in pendentes:
+            _gravar(futuro.result())
+
+    return falhas
+
+# ==========================================
+# 📊 EXCEL (streaming, gerado só no clique)
+# ==========================================
+# O openpyxl em modo write_only não guarda as células em memória: cada linha
+# vai direto para um arquivo temporário e o XLSX é montado no save().
+# Um cenário (SAC, PRICE, com amortização extra...) por aba, mais um resumo;
+# o histórico filtrado pode ir junto, lido do banco em blocos.
+
+openpyxl = modulo_sob_demanda("openpyxl")
+
+LIMITE_LINHAS_EXCEL = 1_048_576   # linhas por aba (com o cabeçalho)
+MIME_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def _nome_aba(nome, usados):
+    """Nome válido e único para a aba (máx. 31 caracteres, sem []:*?/\\)."""
+    base = "".join("_" if c in '[]:*?/\\' else c for c in str(nome)).strip()[:31] or "Aba"
+    nome, n = base, 2
+    while nome.lower() in usados:
+        sufixo = f" ({n})"
+        nome, n = base[:31 - len(sufixo)] + sufixo, n + 1
+    usados.add(nome.lower())
+    return nome
+
+def _linhas_planilha(df):
+    """Linhas do DataFrame como tuplas de tipos Python (NaN/NaT viram célula vazia)."""
+    colunas = []
+    for nome in df.columns:
+        serie = df[nome]
+        if serie.dtype.kind == 'f' and not serie.isna().any():
+            colunas.append(serie.tolist())
+        else:
+            colunas.append(serie.astype(object).where(serie.notna(), None).tolist())
+    return zip(*colunas)
+
+def _escrever_blocos(wb, titulo, blocos, usados):
+    """Grava os blocos (DataFrames com as mesmas colunas) abrindo abas novas ao chegar no limite."""
+    ws, linhas, cabecalho = None, 0, None
+    for bloco in blocos:
+        if cabecalho is None:
+            cabecalho = [str(c) for c in bloco.columns]
+        for linha in _linhas_planilha(bloco):
+            if ws is None or linhas >= LIMITE_LINHAS_EXCEL:
+                ws = wb.create_sheet(_nome_aba(titulo, usados))
+                ws.append(cabecalho)
+                linhas = 1
+            ws.append(linha)
+            linhas += 1
+    if ws is None:
+        ws = wb.create_sheet(_nome_aba(titulo, usados))
+        if cabecalho:
+            ws.append(cabecalho)
+
+def _resumo_cenario(nome, tabela):
+    parcela = tabela['Parcela'] if 'Parcela' in tabela.columns else pd.Series(dtype=float)
+    juros = tabela['Juros'] if 'Juros' in tabela.columns else pd.Series(dtype=float)
+    return (
+        nome, len(tabela),
+        float(parcela.iloc[0]) if len(parcela) else None,
+        float(parcela.iloc[-1]) if len(parcela) else None,
+        float(parcela.sum()), float(juros.sum()),
+    )
+
+def gerar_excel(cenarios, dados_cliente=None, historico=None, destino=None):
+    """
+    Monta a planilha em modo streaming (memória constante).
+
+    - cenarios: dict nome -> tabela de amortização (DataFrame ou TabelaLazy), uma aba cada
+    - dados_cliente: dict com cliente, valor_imovel, entrada, meses (vai na aba Resumo)
+    - historico: iterável de DataFrames (ex.: simulacao_service.iterar_historico),
+      gravado na aba "Histórico" (continua em "Histórico (2)"... se passar do limite do Excel)
+    - destino: caminho ou arquivo binário aberto; sem destino, devolve os bytes do XLSX
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    usados = set()
+    cenarios = {
+        nome: tabela.completa() if hasattr(tabela, 'completa') else tabela
+        for nome, tabela in (cenarios or {}).items()
+    }
+
+    if dados_cliente or cenarios:
+        ws = wb.create_sheet(_nome_aba("Resumo", usados))
+        if dados_cliente:
+            ws.append(['Cliente', 'Valor Imóvel', 'Entrada', 'Prazo (meses)'])
+            ws.append([dados_cliente.get('cliente'), dados_cliente.get('valor_imovel'),
+                       dados_cliente.get('entrada'), dados_cliente.get('meses')])
+            ws.append([])
+        if cenarios:
+            ws.append(['Cenário', 'Meses', 'Primeira Parcela', 'Última Parcela', 'Total Pago', 'Total Juros'])
+            for nome, tabela in cenarios.items():
+                ws.append(_resumo_cenario(nome, tabela))
+
+    for nome, tabela in cenarios.items():
+        _escrever_blocos(wb, f"Tabela {nome}", [tabela], usados)
+
+    if historico is not None:
+        _escrever_blocos(wb, "Histórico", historico, usados)
+
+    if not usados:
+        wb.create_sheet("Resumo")
+
+    if destino is not None:
+        wb.save(destino)
+        return destino
+    saida = io.BytesIO()
+    wb.save(saida)
+    return saida.getvalue()
 
 def gerar_excel_comparativo(df_sac, df_price, dados_cliente):
-    # (Mantém igual ao anterior)
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        resumo = pd.DataFrame({
-            'Cliente': [dados_cliente['cliente']],
-            'Valor Imóvel': [dados_cliente['valor_imovel']],
-            'Entrada': [dados_cliente['entrada']],
-            'Prazo (meses)': [dados_cliente['meses']]
-        })
-        resumo.to_excel(writer, sheet_name='Resumo', index=False)
-        df_sac.to_excel(writer, sheet_name='Tabela SAC', index=False)
-        df_price.to_excel(writer, sheet_name='Tabela PRICE', index=False)
-    output.seek(0)
-    return output
\ No newline at end of file
+    """Atalho para a planilha clássica SAC x PRICE (BytesIO, como antes)."""
+    return io.BytesIO(gerar_excel({'SAC': df_sac, 'PRICE': df_price}, dados_cliente))
@@ -0,0 +1,133 @@
+from sqlalchemy import Date, bindparam, inspect, text
+
+# ==========================================
+# 📅 RESUMO DIÁRIO (Rollup para o Dashboard)
+# ==========================================
+# Tabela pequena com uma linha por (dia, corretor, status): quantidade e soma do valor.
+# É atualizada na MESMA transação que grava/apaga a simulação, então o
+# dashboard lê só os dias do período em vez de varrer a tabela inteira.
+
+TABELA = "simulacoes_diario"
+
+SQL_CRIAR = f"""
+CREATE TABLE IF NOT EXISTS {TABELA} (
+    dia DATE NOT NULL,
+    usuario_criacao VARCHAR NOT NULL,
+    status VARCHAR NOT NULL,
+    quantidade INTEGER NOT NULL DEFAULT 0,
+    soma_valor FLOAT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, usuario_criacao, status)
+)
+"""
+
+def _expr_dia(conn):
+    """Extrai o dia de data_criacao no dialeto do banco."""
+    return "date(data_criacao)" if conn.dialect.name == "sqlite" else "CAST(data_criacao AS DATE)"
+
+def criar_tabela(conn):
+    conn.execute(text(SQL_CRIAR))
+
+SQL_SOMAR = f"""
+INSERT INTO {TABELA} (dia, usuario_criacao, status, quantidade, soma_valor)
+VALUES (:dia, :usu, :st, :qtd, :val)
+ON CONFLICT (dia, usuario_criacao, status) DO UPDATE SET
+    quantidade = {TABELA}.quantidade + excluded.quantidade,
+    soma_valor = {TABELA}.soma_valor + excluded.soma_valor
+"""
+
+SQL_LIMPAR = f"""
+DELETE FROM {TABELA}
+WHERE dia = :dia AND usuario_criacao = :usu AND status = :st AND quantidade <= 0
+"""
+
+def _dia(data_criacao):
+    return data_criacao.date() if hasattr(data_criacao, "date") else data_criacao
+
+def registrar(conn, data_criacao, usuario, status, valor_imovel, quantidade=1):
+    """
+    Soma (ou subtrai, com quantidade=-1) uma simulação no resumo do dia.
+    Chamar dentro da transação que grava/apaga a simulação.
+    """
+    registrar_lote(conn, [{
+        "dia": _dia(data_criacao), "usu": usuario or "", "st": status or "",
+        "qtd": quantidade, "val": (valor_imovel or 0.0) * quantidade,
+    }])
+
+def registrar_lote(conn, grupos):
+    """
+    Versão em lote (executemany): cada item é um dict com dia, usu, st, qtd e val
+    (quantidade e soma de valor já agrupadas). Usada pela importação em massa.
+    """
+    if not grupos:
+        return
+    conn.execute(text(SQL_SOMAR).bindparams(bindparam("dia", type_=Date)), grupos)
+    # Só as chaves que acabaram de descer podem ter zerado (usa a chave primária)
+    zerados = [{"dia": g["dia"], "usu": g["usu"], "st": g["st"]} for g in grupos if g["qtd"] < 0]
+    if zerados:
+        conn.execute(text(SQL_LIMPAR).bindparams(bindparam("dia", type_=Date)), zerados)
+
+def _fontes(conn):
+    """
+    SELECT das simulações que contam no resumo: as ativas da tabela quente e do
+    arquivo (cada uma só entra se já existir no esquema do banco).
+    """
+    inspetor = inspect(conn)
+    fontes = []
+    for tabela in ("simulacoes", "simulacoes_arquivo"):
+        if not inspetor.has_table(tabela):
+            continue
+        colunas = {c["name"] for c in inspetor.get_columns(tabela)}
+        ativas = "AND excluida_em IS NULL" if "excluida_em" in colunas else ""
+        fontes.append(
+            f"SELECT data_criacao, usuario_criacao, status, valor_imovel FROM {tabela} "
+            f"WHERE data_criacao IS NOT NULL {ativas}"
+        )
+    return " UNION ALL ".join(fontes)
+
+def reconstruir(conn):
+    """Recalcula o resumo inteiro a partir de simulacoes (+ arquivo), ignorando as excluídas."""
+    conn.execute(text(f"DELETE FROM {TABELA}"))
+    conn.execute(text(f"""
+    INSERT INTO {TABELA} (dia, usuario_criacao, status, quantidade, soma_valor)
+    SELECT {_expr_dia(conn)}, COALESCE(usuario_criacao, ''), COALESCE(status, ''),
+           COUNT(*), COALESCE(SUM(valor_imovel), 0)
+    FROM ({_fontes(conn)}) AS s
+    GROUP BY 1, 2, 3
+    """))
+
+def _filtros(usuario, data_inicio, data_fim):
+    condicoes, params, binds = [], {}, []
+    if usuario != "admin":
+        condicoes.append("usuario_criacao = :usu")
+        params["usu"] = usuario
+    if data_inicio is not None:
+        condicoes.append("dia >= :ini")
+        params["ini"] = data_inicio
+        binds.append(bindparam("ini", type_=Date))
+    if data_fim is not None:
+        condicoes.append("dia <= :fim")
+        params["fim"] = data_fim
+        binds.append(bindparam("fim", type_=Date))
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return where, params, binds
+
+def consultar(conn, usuario, data_inicio=None, data_fim=None):
+    """
+    KPIs, série diária e distribuição por status do período, direto do resumo.
+    Retorna (total, volume, [(dia, qtd)], [(status, qtd)]).
+    """
+    where, params, binds = _filtros(usuario, data_inicio, data_fim)
+
+    total, volume = conn.execute(text(
+        f"SELECT COALESCE(SUM(quantidade), 0), COALESCE(SUM(soma_valor), 0) FROM {TABELA} {where}"
+    ).bindparams(*binds), params).one()
+
+    por_dia = conn.execute(text(
+        f"SELECT dia, SUM(quantidade) FROM {TABELA} {where} GROUP BY dia ORDER BY dia"
+    ).bindparams(*binds), params).fetchall()
+
+    por_status = conn.execute(text(
+        f"SELECT status, SUM(quantidade) FROM {TABELA} {where} GROUP BY status ORDER BY 2 DESC"
+    ).bindparams(*binds), params).fetchall()
+
+    return total, volume, por_dia, por_status
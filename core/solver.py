@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from core.calculos import (
+    COMPROMETIMENTO_RENDA, normalizar_sistema, parcela_price, taxa_mensal
+)
+
+# ==========================================
+# 🎯 CÁLCULO REVERSO (Goal Seek) - SAC e PRICE
+# ==========================================
+# Todas as funções aceitam números ou arrays (com broadcast), então
+# uma única chamada resolve a grade inteira do Oráculo.
+# A parcela que "trava" o crédito é a PRIMEIRA: no SAC é a maior de todas,
+# na PRICE é igual a todas as outras.
+
+def _arr(valor):
+    return np.asarray(valor, dtype=float)
+
+def parcela_maxima(renda, comprometimento=COMPROMETIMENTO_RENDA):
+    """Maior parcela que o banco aceita para a renda informada."""
+    return _arr(renda) * comprometimento
+
+def primeira_parcela(valor_financiado, taxa_anual, meses, sistema='PRICE'):
+    """Primeira parcela (a que o banco compara com a renda)."""
+    sistema = normalizar_sistema(sistema)
+    P, i, n = _arr(valor_financiado), taxa_mensal(taxa_anual), _arr(meses)
+    if sistema == 'SAC':
+        return P / n + P * i
+    return parcela_price(P, i, n)
+
+def _bissecao(funcao, baixo, alto, iteracoes=60):
+    """
+    Bisseção vetorizada: acha a raiz de `funcao` (crescente) em cada posição
+    do array ao mesmo tempo. 60 iterações = precisão de máquina.
+    """
+    baixo, alto = np.array(baixo, dtype=float), np.array(alto, dtype=float)
+    for _ in range(iteracoes):
+        meio = (baixo + alto) / 2
+        acima = funcao(meio) > 0
+        alto = np.where(acima, meio, alto)
+        baixo = np.where(acima, baixo, meio)
+    return (baixo + alto) / 2
+
+def valor_maximo_financiavel(renda, taxa_anual, meses, sistema='PRICE', comprometimento=COMPROMETIMENTO_RENDA):
+    """
+    Quanto o banco financia para essa renda (forma fechada):
+    - SAC: P = parcela / (1/n + i)
+    - PRICE: P = parcela * (1 - (1+i)^-n) / i   (com taxa zero: parcela * n)
+    """
+    sistema = normalizar_sistema(sistema)
+    parcela = parcela_maxima(renda, comprometimento)
+    i, n = taxa_mensal(taxa_anual), _arr(meses)
+
+    if sistema == 'SAC':
+        return parcela / (1 / n + i)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fator = (1 - (1 + i) ** (-n)) / i
+    return parcela * np.where(i == 0, n, fator)
+
+def renda_necessaria(valor_financiado, taxa_anual, meses, sistema='PRICE', comprometimento=COMPROMETIMENTO_RENDA):
+    """Renda mínima para aprovar o financiamento (forma fechada)."""
+    return primeira_parcela(valor_financiado, taxa_anual, meses, sistema) / comprometimento
+
+def entrada_necessaria(valor_imovel, renda, taxa_anual, meses, sistema='PRICE', comprometimento=COMPROMETIMENTO_RENDA):
+    """Entrada mínima para comprar o imóvel com essa renda (nunca negativa)."""
+    teto = valor_maximo_financiavel(renda, taxa_anual, meses, sistema, comprometimento)
+    return np.maximum(_arr(valor_imovel) - teto, 0.0)
+
+def prazo_minimo(valor_financiado, renda, taxa_anual, sistema='PRICE', comprometimento=COMPROMETIMENTO_RENDA):
+    """
+    Menor prazo (em meses, arredondado para cima) que cabe na renda.
+    Retorna NaN quando nenhum prazo resolve (a parcela não cobre nem os juros).
+    - SAC: n = P / (parcela - P*i)
+    - PRICE: n = -ln(1 - P*i/parcela) / ln(1+i)
+    """
+    sistema = normalizar_sistema(sistema)
+    P, i = _arr(valor_financiado), taxa_mensal(taxa_anual)
+    parcela = parcela_maxima(renda, comprometimento)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if sistema == 'SAC':
+            n = P / (parcela - P * i)
+        else:
+            n = np.where(i == 0, P / parcela, -np.log(1 - P * i / parcela) / np.log1p(i))
+        viavel = (parcela > P * i) & np.isfinite(n)
+
+    # Tira o ruído de ponto flutuante antes de arredondar (ex: 360.0000000001)
+    return np.where(viavel, np.ceil(np.round(n, 6)), np.nan)
+
+def taxa_maxima(valor_financiado, renda, meses, sistema='PRICE', comprometimento=COMPROMETIMENTO_RENDA):
+    """
+    Maior taxa anual (%) que ainda cabe na renda.
+    - SAC: forma fechada, i = (parcela - P/n) / P
+    - PRICE: sem forma fechada, bisseção vetorizada (a PMT cresce com a taxa)
+    Retorna NaN quando nem com juro zero a parcela cabe.
+    """
+    sistema = normalizar_sistema(sistema)
+    P, n = _arr(valor_financiado), _arr(meses)
+    parcela = parcela_maxima(renda, comprometimento)
+    P, n, parcela = np.broadcast_arrays(P, n, parcela)
+
+    viavel = parcela >= P / n
+    if sistema == 'SAC':
+        i = (parcela - P / n) / P
+    else:
+        # A PMT é sempre maior que os juros do 1º mês, então i <= parcela / P
+        i = _bissecao(lambda x: parcela_price(P, x, n) - parcela, np.zeros(P.shape), parcela / P)
+
+    return np.where(viavel, i * 12 * 100, np.nan)
+
+# Mapa "incógnita -> função", para o resolver genérico
+_SOLVERS = {
+    'valor_financiado': valor_maximo_financiavel,
+    'entrada': entrada_necessaria,
+    'meses': prazo_minimo,
+    'taxa_anual': taxa_maxima,
+    'renda': renda_necessaria,
+}
+
+def resolver(incognita, **conhecidos):
+    """
+    Resolve qualquer uma das variáveis a partir das outras.
+    Ex: resolver('taxa_anual', valor_financiado=300000, renda=12000, meses=360, sistema='SAC')
+    """
+    if incognita not in _SOLVERS:
+        raise ValueError(f"Não sei resolver '{incognita}'. Opções: {', '.join(_SOLVERS)}")
+    return _SOLVERS[incognita](**conhecidos)
+
+def mapa_poder_compra(renda, entrada, prazos_anos, taxas_anuais, sistema='PRICE', comprometimento=COMPROMETIMENTO_RENDA):
+    """
+    Grade prazo x taxa do poder de compra (financiamento + entrada), numa chamada só.
+    Retorna um DataFrame com as taxas nas linhas e os prazos (anos) nas colunas.
+    """
+    prazos_anos = np.asarray(prazos_anos, dtype=int)
+    taxas_anuais = np.asarray(taxas_anuais, dtype=float)
+
+    financiavel = valor_maximo_financiavel(
+        renda, taxas_anuais[:, None], prazos_anos[None, :] * 12, sistema, comprometimento
+    )
+    return pd.DataFrame(
+        financiavel + entrada,
+        index=pd.Index(taxas_anuais, name='Taxa (%)'),
+        columns=pd.Index(prazos_anos, name='Prazo (Anos)'),
+    )
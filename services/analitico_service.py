@@ -0,0 +1,321 @@
+import os
+import json
+import shutil
+import threading
+import importlib.util
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+from core.database import get_engine
+from core.inicializacao import modulo_sob_demanda
+
+# pyarrow é opcional: sem ele o app funciona, só o snapshot analítico fica desligado
+pa = modulo_sob_demanda("pyarrow")
+ds = modulo_sob_demanda("pyarrow.dataset")
+pq = modulo_sob_demanda("pyarrow.parquet")
+pafs = modulo_sob_demanda("pyarrow.fs")
+
+# ==========================================
+# 🧊 SNAPSHOT ANALÍTICO (Parquet particionado por mês)
+# ==========================================
+# Relatórios gerenciais (por corretor, por mês, por faixa de valor) não leem
+# o banco: leem arquivos Parquet em PASTA_SNAPSHOT/simulacoes/ano_mes=AAAA-MM/.
+# O job lê o banco em blocos curtos (sem segurar o escritor do SQLite) e só
+# acrescenta o que entrou depois do último snapshot (marca d'água no id).
+# O id é reservado antes do commit (uma importação segura milhares de ids
+# enquanto um salvamento com id maior já foi gravado), então cada rodada
+# revarre os últimos JANELA_REVARREDURA ids abaixo da marca e grava só os
+# que ainda não estão no snapshot.
+# As exclusões lógicas são regravadas a cada rodada em excluidas.parquet
+# (lista pequena de ids), então excluir/restaurar aparece no próximo snapshot.
+# Uso: python -m services.analitico_service [completo]
+
+PASTA_SNAPSHOT = os.environ.get("SNAPSHOT_DIR", "snapshot")
+TAMANHO_BLOCO_SNAPSHOT = 50_000
+# Ids abaixo da marca d'água conferidos a cada rodada (maior que o lote da importação)
+JANELA_REVARREDURA = 20_000
+
+COLUNAS_SNAPSHOT = [
+    'id', 'cliente', 'valor_imovel', 'entrada', 'parcela',
+    'status', 'status_lead', 'usuario_criacao', 'data_criacao'
+]
+
+# Limites das faixas de valor do imóvel (R$)
+FAIXAS_VALOR = (250_000, 500_000, 750_000, 1_000_000, 2_000_000)
+
+SQL_BLOCO = text("""
+SELECT * FROM (
+    SELECT {colunas} FROM simulacoes WHERE id > :ultimo
+    UNION ALL
+    SELECT {colunas} FROM simulacoes_arquivo WHERE id > :ultimo
+) AS s
+ORDER BY id LIMIT :limite
+""".format(colunas=', '.join(COLUNAS_SNAPSHOT)))
+
+SQL_IDS_JANELA = text("""
+SELECT id FROM simulacoes WHERE id > :de AND id <= :ate
+UNION ALL
+SELECT id FROM simulacoes_arquivo WHERE id > :de AND id <= :ate
+""")
+
+SQL_POR_ID = text("""
+SELECT * FROM (
+    SELECT {colunas} FROM simulacoes WHERE id IN :ids
+    UNION ALL
+    SELECT {colunas} FROM simulacoes_arquivo WHERE id IN :ids
+) AS s
+ORDER BY id
+""".format(colunas=', '.join(COLUNAS_SNAPSHOT))).bindparams(bindparam('ids', expanding=True))
+
+SQL_EXCLUIDAS = text("""
+SELECT id FROM simulacoes WHERE excluida_em IS NOT NULL
+UNION ALL
+SELECT id FROM simulacoes_arquivo WHERE excluida_em IS NOT NULL
+""")
+
+_snapshot_lock = threading.Lock()   # um job de snapshot por vez
+_dataset_lock = threading.Lock()    # consultas não esperam o job terminar
+_dataset = {'versao': None, 'dataset': None, 'excluidas': None}
+
+def disponivel():
+    """True se o pyarrow estiver instalado."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+def _caminhos(pasta=None):
+    pasta = pasta or PASTA_SNAPSHOT
+    return {
+        'dados': os.path.join(pasta, "simulacoes"),
+        'excluidas': os.path.join(pasta, "excluidas.parquet"),
+        'estado': os.path.join(pasta, "estado.json"),
+    }
+
+def ler_estado(pasta=None):
+    """Marca d'água do snapshot: ultimo_id, linhas, atualizado_em (None se nunca rodou)."""
+    try:
+        with open(_caminhos(pasta)['estado'], encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _gravar_estado(caminho, estado):
+    """Grava em arquivo temporário e troca (quem lê nunca vê um JSON pela metade)."""
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(temporario, caminho)
+
+def _particionamento():
+    return ds.partitioning(pa.schema([('ano_mes', pa.string())]), flavor="hive")
+
+def _esquema():
+    return pa.schema([
+        ('id', pa.int64()), ('cliente', pa.string()), ('valor_imovel', pa.float64()),
+        ('entrada', pa.float64()), ('parcela', pa.float64()), ('status', pa.string()),
+        ('status_lead', pa.string()), ('usuario_criacao', pa.string()),
+        ('data_criacao', pa.timestamp('us')), ('ano_mes', pa.string()),
+    ])
+
+def _tabela_do_bloco(bloco):
+    """DataFrame lido do banco -> tabela Arrow com a coluna de partição ano_mes."""
+    bloco['data_criacao'] = pd.to_datetime(bloco['data_criacao'], errors='coerce')
+    bloco['ano_mes'] = bloco['data_criacao'].dt.strftime('%Y-%m').fillna('sem-data')
+    for coluna in ('cliente', 'status', 'status_lead', 'usuario_criacao'):
+        bloco[coluna] = bloco[coluna].astype(object).where(bloco[coluna].notna(), None)
+    return pa.Table.from_pandas(bloco, schema=_esquema(), preserve_index=False)
+
+def _gravar_bloco(bloco, pasta_dados, nome):
+    ds.write_dataset(
+        _tabela_do_bloco(bloco), pasta_dados, format="parquet",
+        partitioning=_particionamento(), basename_template=nome + "-{i}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+def _recuperar_atrasadas(engine, pasta_dados, ultimo_id, janela):
+    """
+    Simulações com id até a marca d'água que ainda não estão no snapshot
+    (transação que reservou o id antes e fez commit depois da última rodada).
+    Retorna quantas foram gravadas.
+    """
+    de = max(int(ultimo_id) - int(janela), 0)
+    with engine.connect() as conn:
+        no_banco = {linha.id for linha in conn.execute(SQL_IDS_JANELA, {'de': de, 'ate': int(ultimo_id)})}
+    if not no_banco:
+        return 0
+    gravados = ds.dataset(pasta_dados, format="parquet", partitioning=_particionamento(), schema=_esquema()).to_table(
+        columns=['id'], filter=(ds.field('id') > de) & (ds.field('id') <= int(ultimo_id))
+    )
+    faltando = sorted(no_banco.difference(gravados['id'].to_pylist()))
+    if not faltando:
+        return 0
+    with engine.connect() as conn:
+        bloco = pd.read_sql(SQL_POR_ID, conn, params={'ids': faltando})
+    if bloco.empty:
+        return 0
+    # Nome único por (primeira atrasada, marca d'água): se o job cair, a próxima rodada já as encontra
+    _gravar_bloco(bloco, pasta_dados, f"atrasadas-{faltando[0]:012d}-{int(ultimo_id):012d}")
+    return len(bloco)
+
+def gerar_snapshot(completo=False, tamanho_bloco=TAMANHO_BLOCO_SNAPSHOT, pasta=None, ao_progredir=None,
+                   janela=JANELA_REVARREDURA):
+    """
+    Acrescenta ao snapshot as simulações com id acima da marca d'água, mais as
+    que fizeram commit atrasado dentro da janela abaixo dela
+    (completo=True apaga e refaz tudo, ex.: depois de corrigir dados no banco).
+
+    Cada bloco vira arquivos parte-<primeiro id>-*.parquet nas pastas dos meses que
+    tocou; a marca d'água só avança depois que o bloco está no disco. Se o job
+    cair no meio, a próxima rodada regrava o mesmo bloco com o mesmo nome.
+    Retorna quantas linhas foram acrescentadas (None sem pyarrow).
+    """
+    if not disponivel():
+        print("Snapshot analítico indisponível: instale o pyarrow.")
+        return None
+
+    caminhos = _caminhos(pasta)
+    engine = get_engine()
+    with _snapshot_lock:
+        if completo and os.path.isdir(caminhos['dados']):
+            shutil.rmtree(caminhos['dados'])
+        os.makedirs(caminhos['dados'], exist_ok=True)
+
+        estado = (None if completo else ler_estado(pasta)) or {'ultimo_id': 0, 'linhas': 0}
+        novas = 0
+        if int(estado['ultimo_id']) > 0:
+            novas = _recuperar_atrasadas(engine, caminhos['dados'], estado['ultimo_id'], janela)
+            estado = {'ultimo_id': int(estado['ultimo_id']), 'linhas': int(estado['linhas']) + novas}
+        while True:
+            # Uma leitura curta por bloco: nada de transação longa no banco
+            with engine.connect() as conn:
+                bloco = pd.read_sql(SQL_BLOCO, conn, params={
+                    'ultimo': int(estado['ultimo_id']), 'limite': int(tamanho_bloco)
+                })
+            if bloco.empty:
+                break
+
+            primeiro, ultimo = int(bloco['id'].iloc[0]), int(bloco['id'].iloc[-1])
+            _gravar_bloco(bloco, caminhos['dados'], f"parte-{primeiro:012d}")
+            novas += len(bloco)
+            estado = {'ultimo_id': ultimo, 'linhas': int(estado['linhas']) + len(bloco)}
+            _gravar_estado(caminhos['estado'], dict(estado, atualizado_em=datetime.now().isoformat(timespec='seconds')))
+            if ao_progredir:
+                ao_progredir(novas)
+            if len(bloco) < tamanho_bloco:
+                break
+
+        with engine.connect() as conn:
+            excluidas = [linha.id for linha in conn.execute(SQL_EXCLUIDAS)]
+        pq.write_table(pa.table({'id': pa.array(excluidas, pa.int64())}), caminhos['excluidas'] + ".tmp")
+        os.replace(caminhos['excluidas'] + ".tmp", caminhos['excluidas'])
+        _gravar_estado(caminhos['estado'], dict(estado, atualizado_em=datetime.now().isoformat(timespec='seconds')))
+
+    return novas
+
+# ==========================================
+# 🔎 CONSULTAS SOBRE O SNAPSHOT
+# ==========================================
+# Os arquivos são abertos com memory map e só as colunas pedidas são lidas.
+# Período e corretor viram filtros do pyarrow: meses fora do período são
+# descartados pelo nome da pasta e os row groups pelas estatísticas do Parquet.
+
+def _abrir(pasta=None):
+    """Dataset + ids excluídos, reaproveitados enquanto o estado do snapshot não mudar."""
+    caminhos = _caminhos(pasta)
+    try:
+        versao = (caminhos['dados'], os.stat(caminhos['estado']).st_mtime_ns)
+    except OSError:
+        return None, None
+    with _dataset_lock:
+        if _dataset['versao'] != versao:
+            sistema = pafs.LocalFileSystem(use_mmap=True)
+            _dataset['dataset'] = ds.dataset(
+                caminhos['dados'], format="parquet", partitioning=_particionamento(), filesystem=sistema,
+                schema=_esquema()   # snapshot ainda vazio (sem arquivos) também tem as colunas
+            )
+            excluidas = (
+                pq.read_table(caminhos['excluidas'], memory_map=True)['id'].combine_chunks()
+                if os.path.exists(caminhos['excluidas']) else pa.array([], pa.int64())
+            )
+            _dataset.update(versao=versao, excluidas=excluidas)
+        return _dataset['dataset'], _dataset['excluidas']
+
+def _instante(dia):
+    return pa.scalar(datetime.combine(dia, datetime.min.time()), pa.timestamp('us'))
+
+def _filtro(usuario, data_inicio=None, data_fim=None, corretor=None, excluidas=None):
+    """Expressão do pyarrow (mesmas regras de permissão do histórico)."""
+    campo = ds.field
+    condicoes = []
+    if usuario != "admin":
+        condicoes.append(campo('usuario_criacao') == usuario)
+    elif corretor:
+        condicoes.append(campo('usuario_criacao') == corretor)
+    if data_inicio is not None:
+        condicoes.append(campo('ano_mes') >= f"{data_inicio:%Y-%m}")
+        condicoes.append(campo('data_criacao') >= _instante(data_inicio))
+    if data_fim is not None:
+        condicoes.append(campo('ano_mes') <= f"{data_fim:%Y-%m}")
+        condicoes.append(campo('data_criacao') < _instante(data_fim + timedelta(days=1)))
+    if excluidas is not None and len(excluidas):
+        condicoes.append(~campo('id').isin(excluidas))
+    if not condicoes:
+        return None
+    expressao = condicoes[0]
+    for condicao in condicoes[1:]:
+        expressao = expressao & condicao
+    return expressao
+
+def _ler(colunas, usuario, pasta=None, **filtros):
+    """Tabela Arrow só com `colunas` das linhas filtradas (None sem snapshot/pyarrow)."""
+    if not disponivel():
+        return None
+    dataset, excluidas = _abrir(pasta)
+    if dataset is None:
+        return None
+    return dataset.to_table(columns=colunas, filter=_filtro(usuario, excluidas=excluidas, **filtros))
+
+def _agrupar(tabela, chave):
+    agregado = tabela.group_by(chave).aggregate([('valor_imovel', 'count'), ('valor_imovel', 'sum')])
+    df = agregado.to_pandas()
+    df.columns = [c.replace('valor_imovel_count', 'quantidade').replace('valor_imovel_sum', 'volume') for c in df.columns]
+    df['ticket_medio'] = df['volume'] / df['quantidade']
+    return df
+
+def resumo_por_corretor(usuario, data_inicio=None, data_fim=None, pasta=None):
+    """Quantidade, volume e ticket médio por corretor no período (do snapshot)."""
+    tabela = _ler(['usuario_criacao', 'valor_imovel'], usuario, pasta, data_inicio=data_inicio, data_fim=data_fim)
+    if tabela is None or tabela.num_rows == 0:
+        return pd.DataFrame(columns=['usuario_criacao', 'quantidade', 'volume', 'ticket_medio'])
+    return _agrupar(tabela, 'usuario_criacao').sort_values('volume', ascending=False, ignore_index=True)
+
+def resumo_por_mes(usuario, data_inicio=None, data_fim=None, corretor=None, pasta=None):
+    """Quantidade, volume e ticket médio por mês (AAAA-MM) no período."""
+    tabela = _ler(['ano_mes', 'valor_imovel'], usuario, pasta,
+                  data_inicio=data_inicio, data_fim=data_fim, corretor=corretor)
+    if tabela is None or tabela.num_rows == 0:
+        return pd.DataFrame(columns=['ano_mes', 'quantidade', 'volume', 'ticket_medio'])
+    return _agrupar(tabela, 'ano_mes').sort_values('ano_mes', ignore_index=True)
+
+def resumo_por_faixa(usuario, data_inicio=None, data_fim=None, corretor=None, faixas=FAIXAS_VALOR, pasta=None):
+    """Quantidade e volume por faixa de valor do imóvel (todas as faixas aparecem, mesmo vazias)."""
+    rotulos = [f"até {faixas[0] / 1000:,.0f} mil"]
+    rotulos += [f"{a / 1000:,.0f} a {b / 1000:,.0f} mil" for a, b in zip(faixas[:-1], faixas[1:])]
+    rotulos += [f"acima de {faixas[-1] / 1000:,.0f} mil"]
+    rotulos = [r.replace(',', '.') for r in rotulos]
+
+    tabela = _ler(['valor_imovel'], usuario, pasta, data_inicio=data_inicio, data_fim=data_fim, corretor=corretor)
+    valores = np.empty(0) if tabela is None else tabela['valor_imovel'].to_numpy(zero_copy_only=False)
+    valores = valores[~np.isnan(valores)]
+    indice = np.searchsorted(np.asarray(faixas, dtype=float), valores, side='right')
+    quantidade = np.bincount(indice, minlength=len(rotulos))
+    volume = np.bincount(indice, weights=valores, minlength=len(rotulos))
+    return pd.DataFrame({'faixa': rotulos, 'quantidade': quantidade, 'volume': volume})
+
+if __name__ == "__main__":
+    # Uso: python -m services.analitico_service [completo]
+    import sys
+    from core.database import inicializar_banco
+    inicializar_banco()
+    novas = gerar_snapshot(completo=len(sys.argv) > 1 and sys.argv[1] == "completo")
+    if novas is not None:
+        print(f"🧊 Snapshot atualizado: {novas} simulações novas em {PASTA_SNAPSHOT}.")
@@ -0,0 +1,212 @@
+import io
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import DateTime, bindparam, text
+from datetime import datetime
+from core.database import get_engine
+from core import calculos, resumo_diario
+from services.simulacao_service import invalidar_consultas, marcar_alteracao
+
+# ==========================================
+# 📥 IMPORTAÇÃO EM MASSA (CSV / XLSX)
+# ==========================================
+# Leads do CRM antigo ou de planilhas de campanha: valida todas as linhas,
+# calcula a 1ª parcela com o motor em lote e grava em transações agrupadas
+# (executemany). Linhas com erro são reportadas e não interrompem o resto.
+
+COLUNAS_OBRIGATORIAS = ['cliente', 'valor_imovel', 'entrada']
+
+# Colunas opcionais e o valor usado quando a planilha não tiver
+COLUNAS_OPCIONAIS = {
+    'taxa_anual': 9.99,
+    'prazo_anos': 30,
+    'sistema': 'SAC',
+    'status': 'Importado',
+    'status_lead': 'Novo',
+    'usuario_criacao': None,   # None = usuário que está importando (só admin escolhe outro)
+    'data_criacao': None,      # None = agora
+}
+
+TAMANHO_LOTE_PADRAO = 5_000
+
+# Limites de plausibilidade: abaixo/acima disso quase sempre é separador trocado
+# ("350.000" lido como 350) e a linha é recusada em vez de gravada errada
+VALOR_IMOVEL_MINIMO = 10_000
+TAXA_ANUAL_MAXIMA = 30.0
+
+# 350.000 / 1.250.000: ponto como separador de milhar (formato BR sem centavos)
+MILHAR_BR = r'-?\d{1,3}(?:\.\d{3})+'
+
+SQL_INSERIR = text("""
+INSERT INTO simulacoes (cliente, valor_imovel, entrada, parcela, status, status_lead, usuario_criacao, data_criacao)
+VALUES (:cliente, :valor_imovel, :entrada, :parcela, :status, :status_lead, :usuario_criacao, :data_criacao)
+""").bindparams(bindparam("data_criacao", type_=DateTime))
+
+def ler_arquivo(arquivo, nome_arquivo=None):
+    """
+    Lê CSV (separador ; ou , detectado) ou XLSX e normaliza os nomes das colunas.
+    CSV é lido todo como texto: quem interpreta "350.000" ou "350.000,00" é o _numero.
+    """
+    nome = (nome_arquivo or getattr(arquivo, 'name', '') or '').lower()
+    if nome.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(arquivo)
+    else:
+        df = pd.read_csv(arquivo, sep=None, engine='python', dtype=str)
+    df.columns = [str(c).strip().lower().replace(' ', '_') for c in df.columns]
+    return df
+
+def _numero(serie):
+    """
+    Converte números no formato BR (350.000,00 ou 350.000) ou US (350000.00).
+    Texto com vírgula ou com pontos agrupando milhares é BR; o resto é lido como está.
+    Células numéricas (Excel) já vêm com o valor certo e não passam pelo texto.
+    """
+    if serie.dtype.kind in 'iuf':
+        return serie.astype(float)
+    eh_texto = serie.map(lambda v: isinstance(v, str)).astype(bool)
+    texto = serie.where(eh_texto).astype('string').str.replace('R$', '', regex=False).str.replace(r'\s', '', regex=True)
+    br = (texto.str.contains(',', regex=False) | texto.str.fullmatch(MILHAR_BR)).fillna(False)
+    texto = texto.where(~br, texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    valores = pd.to_numeric(texto, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    numericos = pd.to_numeric(serie.where(~eh_texto), errors='coerce').to_numpy(dtype=float)
+    return pd.Series(np.where(eh_texto, valores, numericos), index=serie.index)
+
+def preparar_linhas(df, usuario):
+    """
+    Valida e completa as linhas (tudo vetorizado, sem laço por linha).
+    Retorna (DataFrame pronto para gravar, DataFrame de erros com 'Linha' e 'Erro').
+    A numeração de 'Linha' é a da planilha (cabeçalho = linha 1).
+    """
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+
+    df = df.copy()
+    df['linha'] = np.arange(2, len(df) + 2)
+    for coluna, padrao in COLUNAS_OPCIONAIS.items():
+        if coluna not in df.columns:
+            df[coluna] = padrao
+        elif padrao is not None:
+            df[coluna] = df[coluna].fillna(padrao)
+
+    df['cliente'] = df['cliente'].astype('string').str.strip()
+    for coluna in ('valor_imovel', 'entrada', 'taxa_anual', 'prazo_anos'):
+        df[coluna] = _numero(df[coluna])
+    df['sistema'] = df['sistema'].astype(str).str.upper().str.strip()
+    if usuario == 'admin':
+        corretor = df['usuario_criacao'].astype('string').str.strip()
+        df['usuario_criacao'] = corretor.mask(corretor.isna() | (corretor == ''), usuario).astype(str)
+    else:
+        # Corretor só importa leads para si mesmo
+        df['usuario_criacao'] = usuario
+
+    texto = df['data_criacao'].astype('string').str.strip()
+    informada = texto.notna() & (texto != '')
+    # ISO (2024-03-05) primeiro; o que sobrar é lido como data BR (05/03/2024)
+    datas = pd.to_datetime(df['data_criacao'], errors='coerce', format='ISO8601')
+    faltando = informada & datas.isna()
+    if faltando.any():
+        datas = datas.fillna(pd.to_datetime(texto.where(faltando), errors='coerce', format='mixed', dayfirst=True))
+    data_ruim = informada & datas.isna()
+    df['data_criacao'] = datas.fillna(pd.Timestamp(datetime.now().replace(microsecond=0)))
+
+    # Cada regra vira uma máscara; a primeira que falhar é a mensagem da linha
+    regras = [
+        (df['cliente'].isna() | (df['cliente'] == ''), "Cliente vazio"),
+        (df['valor_imovel'].isna() | (df['valor_imovel'] <= 0), "Valor do imóvel inválido"),
+        (df['valor_imovel'] < VALOR_IMOVEL_MINIMO,
+         f"Valor do imóvel abaixo de R$ {VALOR_IMOVEL_MINIMO:,} (confira o separador de milhar)".replace(',', '.')),
+        (df['entrada'].isna() | (df['entrada'] < 0), "Entrada inválida"),
+        (df['entrada'] >= df['valor_imovel'], "Entrada maior ou igual ao valor do imóvel"),
+        (df['taxa_anual'].isna() | (df['taxa_anual'] < 0), "Taxa anual inválida"),
+        (df['taxa_anual'] > TAXA_ANUAL_MAXIMA, f"Taxa anual acima de {TAXA_ANUAL_MAXIMA:.0f}% (confira o separador decimal)"),
+        (df['prazo_anos'].isna() | (df['prazo_anos'] <= 0), "Prazo inválido"),
+        (~df['sistema'].isin(calculos.SISTEMAS), "Sistema deve ser SAC ou PRICE"),
+        (data_ruim | (df['data_criacao'] > pd.Timestamp.now()), "Data inválida"),
+    ]
+    erro = pd.Series(None, index=df.index, dtype='object')
+    for mascara, mensagem in reversed(regras):
+        erro = erro.mask(mascara.fillna(True), mensagem)
+
+    invalidas = erro.notna()
+    erros = pd.DataFrame({'Linha': df.loc[invalidas, 'linha'], 'Erro': erro[invalidas]})
+    validas = df.loc[~invalidas].copy()
+
+    # 1ª parcela calculada em lote pelo motor de cenários (um lote por sistema)
+    validas['parcela'] = 0.0
+    for sistema, grupo in validas.groupby('sistema'):
+        resumo = calculos.simular_cenarios(
+            grupo['valor_imovel'] - grupo['entrada'], grupo['taxa_anual'],
+            (grupo['prazo_anos'] * 12).round().astype(int), sistema
+        )
+        validas.loc[grupo.index, 'parcela'] = resumo['Primeira Parcela'].to_numpy()
+
+    return validas, erros.reset_index(drop=True)
+
+def _resumo_do_lote(lote):
+    """Agrupa o lote por (dia, corretor, status) para atualizar o resumo diário."""
+    grupos = lote.groupby([lote['data_criacao'].dt.date, 'usuario_criacao', 'status']).agg(
+        qtd=('valor_imovel', 'size'), val=('valor_imovel', 'sum')
+    ).reset_index()
+    grupos.columns = ['dia', 'usu', 'st', 'qtd', 'val']
+    return grupos.to_dict('records')
+
+def importar_simulacoes(df, usuario, tamanho_lote=TAMANHO_LOTE_PADRAO, ao_progredir=None):
+    """
+    Importa o DataFrame lido da planilha.
+
+    - tamanho_lote: linhas por transação (executemany)
+    - ao_progredir: função opcional (processadas, total) para barra de progresso
+
+    Retorna dict com 'importados', 'erros' (DataFrame Linha/Erro) e 'segundos'.
+    Se um lote inteiro falhar no banco, as linhas dele entram nos erros e os
+    próximos lotes continuam.
+    """
+    inicio = time.perf_counter()
+    validas, erros = preparar_linhas(df, usuario)
+    engine = get_engine()
+
+    colunas = ['cliente', 'valor_imovel', 'entrada', 'parcela', 'status', 'status_lead', 'usuario_criacao', 'data_criacao']
+    importados = 0
+    falhas = []
+    total = len(validas)
+
+    for ini in range(0, total, tamanho_lote):
+        lote = validas.iloc[ini:ini + tamanho_lote]
+        registros = lote[colunas].astype(object).where(lote[colunas].notna(), None).to_dict('records')
+        for r in registros:
+            r['data_criacao'] = r['data_criacao'].to_pydatetime()
+        try:
+            with engine.begin() as conn:
+                conn.execute(SQL_INSERIR, registros)
+                resumo_diario.registrar_lote(conn, _resumo_do_lote(lote))
+                marcar_alteracao(conn)
+            importados += len(lote)
+            invalidar_consultas()
+        except Exception as e:
+            print(f"Erro ao importar lote: {e}")
+            falhas.append(pd.DataFrame({'Linha': lote['linha'], 'Erro': f"Falha no banco: {e}"}))
+
+        if ao_progredir:
+            ao_progredir(min(ini + tamanho_lote, total), total)
+
+    if falhas:
+        erros = pd.concat([erros] + falhas, ignore_index=True)
+
+    return {
+        'importados': importados,
+        'erros': erros.sort_values('Linha').reset_index(drop=True),
+        'segundos': time.perf_counter() - inicio,
+    }
+
+def modelo_csv():
+    """Planilha-modelo para o usuário baixar e preencher."""
+    exemplo = pd.DataFrame([{
+        'cliente': 'João da Silva', 'valor_imovel': 400000, 'entrada': 80000,
+        'taxa_anual': 9.99, 'prazo_anos': 30, 'sistema': 'SAC', 'status': 'Importado',
+        'status_lead': 'Novo', 'usuario_criacao': '', 'data_criacao': '',
+    }])
+    saida = io.StringIO()
+    exemplo.to_csv(saida, index=False, sep=';')
+    return saida.getvalue().encode('utf-8-sig')
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import pandas as pd
+from core import calculos, relatorios
+from services import importacao_service, simulacao_service
+
+# ==========================================
+# 📦 PROPOSTAS EM LOTE (ex.: mudou a taxa, reenviar para todos os leads)
+# ==========================================
+# Monta os dados de cada proposta (parcela recalculada em lote pelo motor
+# de cenários) e gera todos os PDFs num ZIP, em paralelo.
+
+TAXA_PADRAO = 9.99
+MESES_PADRAO = 360
+SISTEMA_PADRAO = 'SAC'
+
+def _montar_propostas(df, taxa_anual=None):
+    """
+    DataFrame com cliente, valor_imovel, entrada, sistema, taxa_anual e meses
+    (vazios viram o padrão) -> lista de dicts no formato de relatorios.gerar_proposta_pdf.
+    `taxa_anual` informada substitui a taxa de todas as linhas (nova condição do banco).
+    """
+    if df.empty:
+        return []
+    df = df.copy()
+    if taxa_anual is not None:
+        df['taxa_anual'] = float(taxa_anual)
+    df['taxa_anual'] = pd.to_numeric(df['taxa_anual'], errors='coerce').fillna(TAXA_PADRAO)
+    df['meses'] = pd.to_numeric(df['meses'], errors='coerce').fillna(MESES_PADRAO).astype(int)
+    df['sistema'] = df['sistema'].fillna(SISTEMA_PADRAO).astype(str).str.upper()
+    df['saldo_devedor'] = df['valor_imovel'] - df['entrada']
+
+    df['parcela'] = 0.0
+    df['renda_minima'] = 0.0
+    for sistema, grupo in df.groupby('sistema'):
+        resumo = calculos.simular_cenarios(grupo['saldo_devedor'], grupo['taxa_anual'], grupo['meses'], sistema)
+        df.loc[grupo.index, 'parcela'] = resumo['Primeira Parcela'].to_numpy()
+        df.loc[grupo.index, 'renda_minima'] = resumo['Renda Minima'].to_numpy()
+
+    return [
+        {
+            "cliente": linha.cliente or "Visitante",
+            "valor_imovel": linha.valor_imovel, "entrada": linha.entrada,
+            "saldo_devedor": linha.saldo_devedor, "meses": int(linha.meses), "parcela": linha.parcela,
+            "status_texto": f"Renda Min: {relatorios.formatar_moeda(linha.renda_minima)}",
+        }
+        for linha in df.itertuples(index=False)
+    ]
+
+def propostas_do_historico(ids, usuario, taxa_anual=None):
+    """
+    Propostas das simulações escolhidas no histórico (usa sistema/prazo guardados, se houver).
+    Corretor só gera propostas das próprias simulações.
+    """
+    df = simulacao_service.carregar_simulacoes_por_id(ids, usuario)
+    return _montar_propostas(df, taxa_anual)
+
+def propostas_da_planilha(df, usuario, taxa_anual=None):
+    """
+    Propostas de uma planilha no mesmo formato da importação de leads.
+    Retorna (propostas, erros) — erros é o DataFrame Linha/Erro da validação.
+    """
+    validas, erros = importacao_service.preparar_linhas(df, usuario)
+    validas = validas.assign(meses=(validas['prazo_anos'] * 12).round())
+    return _montar_propostas(validas, taxa_anual), erros
+
+def gerar_zip(propostas, ao_progredir=None, processos=None):
+    """
+    Gera os PDFs em paralelo direto num arquivo ZIP temporário.
+    Retorna (caminho do ZIP, índices que falharam). Quem chamou apaga o arquivo.
+    """
+    descritor, caminho = tempfile.mkstemp(prefix="propostas_", suffix=".zip")
+    os.close(descritor)
+    falhas = relatorios.gerar_propostas_zip(propostas, caminho, processos=processos, ao_progredir=ao_progredir)
+    return caminho, falhas
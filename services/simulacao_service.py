@@ -1,59 +1,690 @@
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
 import pandas as pd
-from sqlalchemy import text
-from datetime import datetime
-from core.database import get_engine
+from sqlalchemy import DateTime, LargeBinary, bindparam, text
+from datetime import date, datetime, timedelta
+from core.database import DB_CONFIG, get_engine
+from core import calculos, fila_escrita, resumo_diario
 
-def salvar_simulacao(cliente, valor_imovel, entrada, parcela, status, usuario):
-    engine = get_engine()
-    data_hoje = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    query = text("""
-    INSERT INTO simulacoes (cliente, valor_imovel, entrada, parcela, status, usuario_criacao, data_criacao)
-    VALUES (:cli, :val, :ent, :par, :st, :usu, :dt)
-    """)
-    
+# Colunas que podem ser pedidas nas consultas do histórico (whitelist: nome de coluna não vira parâmetro)
+COLUNAS_HISTORICO = [
+    'id', 'cliente', 'valor_imovel', 'entrada', 'parcela',
+    'status', 'status_lead', 'usuario_criacao', 'data_criacao'
+]
+
+# Tipos aplicados no DataFrame (categorias ocupam bem menos memória e vão mais leves pro navegador)
+TIPOS_HISTORICO = {
+    'id': 'int64',
+    'valor_imovel': 'float64',
+    'entrada': 'float64',
+    'parcela': 'float64',
+    'status': 'category',
+    'status_lead': 'category',
+    'usuario_criacao': 'category',
+}
+
+TAMANHO_PAGINA = 50
+
+# Linhas lidas por vez quando o histórico inteiro é exportado (iterar_historico)
+TAMANHO_BLOCO_EXPORTACAO = 5_000
+
+TABELA_ARQUIVO = "simulacoes_arquivo"
+
+# Simulações mais velhas que isso vão para o arquivo (python -m services.simulacao_service arquivar)
+ARQUIVAR_APOS_MESES = 24
+LOTE_ARQUIVAMENTO = 5_000
+
+# Segundos esperando a fila de escrita confirmar uma exclusão / um salvamento
+TIMEOUT_EXCLUSAO = 30
+TIMEOUT_SALVAMENTO = 30
+
+# ==========================================
+# 🧠 CACHE DE CONSULTAS (invalidado por geração)
+# ==========================================
+# Histórico e dashboard só mudam quando alguém grava ou apaga.
+# Toda escrita incrementa a GERAÇÃO em geracao_dados, na mesma transação
+# (marcar_alteracao), e a geração faz parte da chave: depois de um salvamento
+# nenhuma consulta antiga é reaproveitada, em nenhum processo/servidor.
+# A geração do banco é relida a cada GERACAO_VALIDA_SEGUNDOS (uma linha pela
+# chave primária); escrita deste processo força a releitura na hora.
+# Escritas por fora do app (SQL manual) expiram pelo TTL.
+
+TAMANHO_CACHE_CONSULTAS = 512
+TTL_CACHE_CONSULTAS = 300          # segundos que um resultado pode ficar guardado
+GERACAO_VALIDA_SEGUNDOS = 1.0      # atraso máximo para ver escritas de outro processo
+
+TABELA_GERACAO = "geracao_dados"
+SQL_LER_GERACAO = text(f"SELECT geracao FROM {TABELA_GERACAO} WHERE nome = 'simulacoes'")
+SQL_AVANCAR_GERACAO = text(f"UPDATE {TABELA_GERACAO} SET geracao = geracao + 1 WHERE nome = 'simulacoes'")
+
+_cache_consultas = OrderedDict()
+_cache_consultas_lock = threading.Lock()
+_cache_consultas_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidacoes': 0, 'expirados': 0}
+_geracao = 0
+_geracao_banco = {'valor': None, 'lida_em': 0.0}
+
+def geracao_atual():
+    return _geracao
+
+def marcar_alteracao(conn):
+    """Avança a geração no banco (chamar DENTRO da transação de toda escrita em simulacoes)."""
+    conn.execute(SQL_AVANCAR_GERACAO)
+
+def invalidar_consultas():
+    """Marca a tabela como alterada (chamar DEPOIS do commit de toda escrita)."""
+    global _geracao
+    with _cache_consultas_lock:
+        _geracao += 1
+        _cache_consultas.clear()
+        _geracao_banco['lida_em'] = 0.0
+        _cache_consultas_stats['invalidacoes'] += 1
+
+def _ler_geracao_banco():
+    """Geração gravada no banco, relida no máximo a cada GERACAO_VALIDA_SEGUNDOS (None se falhar)."""
+    agora = time.monotonic()
+    with _cache_consultas_lock:
+        if agora - _geracao_banco['lida_em'] < GERACAO_VALIDA_SEGUNDOS:
+            return _geracao_banco['valor']
     try:
-        with engine.connect() as conn:
-            conn.execute(query, {
-                "cli": cliente, "val": valor_imovel, "ent": entrada,
-                "par": parcela, "st": status, "usu": usuario, "dt": data_hoje
-            })
-            conn.commit()
+        with get_engine().connect() as conn:
+            valor = conn.execute(SQL_LER_GERACAO).scalar()
+    except Exception as e:
+        print(f"Erro ao ler geração do cache: {e}")
+        valor = None
+    with _cache_consultas_lock:
+        _geracao_banco.update(valor=valor, lida_em=agora)
+    return valor
+
+def _copiar(resultado):
+    """Cópia rasa (copy-on-write) para ninguém alterar o que está guardado no cache."""
+    if isinstance(resultado, pd.DataFrame):
+        return resultado.copy(deep=False)
+    if isinstance(resultado, tuple):
+        return tuple(_copiar(r) for r in resultado)
+    if isinstance(resultado, dict):
+        return {k: _copiar(v) for k, v in resultado.items()}
+    if isinstance(resultado, list):
+        return list(resultado)
+    return resultado
+
+def _com_cache(consulta, usuario, parametros, carregar):
+    """
+    Devolve o resultado de `carregar()` guardado para (consulta, usuário, parâmetros, geração).
+    Erros não são guardados: a exceção de `carregar` sobe para quem chamou.
+    Sem conseguir ler a geração do banco, consulta direto (sem cache).
+    """
+    geracao_banco = _ler_geracao_banco()
+    if geracao_banco is None:
+        return carregar()
+
+    agora = time.monotonic()
+    with _cache_consultas_lock:
+        chave = (consulta, usuario, repr(sorted(parametros.items())), geracao_banco, _geracao)
+        guardado = _cache_consultas.get(chave)
+        if guardado is not None:
+            resultado, guardado_em = guardado
+            if agora - guardado_em < TTL_CACHE_CONSULTAS:
+                _cache_consultas.move_to_end(chave)
+                _cache_consultas_stats['hits'] += 1
+                return _copiar(resultado)
+            del _cache_consultas[chave]
+            _cache_consultas_stats['expirados'] += 1
+
+    resultado = carregar()
+
+    with _cache_consultas_lock:
+        _cache_consultas_stats['misses'] += 1
+        # Se alguém gravou enquanto a consulta rodava, o resultado já nasce velho
+        if chave[-1] == _geracao:
+            _cache_consultas[chave] = (resultado, agora)
+            while len(_cache_consultas) > TAMANHO_CACHE_CONSULTAS:
+                _cache_consultas.popitem(last=False)
+                _cache_consultas_stats['evictions'] += 1
+    return _copiar(resultado)
+
+def estatisticas_cache_consultas():
+    """Contadores do cache de consultas (para monitoramento)."""
+    with _cache_consultas_lock:
+        stats = dict(_cache_consultas_stats)
+        stats['tamanho'] = len(_cache_consultas)
+        stats['geracao'] = _geracao
+        stats['geracao_banco'] = _geracao_banco['valor']
+    stats['capacidade'] = TAMANHO_CACHE_CONSULTAS
+    consultas = stats['hits'] + stats['misses']
+    stats['taxa_acerto'] = stats['hits'] / consultas if consultas else 0.0
+    return stats
+
+def limpar_cache_consultas():
+    """Esvazia o cache de consultas e zera os contadores (a geração continua)."""
+    with _cache_consultas_lock:
+        _cache_consultas.clear()
+        for k in _cache_consultas_stats:
+            _cache_consultas_stats[k] = 0
+
+# ==========================================
+# 💾 GRAVAÇÃO
+# ==========================================
+
+SQL_INSERIR = text("""
+INSERT INTO simulacoes (cliente, valor_imovel, entrada, parcela, status, usuario_criacao, data_criacao)
+VALUES (:cli, :val, :ent, :par, :st, :usu, :dt)
+RETURNING id
+""").bindparams(bindparam("dt", type_=DateTime))
+
+SQL_INSERIR_TABELA = text("""
+INSERT INTO simulacoes_tabelas
+    (simulacao_id, sistema, valor_financiado, taxa_anual, meses, parametros, formato, colunas, tabela)
+VALUES (:id, :sistema, :valor_financiado, :taxa_anual, :meses, :parametros, :formato, :colunas, :tabela)
+""").bindparams(bindparam("tabela", type_=LargeBinary))
+
+def _iniciar_fila():
+    if not fila_escrita.ativa():
+        # A thread escritora invalida o cache depois de cada commit
+        fila_escrita.iniciar(
+            get_engine(), DB_CONFIG["fila_tamanho"], DB_CONFIG["fila_grupo"], ao_gravar=invalidar_consultas
+        )
+
+def _enfileirar(operacao, *args):
+    _iniciar_fila()
+    return fila_escrita.enfileirar(operacao, *args)
+
+def _escrita_assincrona():
+    """Liga a fila de escrita na primeira gravação, se a config pedir (escrita_assincrona)."""
+    if DB_CONFIG["escrita_assincrona"]:
+        _iniciar_fila()
         return True
+    return False
+
+def _registro_tabela(valor_imovel, entrada, entradas, tabela):
+    """
+    Linha de simulacoes_tabelas: entradas do cálculo + tabela compacta (poucos KB).
+    `entradas` precisa de sistema, taxa_anual e meses; o resto vai como JSON em `parametros`
+    (seguros, C.E.T., dados do PDF...). Sem `tabela`, usa a do cache (a mesma que a tela mostrou).
+    """
+    if not entradas:
+        return None
+    parametros = dict(entradas)
+    sistema = calculos.normalizar_sistema(parametros.pop('sistema'))
+    taxa_anual = float(parametros.pop('taxa_anual'))
+    meses = int(parametros.pop('meses'))
+    valor_financiado = float(parametros.pop('valor_financiado', valor_imovel - entrada))
+    if tabela is None:
+        tabela = calculos.tabela_amortizacao(valor_financiado, taxa_anual, meses, sistema)
+    dados, colunas = calculos.compactar_tabela(tabela)
+    return {
+        "sistema": sistema, "valor_financiado": valor_financiado, "taxa_anual": taxa_anual,
+        "meses": meses, "parametros": json.dumps(parametros, ensure_ascii=False, default=str),
+        "formato": calculos.FORMATO_TABELA, "colunas": json.dumps(colunas), "tabela": dados,
+    }
+
+def _inserir_simulacao(conn, cliente, valor_imovel, entrada, parcela, status, usuario, data_hoje,
+                       registro_tabela=None):
+    """Simulação + tabela compacta + resumo diário na mesma transação. Retorna o id."""
+    id_simulacao = conn.execute(SQL_INSERIR, {
+        "cli": cliente, "val": valor_imovel, "ent": entrada,
+        "par": parcela, "st": status, "usu": usuario, "dt": data_hoje
+    }).scalar_one()
+    if registro_tabela is not None:
+        conn.execute(SQL_INSERIR_TABELA, dict(registro_tabela, id=id_simulacao))
+    resumo_diario.registrar(conn, data_hoje, usuario, status, valor_imovel)
+    marcar_alteracao(conn)
+    return id_simulacao
+
+def agendar_salvamento(cliente, valor_imovel, entrada, parcela, status, usuario, entradas=None, tabela=None):
+    """Coloca a gravação na fila de escrita e devolve um Future (id da simulação quando gravar)."""
+    data_hoje = datetime.now().replace(microsecond=0)
+    return _enfileirar(
+        _inserir_simulacao, cliente, valor_imovel, entrada, parcela, status, usuario, data_hoje,
+        _registro_tabela(valor_imovel, entrada, entradas, tabela)
+    )
+
+def salvar_simulacao(cliente, valor_imovel, entrada, parcela, status, usuario, entradas=None, tabela=None,
+                     timeout=TIMEOUT_SALVAMENTO):
+    """
+    Grava a simulação e retorna True só depois do commit (False se falhar).
+    Com escrita_assincrona ligada, a gravação vai pela fila (agrupada com as dos
+    outros corretores) e aqui se espera o resultado dela, como na exclusão.
+    Quem não precisa esperar usa agendar_salvamento (devolve o Future).
+
+    Com `entradas` (sistema, taxa_anual, meses e o que mais a proposta usou), guarda
+    também a tabela de amortização compacta para reabrir/reimprimir sem recalcular.
+    """
+    try:
+        if _escrita_assincrona():
+            agendar_salvamento(cliente, valor_imovel, entrada, parcela, status, usuario,
+                               entradas, tabela).result(timeout)
+            return True
+
+        registro_tabela = _registro_tabela(valor_imovel, entrada, entradas, tabela)
+        data_hoje = datetime.now().replace(microsecond=0)
+        with get_engine().begin() as conn:
+            _inserir_simulacao(conn, cliente, valor_imovel, entrada, parcela, status, usuario, data_hoje, registro_tabela)
+        invalidar_consultas()
+        return True
+    except queue.Full:
+        print("Fila de escrita cheia: simulação não foi salva.")
+        return False
     except Exception as e:
-        # AQUI ESTÁ O SEGREDO: Mostra o erro vermelho na tela
-        st.error(f"❌ Erro ao salvar no Banco de Dados: {e}")
-        print(f"ERRO DETALHADO: {e}") # Mostra no terminal também
+        print(f"Erro ao salvar simulação: {e}")
         return False
-def carregar_historico(usuario):
-    """Carrega lista de simulações (Admin vê tudo, corretor vê as dele)."""
+
+def _filtros_historico(usuario, corretor=None, data_inicio=None, data_fim=None,
+                       status_lead=None, valor_min=None, valor_max=None, excluidas=False):
+    """
+    Monta o WHERE do histórico, sempre com parâmetros (nada de f-string com valor do usuário).
+    Corretor só enxerga as próprias simulações; o admin pode filtrar por corretor.
+    excluidas=True mostra só a lixeira (exclusão lógica); o padrão esconde as excluídas.
+    Retorna (lista de condições, parâmetros, bindparams tipados).
+    """
+    condicoes, params, binds = [], {}, []
+    condicoes.append("excluida_em IS NOT NULL" if excluidas else "excluida_em IS NULL")
+
+    if usuario != 'admin':
+        corretor = usuario
+    if corretor:
+        condicoes.append("usuario_criacao = :corretor")
+        params['corretor'] = corretor
+
+    if data_inicio is not None:
+        if not isinstance(data_inicio, datetime):
+            data_inicio = datetime.combine(data_inicio, datetime.min.time())
+        condicoes.append("data_criacao >= :data_inicio")
+        params['data_inicio'] = data_inicio
+        binds.append(bindparam('data_inicio', type_=DateTime))
+    if data_fim is not None:
+        # Data sem hora = o dia inteiro
+        if not isinstance(data_fim, datetime) and isinstance(data_fim, date):
+            data_fim = datetime.combine(data_fim + timedelta(days=1), datetime.min.time())
+        condicoes.append("data_criacao < :data_fim")
+        params['data_fim'] = data_fim
+        binds.append(bindparam('data_fim', type_=DateTime))
+
+    if status_lead:
+        condicoes.append("status_lead IN :status_lead")
+        params['status_lead'] = list(status_lead)
+        binds.append(bindparam('status_lead', expanding=True))
+
+    if valor_min is not None:
+        condicoes.append("valor_imovel >= :valor_min")
+        params['valor_min'] = valor_min
+    if valor_max is not None:
+        condicoes.append("valor_imovel <= :valor_max")
+        params['valor_max'] = valor_max
+
+    return condicoes, params, binds
+
+def _fonte_historico(incluir_arquivo):
+    """Tabela quente, ou quente + arquivo (os ids são preservados ao arquivar, então o cursor continua valendo)."""
+    if not incluir_arquivo:
+        return "simulacoes"
+    colunas = ', '.join(COLUNAS_HISTORICO + ['excluida_em'])
+    return (
+        f"(SELECT {colunas} FROM simulacoes UNION ALL "
+        f"SELECT {colunas} FROM {TABELA_ARQUIVO}) AS simulacoes"
+    )
+
+def _colunas_projetadas(colunas):
+    """Valida as colunas pedidas contra a whitelist (o 'id' sempre vem, é o cursor)."""
+    if not colunas:
+        return list(COLUNAS_HISTORICO)
+    invalidas = set(colunas) - set(COLUNAS_HISTORICO)
+    if invalidas:
+        raise ValueError(f"Colunas inválidas no histórico: {sorted(invalidas)}")
+    return ['id'] + [c for c in colunas if c != 'id']
+
+def _aplicar_tipos(df):
+    for coluna, tipo in TIPOS_HISTORICO.items():
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype(tipo)
+    if 'cliente' in df.columns:
+        df['cliente'] = df['cliente'].astype('string')
+    return df
+
+def carregar_pagina_historico(usuario, cursor=None, limite=TAMANHO_PAGINA, colunas=None,
+                              incluir_arquivo=False, **filtros):
+    """
+    Uma página do histórico, paginada por cursor (keyset) no id:
+    WHERE id < :cursor ORDER BY id DESC LIMIT n  -> usa o índice, custo não cresce com a tabela.
+
+    Filtros aceitos: corretor, data_inicio, data_fim, status_lead (lista), valor_min, valor_max,
+    excluidas (lixeira). incluir_arquivo=True junta as simulações arquivadas.
+    Retorna (DataFrame, proximo_cursor). proximo_cursor é None na última página.
+    """
     engine = get_engine()
-    
-    if usuario == 'admin':
-        query = "SELECT * FROM simulacoes ORDER BY id DESC"
-    else:
-        query = f"SELECT * FROM simulacoes WHERE usuario_criacao = '{usuario}' ORDER BY id DESC"
+    colunas = _colunas_projetadas(colunas)
+    condicoes, params, binds = _filtros_historico(usuario, **filtros)
+
+    if cursor is not None:
+        condicoes.append("id < :cursor")
+        params['cursor'] = int(cursor)
+
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    # Busca 1 a mais só para saber se existe próxima página
+    params['limite'] = int(limite) + 1
+    query = text(
+        f"SELECT {', '.join(colunas)} FROM {_fonte_historico(incluir_arquivo)} {where} "
+        f"ORDER BY id DESC LIMIT :limite"
+    ).bindparams(*binds)
+
+    def _ler():
+        parse = ['data_criacao'] if 'data_criacao' in colunas else None
+        df = pd.read_sql(query, engine, params=params, parse_dates=parse)
+        proximo_cursor = None
+        if len(df) > limite:
+            df = df.iloc[:limite]
+            proximo_cursor = int(df['id'].iloc[-1])
+        return _aplicar_tipos(df), proximo_cursor
+
+    try:
+        return _com_cache('pagina', usuario, dict(params, sql=query.text), _ler)
+    except Exception as e:
+        print(f"Erro ao carregar histórico: {e}")
+        return pd.DataFrame(columns=colunas), None
+
+def contar_historico(usuario, incluir_arquivo=False, **filtros):
+    """Total de registros que batem com os filtros (para o cabeçalho da tabela)."""
+    engine = get_engine()
+    condicoes, params, binds = _filtros_historico(usuario, **filtros)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    query = text(f"SELECT COUNT(*) FROM {_fonte_historico(incluir_arquivo)} {where}").bindparams(*binds)
+    def _ler():
+        with engine.connect() as conn:
+            return conn.execute(query, params).scalar()
+
+    try:
+        return _com_cache('contagem', usuario, dict(params, sql=query.text), _ler)
+    except Exception as e:
+        print(f"Erro ao contar histórico: {e}")
+        return 0
+
+def listar_corretores():
+    """Corretores que já salvaram alguma simulação (para o filtro do admin)."""
+    engine = get_engine()
+
+    def _ler():
+        with engine.connect() as conn:
+            linhas = conn.execute(text(
+                "SELECT DISTINCT usuario_criacao FROM simulacoes WHERE excluida_em IS NULL ORDER BY usuario_criacao"
+            )).fetchall()
+        return [l[0] for l in linhas if l[0]]
+
+    try:
+        return _com_cache('corretores', None, {}, _ler)
+    except Exception:
+        return []
+
+def carregar_historico(usuario, colunas=None, incluir_arquivo=False, **filtros):
+    """Carrega lista de simulações (Admin vê tudo, corretor vê as dele). Sem paginação."""
+    engine = get_engine()
+    colunas = _colunas_projetadas(colunas)
+    condicoes, params, binds = _filtros_historico(usuario, **filtros)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    query = text(
+        f"SELECT {', '.join(colunas)} FROM {_fonte_historico(incluir_arquivo)} {where} ORDER BY id DESC"
+    ).bindparams(*binds)
         
+    def _ler():
+        parse = ['data_criacao'] if 'data_criacao' in colunas else None
+        return _aplicar_tipos(pd.read_sql(query, engine, params=params, parse_dates=parse))
+
     try:
-        df = pd.read_sql(query, engine)
-        return df
+        return _com_cache('historico', usuario, dict(params, sql=query.text), _ler)
     except:
         return pd.DataFrame()
 
-def excluir_simulacao(id_simulacao):
-    """Deleta um registro pelo ID."""
+def iterar_historico(usuario, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO, colunas=None,
+                     incluir_arquivo=False, **filtros):
+    """
+    Mesmo resultado de carregar_historico, mas em blocos de `tamanho_bloco` linhas
+    (keyset no id, como a paginação). Só um bloco fica em memória por vez e nada
+    passa pelo cache de consultas: é para exportações grandes.
+    """
     engine = get_engine()
-    query = text("DELETE FROM simulacoes WHERE id = :id")
-    
+    colunas = _colunas_projetadas(colunas)
+    condicoes, params, binds = _filtros_historico(usuario, **filtros)
+    condicoes.append("id < :cursor")
+    params['limite'] = int(tamanho_bloco)
+    query = text(
+        f"SELECT {', '.join(colunas)} FROM {_fonte_historico(incluir_arquivo)} "
+        f"WHERE {' AND '.join(condicoes)} ORDER BY id DESC LIMIT :limite"
+    ).bindparams(*binds)
+    parse = ['data_criacao'] if 'data_criacao' in colunas else None
+
+    cursor = None
+    while True:
+        # 1º bloco sem cursor: começa acima do maior id possível
+        params['cursor'] = cursor if cursor is not None else 2**63 - 1
+        bloco = pd.read_sql(query, engine, params=params, parse_dates=parse)
+        if bloco.empty:
+            return
+        yield _aplicar_tipos(bloco)
+        if len(bloco) < tamanho_bloco:
+            return
+        cursor = int(bloco['id'].iloc[-1])
+
+def _ajustar_resumo(conn, linhas, sinal):
+    """Soma (+1) ou desconta (-1) as simulações no resumo diário, agrupadas por dia/corretor/status."""
+    grupos = {}
+    for linha in linhas:
+        if linha.data_criacao is None:
+            continue
+        chave = (linha.data_criacao.date(), linha.usuario_criacao or "", linha.status or "")
+        qtd, val = grupos.get(chave, (0, 0.0))
+        grupos[chave] = (qtd + sinal, val + (linha.valor_imovel or 0.0) * sinal)
+    resumo_diario.registrar_lote(conn, [
+        {"dia": dia, "usu": usu, "st": status, "qtd": qtd, "val": val}
+        for (dia, usu, status), (qtd, val) in grupos.items()
+    ])
+
+def _marcar_exclusao(conn, ids, excluir):
+    """
+    Exclusão lógica (excluir=True) ou restauração (False) de várias simulações,
+    na tabela quente e no arquivo (o histórico mostra as duas com incluir_arquivo).
+    Só mexe nas linhas que mudam de estado; o resumo diário acompanha
+    (arquivada também conta no dashboard). Retorna quantas foram alteradas.
+    """
+    estado = "excluida_em IS NULL" if excluir else "excluida_em IS NOT NULL"
+    quando = datetime.now().replace(microsecond=0) if excluir else None
+    alteradas = []
+    for tabela in ("simulacoes", TABELA_ARQUIVO):
+        linhas = conn.execute(
+            text(f"SELECT id, data_criacao, usuario_criacao, status, valor_imovel FROM {tabela} "
+                 f"WHERE id IN :ids AND {estado}")
+            .bindparams(bindparam("ids", expanding=True))
+            .columns(data_criacao=DateTime),
+            {"ids": list(ids)},
+        ).fetchall()
+        if not linhas:
+            continue
+        conn.execute(
+            text(f"UPDATE {tabela} SET excluida_em = :quando WHERE id IN :ids")
+            .bindparams(bindparam("ids", expanding=True), bindparam("quando", type_=DateTime)),
+            {"ids": [l.id for l in linhas], "quando": quando},
+        )
+        alteradas.extend(linhas)
+    if not alteradas:
+        return 0
+    _ajustar_resumo(conn, alteradas, -1 if excluir else 1)
+    marcar_alteracao(conn)
+    return len(alteradas)
+
+def _alterar_exclusao(ids, excluir, timeout):
+    ids = [int(i) for i in ids]
+    if not ids:
+        return 0
     try:
+        if _escrita_assincrona():
+            return _enfileirar(_marcar_exclusao, ids, excluir).result(timeout)
+        with get_engine().begin() as conn:
+            alteradas = _marcar_exclusao(conn, ids, excluir)
+        invalidar_consultas()
+        return alteradas
+    except Exception as e:
+        print(f"Erro ao {'excluir' if excluir else 'restaurar'}: {e}")
+        return 0
+
+def excluir_simulacoes(ids, timeout=TIMEOUT_EXCLUSAO):
+    """Manda várias simulações para a lixeira (exclusão lógica). Retorna quantas foram excluídas."""
+    return _alterar_exclusao(ids, True, timeout)
+
+def restaurar_simulacoes(ids, timeout=TIMEOUT_EXCLUSAO):
+    """Tira simulações da lixeira. Retorna quantas foram restauradas."""
+    return _alterar_exclusao(ids, False, timeout)
+
+def excluir_simulacao(id_simulacao, timeout=TIMEOUT_EXCLUSAO):
+    """Manda um registro para a lixeira pelo ID (False se não existir ou já estiver excluído)."""
+    return excluir_simulacoes([id_simulacao], timeout) > 0
+
+def carregar_simulacoes_por_id(ids, usuario):
+    """
+    Simulações escolhidas (tabela quente ou arquivo) com as entradas guardadas
+    do cálculo, quando houver: sistema, taxa_anual e meses (NaN/None se não houver).
+    Mesma regra do histórico: corretor só recebe as próprias (ids de outros são ignorados).
+    """
+    ids = [int(i) for i in ids]
+    colunas = ['id', 'cliente', 'valor_imovel', 'entrada', 'parcela', 'usuario_criacao']
+    if not ids:
+        return pd.DataFrame(columns=colunas + ['sistema', 'taxa_anual', 'meses'])
+    params = {'ids': ids}
+    dono = ""
+    if usuario != 'admin':
+        dono = "AND simulacoes.usuario_criacao = :usuario"
+        params['usuario'] = usuario
+    query = text(f"""
+    SELECT {', '.join('simulacoes.' + c for c in colunas)}, t.sistema, t.taxa_anual, t.meses
+    FROM {_fonte_historico(True)}
+    LEFT JOIN simulacoes_tabelas t ON t.simulacao_id = simulacoes.id
+    WHERE simulacoes.id IN :ids AND simulacoes.excluida_em IS NULL {dono}
+    ORDER BY simulacoes.id
+    """).bindparams(bindparam('ids', expanding=True))
+    try:
+        return pd.read_sql(query, get_engine(), params=params)
+    except Exception as e:
+        print(f"Erro ao carregar simulações: {e}")
+        return pd.DataFrame(columns=colunas + ['sistema', 'taxa_anual', 'meses'])
+
+def carregar_simulacao_salva(id_simulacao):
+    """
+    Entradas e tabela de amortização guardadas quando a simulação foi salva
+    (leitura pura, sem recalcular). Retorna dict com 'entradas' e 'tabela'
+    (DataFrame somente leitura), ou None se a simulação não tiver tabela guardada.
+    """
+    engine = get_engine()
+
+    def _ler():
         with engine.connect() as conn:
-            conn.execute(query, {"id": id_simulacao})
-            conn.commit()
-        return True
+            linha = conn.execute(text(
+                "SELECT sistema, valor_financiado, taxa_anual, meses, parametros, formato, colunas, tabela "
+                "FROM simulacoes_tabelas WHERE simulacao_id = :id"
+            ).columns(tabela=LargeBinary), {"id": int(id_simulacao)}).first()
+        if linha is None:
+            return {}
+        if linha.formato != calculos.FORMATO_TABELA:
+            raise ValueError(f"Formato de tabela desconhecido: {linha.formato}")
+        entradas = {
+            "sistema": linha.sistema, "valor_financiado": linha.valor_financiado,
+            "taxa_anual": linha.taxa_anual, "meses": linha.meses,
+        }
+        entradas.update(json.loads(linha.parametros or "{}"))
+        tabela = calculos.carregar_tabela_compacta(linha.tabela, json.loads(linha.colunas))
+        return {"entradas": entradas, "tabela": tabela}
+
+    try:
+        return _com_cache('tabela_salva', None, {'id': int(id_simulacao)}, _ler) or None
     except Exception as e:
-        print(f"Erro ao excluir: {e}")
-        return False
+        print(f"Erro ao carregar tabela salva: {e}")
+        return None
 
 def obter_dados_dashboard(usuario):
     """Mesma lógica do histórico, mas usado pelo dashboard."""
-    return carregar_historico(usuario)
\ No newline at end of file
+    return carregar_historico(usuario)
+
+def obter_resumo_dashboard(usuario, data_inicio=None, data_fim=None):
+    """
+    KPIs e gráficos do dashboard lidos do resumo diário, com o período filtrado no SQL.
+    O custo depende do número de dias do período, não do total de simulações.
+    """
+    engine = get_engine()
+
+    def _ler():
+        with engine.connect() as conn:
+            return resumo_diario.consultar(conn, usuario, data_inicio, data_fim)
+
+    try:
+        total, volume, por_dia, por_status = _com_cache(
+            'dashboard', usuario, {'data_inicio': data_inicio, 'data_fim': data_fim}, _ler
+        )
+    except Exception as e:
+        print(f"Erro ao carregar dashboard: {e}")
+        total, volume, por_dia, por_status = 0, 0.0, [], []
+
+    timeline = pd.DataFrame(por_dia, columns=['Data', 'Quantidade'])
+    timeline['Data'] = pd.to_datetime(timeline['Data'])
+    return {
+        "total": int(total),
+        "volume": float(volume),
+        "ticket_medio": float(volume) / total if total else 0.0,
+        "timeline": timeline,
+        "status": pd.DataFrame(por_status, columns=['Status', 'Quantidade']),
+    }
+
+def reconstruir_resumo_diario():
+    """Recalcula o resumo diário do zero (backfill). Uso: python -m services.simulacao_service"""
+    engine = get_engine()
+    with engine.begin() as conn:
+        resumo_diario.reconstruir(conn)
+        marcar_alteracao(conn)
+    invalidar_consultas()
+
+def arquivar_simulacoes(meses=ARQUIVAR_APOS_MESES, lote=LOTE_ARQUIVAMENTO, agora=None):
+    """
+    Move as simulações com mais de `meses` meses para simulacoes_arquivo (mesmos ids),
+    em lotes pequenos para não segurar o lock de escrita por muito tempo.
+    O resumo diário não muda: arquivada continua contando no dashboard.
+    A simulação mais recente nunca é movida (o SQLite reaproveitaria o id dela).
+    Retorna quantas foram arquivadas.
+    """
+    engine = get_engine()
+    agora = (agora or datetime.now()).replace(microsecond=0)
+    limite = (pd.Timestamp(agora) - pd.DateOffset(months=int(meses))).to_pydatetime()
+    colunas = ', '.join(COLUNAS_HISTORICO + ['excluida_em'])
+    tipos = (bindparam("limite", type_=DateTime), bindparam("agora", type_=DateTime))
+    total = 0
+
+    while True:
+        with engine.begin() as conn:
+            faixa = conn.execute(text(f"""
+            SELECT MIN(id), MAX(id) FROM (
+                SELECT id FROM simulacoes
+                WHERE data_criacao < :limite AND id < (SELECT MAX(id) FROM simulacoes)
+                ORDER BY id LIMIT :lote
+            ) AS t
+            """).bindparams(tipos[0]), {"limite": limite, "lote": int(lote)}).one()
+            if faixa[0] is None:
+                break
+            params = {"limite": limite, "agora": agora, "primeiro": faixa[0], "ultimo": faixa[1]}
+            condicao = "id BETWEEN :primeiro AND :ultimo AND data_criacao < :limite"
+            conn.execute(text(f"""
+            INSERT INTO {TABELA_ARQUIVO} ({colunas}, arquivada_em)
+            SELECT {colunas}, :agora FROM simulacoes WHERE {condicao}
+            """).bindparams(*tipos), params)
+            total += conn.execute(
+                text(f"DELETE FROM simulacoes WHERE {condicao}").bindparams(tipos[0]), params
+            ).rowcount
+            marcar_alteracao(conn)
+        invalidar_consultas()
+
+    return total
+
+if __name__ == "__main__":
+    # Uso: python -m services.simulacao_service [arquivar [meses]]
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "arquivar":
+        meses = int(sys.argv[2]) if len(sys.argv) > 2 else ARQUIVAR_APOS_MESES
+        print(f"📦 {arquivar_simulacoes(meses)} simulações arquivadas.")
+    else:
+        reconstruir_resumo_diario()
+        print("✅ Resumo diário reconstruído.")
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Banco SQLite descartável para a sessão de testes (a engine é criada no import de core.database)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'testes.db')}")
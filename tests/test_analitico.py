@@ -0,0 +1,40 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import DateTime, bindparam, text
+
+pytest.importorskip("pyarrow")
+
+from core.database import get_engine, inicializar_banco
+from services import analitico_service
+
+SQL_INSERIR = text("""
+INSERT INTO simulacoes (id, cliente, valor_imovel, entrada, parcela, status, usuario_criacao, data_criacao)
+VALUES (:id, :cliente, 400000, 80000, 3000, 'Importado', 'ana', :data)
+""").bindparams(bindparam("data", type_=DateTime))
+
+def _inserir(*ids):
+    with get_engine().begin() as conn:
+        conn.execute(SQL_INSERIR, [{"id": i, "cliente": f"C{i}", "data": datetime(2025, 3, 10)} for i in ids])
+
+def _ids_no_snapshot(pasta):
+    dataset, _ = analitico_service._abrir(str(pasta))
+    return sorted(dataset.to_table(columns=['id'])['id'].to_pylist())
+
+def test_id_menor_com_commit_atrasado_entra_no_proximo_snapshot(tmp_path):
+    inicializar_banco()
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM simulacoes"))
+
+    _inserir(101, 102, 104, 105)
+    assert analitico_service.gerar_snapshot(pasta=str(tmp_path)) == 4
+    assert analitico_service.ler_estado(str(tmp_path))['ultimo_id'] == 105
+
+    # id 103 foi reservado antes, mas só fez commit depois da rodada
+    _inserir(103)
+    assert analitico_service.gerar_snapshot(pasta=str(tmp_path)) == 1
+    assert _ids_no_snapshot(tmp_path) == [101, 102, 103, 104, 105]
+
+    # Rodada seguinte não duplica nada
+    assert analitico_service.gerar_snapshot(pasta=str(tmp_path)) == 0
+    assert _ids_no_snapshot(tmp_path) == [101, 102, 103, 104, 105]
+    assert analitico_service.ler_estado(str(tmp_path))['linhas'] == 5
@@ -0,0 +1,39 @@
+import io
+from services import importacao_service
+
+def _preparar(csv, usuario='admin'):
+    df = importacao_service.ler_arquivo(io.BytesIO(csv.encode('utf-8')), 'leads.csv')
+    return importacao_service.preparar_linhas(df, usuario)
+
+def test_milhar_com_ponto_e_lido_como_br():
+    validas, erros = _preparar(
+        "cliente;valor_imovel;entrada\n"
+        "Ana;350.000;70.000\n"
+        "Bia;1.250.000;250.000,00\n"
+    )
+    assert erros.empty
+    assert validas['valor_imovel'].tolist() == [350_000.0, 1_250_000.0]
+    assert validas['entrada'].tolist() == [70_000.0, 250_000.0]
+
+def test_formatos_br_e_us_com_decimais():
+    validas, erros = _preparar(
+        "cliente;valor_imovel;entrada;taxa_anual\n"
+        "Ana;R$ 400.000,50;0;9,99\n"
+        "Bia;400000.50;0;9.99\n"
+    )
+    assert erros.empty
+    assert validas['valor_imovel'].tolist() == [400_000.5, 400_000.5]
+    assert validas['taxa_anual'].tolist() == [9.99, 9.99]
+
+def test_valor_implausivel_vira_erro_da_linha():
+    validas, erros = _preparar(
+        "cliente;valor_imovel;entrada;taxa_anual\n"
+        "Ana;350.000;0;9.99\n"
+        "Bia;350;0;9.99\n"
+        "Caio;350,000;0;9.99\n"
+        "Davi;1,250,000;0;9.99\n"
+        "Eva;400.000;0;10.500\n"
+    )
+    assert validas['cliente'].tolist() == ['Ana']
+    assert erros['Linha'].tolist() == [3, 4, 5, 6]
+    assert erros['Erro'].str.contains('separador').tolist() == [True, True, False, True]
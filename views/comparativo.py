@@ -0,0 +1,80 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+from core import comparativo
+from components import ui, charts
+
+def render():
+    st.title("🏠 Aluguel vs. Compra")
+    st.caption("Mostre ao cliente, com números, quando comprar passa a valer mais do que alugar.")
+    
+    st.divider()
+
+    left_col, right_col = st.columns([1, 1.8], gap="medium")
+
+    # --- INPUTS (ESQUERDA) ---
+    with left_col:
+        with st.container(border=True):
+            st.markdown("### 🏡 Imóvel & Financiamento")
+            valor_imovel = st.number_input("Valor do Imóvel", min_value=50000.0, value=400000.0, step=5000.0, format="%.2f")
+            entrada = st.number_input("Entrada", min_value=0.0, max_value=valor_imovel, value=valor_imovel * 0.20, step=1000.0, format="%.2f")
+            custos_compra = valor_imovel * (st.number_input("Custos de Compra - ITBI/Escritura (%)", 0.0, 10.0, 4.0, 0.5) / 100)
+            taxa_anual = st.slider("Juros Anual (%)", 5.0, 15.0, 9.99, 0.1)
+            meses = st.select_slider("Prazo (Anos)", options=[10, 15, 20, 25, 30, 35], value=30) * 12
+            escolha = st.radio("Sistema", ["SAC (Decrescente)", "PRICE (Fixa)"], horizontal=True)
+
+            st.divider()
+
+            st.markdown("### 📈 Mercado")
+            aluguel = st.number_input("Valor do Aluguel (R$/mês)", min_value=0.0, value=valor_imovel * 0.004, step=100.0, format="%.2f")
+            cdi = st.slider("Rendimento CDI (% a.a.)", 4.0, 16.0, 11.0, 0.25)
+            valorizacao = st.slider("Valorização do Imóvel (% a.a.)", 0.0, 12.0, 5.0, 0.25)
+
+    # --- CÁLCULOS ---
+    sistema = "SAC" if "SAC" in escolha else "PRICE"
+    horizonte = max(meses, 360)
+
+    projecao = comparativo.projetar_aluguel_vs_compra(
+        valor_imovel, entrada, taxa_anual, meses, aluguel, cdi, valorizacao,
+        sistema=sistema, custos_compra=custos_compra, horizonte_meses=horizonte
+    )
+    df_proj = comparativo.tabela_projecao(projecao)
+    cruzamento = projecao['cruzamento'][0]
+    final_compra = df_proj['Patrimonio Compra'].iloc[-1]
+    final_aluguel = df_proj['Patrimonio Aluguel'].iloc[-1]
+
+    # --- RESULTADOS (DIREITA) ---
+    with right_col:
+        c1, c2, c3 = st.columns(3)
+        c1.markdown(ui.card_html("Comprando", ui.formatar_moeda(final_compra), f"Patrimônio em {horizonte // 12} anos", "#10b981"), unsafe_allow_html=True)
+        c2.markdown(ui.card_html("Alugando", ui.formatar_moeda(final_aluguel), f"Patrimônio em {horizonte // 12} anos", "#f59e0b"), unsafe_allow_html=True)
+        if np.isnan(cruzamento):
+            c3.markdown(ui.card_html("Virada", "Não ocorre", "Nesse horizonte"), unsafe_allow_html=True)
+        else:
+            c3.markdown(ui.card_html("Virada", f"Ano {cruzamento / 12:.1f}", "Comprar passa a valer mais"), unsafe_allow_html=True)
+
+        st.write("")
+        with st.container(border=True):
+            st.plotly_chart(
+                charts.plot_aluguel_vs_compra(df_proj, None if np.isnan(cruzamento) else cruzamento),
+                use_container_width=True
+            )
+
+        # --- SENSIBILIDADE: CDI x Valorização (numa chamada só) ---
+        with st.container(border=True):
+            st.markdown("##### 🔍 Em que ano comprar vira o jogo? (CDI x Valorização)")
+            cdis = np.arange(cdi - 3, cdi + 3.01, 1.0)
+            valorizacoes = np.arange(max(valorizacao - 3, 0), valorizacao + 3.01, 1.0)
+            grade_cdi, grade_val = np.meshgrid(cdis, valorizacoes)
+            sensibilidade = comparativo.projetar_aluguel_vs_compra(
+                valor_imovel, entrada, taxa_anual, meses, aluguel, grade_cdi, grade_val,
+                sistema=sistema, custos_compra=custos_compra, horizonte_meses=horizonte
+            )
+            anos_virada = (sensibilidade['cruzamento'] / 12).reshape(grade_cdi.shape)
+            tabela = pd.DataFrame(
+                anos_virada,
+                index=[f"Valoriz. {v:.1f}%" for v in valorizacoes],
+                columns=[f"CDI {c:.1f}%" for c in cdis],
+            )
+            st.dataframe(tabela.style.format("{:.1f}", na_rep="—"), use_container_width=True)
+            st.caption("Valores em anos. \"—\" = alugar continua melhor em todo o horizonte.")
@@ -1,30 +1,52 @@
 import streamlit as st
 import pandas as pd
-from services import simulacao_service # <--- Mudou aqui
+from datetime import date, timedelta
+from services import simulacao_service, analitico_service # <--- Mudou aqui
 from components import charts, ui
 
+def _periodo_selecionado():
+    """Filtro de data do ROADMAP: devolve (data_inicio, data_fim) ou (None, None) para tudo."""
+    hoje = date.today()
+    opcao = st.segmented_control(
+        "Período", ["Últimos 7 dias", "Este Mês", "Este Ano", "Tudo", "Personalizado"],
+        default="Este Mês", label_visibility="collapsed"
+    )
+    if opcao == "Últimos 7 dias":
+        return hoje - timedelta(days=6), hoje
+    if opcao == "Este Mês":
+        return hoje.replace(day=1), hoje
+    if opcao == "Este Ano":
+        return hoje.replace(month=1, day=1), hoje
+    if opcao == "Personalizado":
+        periodo = st.date_input("Intervalo", value=(hoje - timedelta(days=30), hoje), format="DD/MM/YYYY")
+        if len(periodo) == 2:
+            return periodo[0], periodo[1]
+    return None, None
+
 def render():
     st.title("📊 Dashboard Gerencial")
     st.caption("Visão geral da performance do time comercial.")
     
+    data_inicio, data_fim = _periodo_selecionado()
+
     st.divider()
 
-    # Carrega dados via Service
+    # Carrega o resumo diário via Service (período filtrado no SQL)
     usuario = st.session_state.get('username_logado', 'admin')
-    df = simulacao_service.obter_dados_dashboard(usuario) # <--- Mudou aqui
+    resumo = simulacao_service.obter_resumo_dashboard(usuario, data_inicio, data_fim)
 
-    if df.empty:
-        st.warning("⚠️ Ainda não há simulações salvas para gerar indicadores.")
+    if resumo['total'] == 0:
+        st.warning("⚠️ Ainda não há simulações salvas nesse período para gerar indicadores.")
         return
 
     # --- 1. KPIs ---
-    total_simulacoes = len(df)
-    volume_total = df['valor_imovel'].sum() if 'valor_imovel' in df.columns else 0
-    ticket_medio = volume_total / total_simulacoes if total_simulacoes > 0 else 0
+    total_simulacoes = resumo['total']
+    volume_total = resumo['volume']
+    ticket_medio = resumo['ticket_medio']
 
     kpi1, kpi2, kpi3 = st.columns(3)
     with kpi1:
-        st.markdown(ui.card_html("Simulações", str(total_simulacoes), "Total acumulado"), unsafe_allow_html=True)
+        st.markdown(ui.card_html("Simulações", str(total_simulacoes), "Total no período"), unsafe_allow_html=True)
     with kpi2:
         st.markdown(ui.card_html("Volume Potencial", ui.formatar_moeda(volume_total), "Soma dos Imóveis"), unsafe_allow_html=True)
     with kpi3:
@@ -38,13 +60,43 @@ def render():
     with g1:
         with st.container(border=True):
             st.markdown("##### 📅 Evolução Temporal")
-            st.plotly_chart(charts.grafico_timeline_simulacoes(df), use_container_width=True)
+            st.plotly_chart(charts.grafico_timeline_diario(resumo['timeline']), use_container_width=True)
 
     with g2:
         with st.container(border=True):
             st.markdown("##### 📝 Status das Propostas")
-            # Verifica qual nome da função existe no seu charts.py
-            if hasattr(charts, 'grafico_pizza_status'):
-                st.plotly_chart(charts.grafico_pizza_status(df), use_container_width=True)
-            elif hasattr(charts, 'grafico_status_propostas'):
-                st.plotly_chart(charts.grafico_status_propostas(df), use_container_width=True)
\ No newline at end of file
+            st.plotly_chart(charts.grafico_status_resumo(resumo['status']), use_container_width=True)
+
+    # --- 3. RELATÓRIOS GERENCIAIS (snapshot Parquet, fora do banco) ---
+    if usuario == 'admin' and analitico_service.disponivel():
+        _relatorios_snapshot(usuario, data_inicio, data_fim)
+
+def _relatorios_snapshot(usuario, data_inicio, data_fim):
+    st.write("")
+    with st.expander("🧊 Relatórios Gerenciais (snapshot)", expanded=False):
+        estado = analitico_service.ler_estado()
+        s1, s2 = st.columns([3, 1])
+        with s1:
+            if estado is None:
+                st.caption("Nenhum snapshot gerado ainda.")
+            else:
+                st.caption(f"Snapshot de {estado['atualizado_em'].replace('T', ' ')} · {estado['linhas']} simulações")
+        with s2:
+            if st.button("🔄 Atualizar", use_container_width=True):
+                with st.spinner("Acrescentando simulações novas..."):
+                    analitico_service.gerar_snapshot()
+                st.rerun()
+        if estado is None:
+            return
+
+        moeda = st.column_config.NumberColumn(format="R$ %.2f")
+        t1, t2, t3 = st.tabs(["Por Corretor", "Por Mês", "Por Faixa de Valor"])
+        with t1:
+            st.dataframe(analitico_service.resumo_por_corretor(usuario, data_inicio, data_fim), hide_index=True,
+                         use_container_width=True, column_config={"volume": moeda, "ticket_medio": moeda})
+        with t2:
+            st.dataframe(analitico_service.resumo_por_mes(usuario, data_inicio, data_fim), hide_index=True,
+                         use_container_width=True, column_config={"volume": moeda, "ticket_medio": moeda})
+        with t3:
+            st.dataframe(analitico_service.resumo_por_faixa(usuario, data_inicio, data_fim), hide_index=True,
+                         use_container_width=True, column_config={"volume": moeda})
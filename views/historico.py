@@ -1,5 +1,7 @@
 import streamlit as st
 from services import simulacao_service # <--- Mudou aqui
+from core import relatorios
+from components import ui
 import time
 
 def render():
@@ -8,21 +10,66 @@ def render():
     
     st.divider()
 
-    # Pega usuário e carrega via Service
     usuario = st.session_state.get('username_logado', 'admin')
-    df = simulacao_service.carregar_historico(usuario) # <--- Mudou aqui
 
-    if df.empty:
+    # --- FILTROS (aplicados no banco, não no pandas) ---
+    with st.expander("🔎 Filtros", expanded=False):
+        f1, f2, f3 = st.columns(3)
+        with f1:
+            corretor = None
+            if usuario == 'admin':
+                opcoes = ["Todos"] + simulacao_service.listar_corretores()
+                escolhido = st.selectbox("Corretor", opcoes)
+                corretor = None if escolhido == "Todos" else escolhido
+            periodo = st.date_input("Período", value=(), format="DD/MM/YYYY")
+        with f2:
+            status_lead = st.multiselect("Status do Lead", ["Novo", "Visita", "Proposta", "Vendido"])
+        with f3:
+            valor_min = st.number_input("Valor mínimo (R$)", min_value=0.0, value=0.0, step=10000.0)
+            valor_max = st.number_input("Valor máximo (R$)", min_value=0.0, value=0.0, step=10000.0, help="0 = sem limite")
+
+        v1, v2 = st.columns(2)
+        with v1:
+            mostrar = st.radio("Mostrar", ["Ativas", "Lixeira"], horizontal=True)
+        with v2:
+            incluir_arquivo = st.checkbox("Incluir simulações arquivadas", help="Simulações antigas que saíram da tabela principal.")
+
+    filtros = {
+        "corretor": corretor,
+        "data_inicio": periodo[0] if len(periodo) > 0 else None,
+        "data_fim": periodo[1] if len(periodo) > 1 else None,
+        "status_lead": status_lead or None,
+        "valor_min": valor_min or None,
+        "valor_max": valor_max or None,
+        "excluidas": mostrar == "Lixeira",
+        "incluir_arquivo": incluir_arquivo,
+    }
+
+    # Pilha de cursores das páginas já visitadas (volta para a 1ª página se o filtro mudar)
+    chave_filtros = repr(sorted(filtros.items()))
+    if st.session_state.get('hist_filtros') != chave_filtros:
+        st.session_state['hist_filtros'] = chave_filtros
+        st.session_state['hist_cursores'] = [None]
+    cursores = st.session_state['hist_cursores']
+
+    df, proximo_cursor = simulacao_service.carregar_pagina_historico(usuario, cursor=cursores[-1], **filtros)
+
+    if df.empty and len(cursores) == 1:
         st.info("📭 Nenhuma simulação encontrada no histórico.")
         return
 
     # --- TABELA ---
     with st.container(border=True):
-        st.markdown(f"### 📋 Registros Encontrados ({len(df)})")
-        st.dataframe(
+        total = simulacao_service.contar_historico(usuario, **filtros)
+        st.markdown(f"### 📋 Registros Encontrados ({total})")
+        st.caption("Selecione linhas na tabela para excluir, restaurar ou gerar propostas em lote.")
+        evento = st.dataframe(
             df, 
             use_container_width=True, 
             hide_index=True,
+            on_select="rerun",
+            selection_mode="multi-row",
+            key=f"hist_tabela_{hash(chave_filtros)}_{len(cursores)}",
             column_config={
                 "data_criacao": st.column_config.DatetimeColumn("Data", format="DD/MM/YYYY HH:mm"),
                 "valor_imovel": st.column_config.NumberColumn("Valor Imóvel", format="R$ %.2f"),
@@ -30,33 +77,73 @@ def render():
             }
         )
 
+        p_ant, p_info, p_prox = st.columns([1, 2, 1])
+        with p_ant:
+            if st.button("◀ Anterior", disabled=len(cursores) == 1, use_container_width=True):
+                cursores.pop()
+                st.rerun()
+        with p_info:
+            st.caption(f"Página {len(cursores)} · {simulacao_service.TAMANHO_PAGINA} por página")
+        with p_prox:
+            if st.button("Próxima ▶", disabled=proximo_cursor is None, use_container_width=True):
+                cursores.append(proximo_cursor)
+                st.rerun()
+
+        # Todas as páginas do filtro atual, lidas em blocos só no clique
+        st.download_button(
+            "📊 Exportar filtro (Excel)",
+            lambda: relatorios.gerar_excel({}, historico=simulacao_service.iterar_historico(usuario, **filtros)),
+            file_name="Historico_Simulacoes.xlsx", mime=relatorios.MIME_EXCEL, use_container_width=True
+        )
+
     st.write("") 
 
-    # --- EXCLUSÃO ---
-    with st.expander("🗑️ Gestão de Registros (Excluir)"):
+    selecionados = [int(df['id'].iloc[i]) for i in evento.selection.rows]
+    # Usado pela página "Propostas em Lote"
+    st.session_state['hist_selecionados'] = selecionados
+
+    # --- PROPOSTA SALVA (leitura da tabela guardada, sem recalcular) ---
+    if len(selecionados) == 1:
+        salva = simulacao_service.carregar_simulacao_salva(selecionados[0])
+        with st.expander(f"📄 Proposta Salva (ID {selecionados[0]})", expanded=True):
+            if salva is None:
+                st.info("Esta simulação foi salva sem a tabela de amortização (registro antigo ou importado).")
+            else:
+                entradas = salva["entradas"]
+                k1, k2, k3, k4 = st.columns(4)
+                k1.metric("Sistema", entradas["sistema"])
+                k2.metric("Financiado", ui.formatar_moeda(entradas["valor_financiado"]))
+                k3.metric("Juros", f"{entradas['taxa_anual']:.2f}% a.a.")
+                k4.metric("Prazo", f"{entradas['meses']} meses")
+                st.dataframe(salva["tabela"], height=250, use_container_width=True, hide_index=True)
+                if entradas.get("proposta"):
+                    ui.botao_proposta_pdf(entradas["proposta"], f"hist_pdf_{selecionados[0]}", "📄 Reimprimir PDF")
+
+    # --- EXCLUSÃO / RESTAURAÇÃO EM LOTE ---
+    with st.expander("🗑️ Gestão de Registros (Excluir / Restaurar)", expanded=bool(selecionados)):
         st.markdown("""
         <div style="background-color: #fef2f2; padding: 15px; border-radius: 8px; border: 1px solid #ef4444; margin-bottom: 15px;">
-            <strong style="color: #b91c1c;">⚠️ Zona de Perigo:</strong> A exclusão é permanente.
+            <strong style="color: #b91c1c;">⚠️ Atenção:</strong> Excluídas vão para a Lixeira e saem do Dashboard (podem ser restauradas).
         </div>
         """, unsafe_allow_html=True)
-        
-        c_input, c_btn = st.columns([3, 1])
-        
-        with c_input:
-            id_para_excluir = st.number_input("ID da Simulação", min_value=0, step=1, format="%d")
-        
-        with c_btn:
-            st.write("")
-            st.write("")
-            if st.button("Excluir Agora", type="primary", use_container_width=True):
-                if id_para_excluir > 0:
-                    id_safe = int(id_para_excluir)
-                    # Chama o Service para excluir
-                    if simulacao_service.excluir_simulacao(id_safe): # <--- Mudou aqui
-                        st.success(f"✅ ID {id_safe} apagado!")
-                        time.sleep(1)
-                        st.rerun()
-                    else:
-                        st.error("Erro ao apagar. ID não encontrado.")
+
+        st.markdown(f"**{len(selecionados)}** selecionada(s): {', '.join(map(str, selecionados[:20]))}{' ...' if len(selecionados) > 20 else ''}")
+
+        if filtros["excluidas"]:
+            if st.button("♻️ Restaurar Selecionadas", type="primary", disabled=not selecionados, use_container_width=True):
+                qtd = simulacao_service.restaurar_simulacoes(selecionados)
+                if qtd:
+                    st.success(f"✅ {qtd} simulação(ões) restaurada(s)!")
+                    time.sleep(1)
+                    st.rerun()
+                else:
+                    st.warning("Nada foi restaurado (as selecionadas não estavam na Lixeira ou não foram encontradas).")
+        else:
+            if st.button("Excluir Selecionadas", type="primary", disabled=not selecionados, use_container_width=True):
+                qtd = simulacao_service.excluir_simulacoes(selecionados)
+                if qtd:
+                    st.success(f"✅ {qtd} simulação(ões) enviada(s) para a Lixeira!")
+                    time.sleep(1)
+                    st.rerun()
                 else:
-                    st.warning("Digite um ID válido.")
\ No newline at end of file
+                    st.warning("Nada foi excluído (as selecionadas já estavam na Lixeira ou não foram encontradas).")
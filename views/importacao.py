@@ -0,0 +1,67 @@
+import streamlit as st
+from services import importacao_service
+
+def render():
+    st.title("📥 Importar Leads")
+    st.caption("Carregue uma planilha (CSV ou XLSX) do CRM antigo ou de campanhas. A parcela é calculada automaticamente.")
+
+    st.divider()
+
+    usuario = st.session_state.get('username_logado', 'admin')
+
+    with st.expander("📄 Formato da planilha", expanded=False):
+        st.markdown(
+            "- **Obrigatórias:** `cliente`, `valor_imovel`, `entrada`\n"
+            "- **Opcionais:** `taxa_anual`, `prazo_anos`, `sistema` (SAC/PRICE), `status`, "
+            "`status_lead`, `usuario_criacao` (só admin), `data_criacao` (DD/MM/AAAA ou AAAA-MM-DD)\n"
+            "- **Valores:** `350.000`, `350.000,00` ou `350000.00` (imóvel abaixo de R$ 10.000 é recusado)"
+        )
+        st.download_button(
+            "⬇️ Baixar planilha-modelo", data=importacao_service.modelo_csv(),
+            file_name="modelo_importacao.csv", mime="text/csv"
+        )
+
+    arquivo = st.file_uploader("Arquivo", type=["csv", "xlsx"])
+    tamanho_lote = st.number_input(
+        "Linhas por lote", min_value=100, max_value=50_000,
+        value=importacao_service.TAMANHO_LOTE_PADRAO, step=500,
+        help="Quantas linhas são gravadas por transação no banco."
+    )
+
+    if arquivo is None:
+        return
+
+    try:
+        df = importacao_service.ler_arquivo(arquivo, arquivo.name)
+    except Exception as e:
+        st.error(f"Não foi possível ler o arquivo: {e}")
+        return
+
+    st.markdown(f"**{len(df)} linhas** encontradas. Prévia:")
+    st.dataframe(df.head(10), use_container_width=True, hide_index=True)
+
+    if st.button("🚀 Importar", type="primary"):
+        barra = st.progress(0.0, text="Importando...")
+
+        def ao_progredir(feitas, total):
+            barra.progress(feitas / total if total else 1.0, text=f"Importando... {feitas}/{total}")
+
+        try:
+            resultado = importacao_service.importar_simulacoes(
+                df, usuario, tamanho_lote=int(tamanho_lote), ao_progredir=ao_progredir
+            )
+        except ValueError as e:
+            barra.empty()
+            st.error(str(e))
+            return
+
+        barra.progress(1.0, text="Concluído")
+        erros = resultado['erros']
+        st.success(f"✅ {resultado['importados']} simulações importadas em {resultado['segundos']:.1f}s.")
+        if not erros.empty:
+            st.warning(f"⚠️ {len(erros)} linhas não foram importadas:")
+            st.dataframe(erros, use_container_width=True, hide_index=True)
+            st.download_button(
+                "⬇️ Baixar erros", data=erros.to_csv(index=False, sep=';').encode('utf-8-sig'),
+                file_name="erros_importacao.csv", mime="text/csv"
+            )
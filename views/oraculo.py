@@ -1,5 +1,7 @@
 import streamlit as st
-from components import ui
+import numpy as np
+from core import solver
+from components import ui, charts
 
 def render():
     st.title("🔮 O Oráculo do Crédito")
@@ -31,15 +33,16 @@ def render():
             prazo_anos = st.slider("Prazo (Anos)", 10, 35, 30)
             taxa_anual = st.slider("Taxa de Juros (%)", 6.0, 15.0, 9.99, 0.1)
             comprometimento = st.slider("Limite de Parcela (Renda)", 20, 35, 30, help="Geralmente os bancos travam em 30%")
+            escolha = st.radio("Sistema", ["SAC (Decrescente)", "PRICE (Fixa)"], horizontal=True, help="No SAC quem trava o crédito é a primeira parcela (a maior)")
 
     # --- CÁLCULOS ---
-    margem_parcela = renda * (comprometimento / 100)
-    taxa_mensal = (taxa_anual / 100) / 12
+    sistema = "SAC" if "SAC" in escolha else "PRICE"
+    fator_renda = comprometimento / 100
+    margem_parcela = float(solver.parcela_maxima(renda, fator_renda))
     meses = prazo_anos * 12
     
-    # Cálculo Reverso (PMT -> Valor Presente) - Aproximação Tabela Price
-    # PV = PMT * [ (1 - (1+i)^-n) / i ]
-    valor_financiavel = margem_parcela * ((1 - (1 + taxa_mensal) ** (-meses)) / taxa_mensal)
+    # Cálculo Reverso exato (SAC ou PRICE, com taxa zero protegida)
+    valor_financiavel = float(solver.valor_maximo_financiavel(renda, taxa_anual, meses, sistema, fator_renda))
     
     poder_compra = valor_financiavel + entrada_disponivel
 
@@ -61,4 +64,14 @@ def render():
             c2.markdown(ui.card_html("Parcela Máxima", ui.formatar_moeda(margem_parcela), f"{comprometimento}% da Renda"), unsafe_allow_html=True)
 
         st.write("")
-        st.info(f"ℹ️ **Interpretação:** Com renda de **{ui.formatar_moeda(renda)}**, o banco libera uma parcela de até **{ui.formatar_moeda(margem_parcela)}**. Isso paga um financiamento de **{ui.formatar_moeda(valor_financiavel)}** em {prazo_anos} anos.")
\ No newline at end of file
+        st.info(f"ℹ️ **Interpretação:** Com renda de **{ui.formatar_moeda(renda)}**, o banco libera uma parcela de até **{ui.formatar_moeda(margem_parcela)}**. Isso paga um financiamento de **{ui.formatar_moeda(valor_financiavel)}** em {prazo_anos} anos.")
+
+    # --- MAPA DE CALOR (Prazo x Taxa) ---
+    st.write("")
+    with st.container(border=True):
+        st.markdown("##### 🗺️ Poder de Compra por Prazo e Taxa")
+        mapa = solver.mapa_poder_compra(
+            renda, entrada_disponivel, np.arange(10, 36, 5), np.round(np.arange(6.0, 15.01, 0.5), 2),
+            sistema, fator_renda
+        )
+        st.plotly_chart(charts.mapa_calor_poder_compra(mapa), use_container_width=True)
@@ -0,0 +1,93 @@
+import os
+import streamlit as st
+from services import importacao_service, propostas_service
+
+def _descartar_zip():
+    """Apaga o ZIP temporário do lote anterior (se ainda não foi baixado)."""
+    lote = st.session_state.pop('lote_zip', None)
+    if lote and os.path.exists(lote['caminho']):
+        os.remove(lote['caminho'])
+
+def _entregar_zip(caminho):
+    """Lê o ZIP só no clique do download e apaga o arquivo temporário em seguida."""
+    def ler():
+        try:
+            with open(caminho, "rb") as f:
+                return f.read()
+        finally:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+    return ler
+
+def render():
+    st.title("📦 Propostas em Lote")
+    st.caption("Gere o PDF da proposta de vários clientes de uma vez (ex.: depois de uma mudança de taxa).")
+
+    st.divider()
+
+    usuario = st.session_state.get('username_logado', 'admin')
+
+    origem = st.radio("Origem", ["Selecionadas no Histórico", "Planilha"], horizontal=True)
+    c1, c2 = st.columns(2)
+    with c1:
+        trocar_taxa = st.checkbox("Aplicar nova taxa a todas", value=True)
+    with c2:
+        nova_taxa = st.number_input("Nova Taxa (% a.a.)", 0.0, 30.0, 9.99, 0.1, disabled=not trocar_taxa)
+    taxa = nova_taxa if trocar_taxa else None
+
+    propostas, erros = [], None
+    if origem == "Selecionadas no Histórico":
+        ids = st.session_state.get('hist_selecionados', [])
+        if not ids:
+            _descartar_zip()
+            st.info("Selecione as simulações na tabela do Histórico e volte aqui.")
+            return
+        assinatura = (origem, tuple(ids), taxa)
+        st.markdown(f"**{len(ids)}** simulação(ões) selecionada(s) no Histórico.")
+        propostas = propostas_service.propostas_do_historico(ids, usuario, taxa)
+    else:
+        arquivo = st.file_uploader("Planilha de leads (mesmo formato da importação)", type=["csv", "xlsx"])
+        if arquivo is None:
+            _descartar_zip()
+            return
+        assinatura = (origem, arquivo.file_id, taxa)
+        try:
+            df = importacao_service.ler_arquivo(arquivo, arquivo.name)
+            propostas, erros = propostas_service.propostas_da_planilha(df, usuario, taxa)
+        except Exception as e:
+            st.error(f"Não foi possível ler a planilha: {e}")
+            return
+
+    # ZIP gerado para outra seleção/planilha/taxa não vale mais
+    lote = st.session_state.get('lote_zip')
+    if lote and (lote['assinatura'] != assinatura or not os.path.exists(lote['caminho'])):
+        _descartar_zip()
+
+    if erros is not None and not erros.empty:
+        st.warning(f"⚠️ {len(erros)} linhas ignoradas:")
+        st.dataframe(erros, use_container_width=True, hide_index=True)
+
+    if not propostas:
+        st.info("Nenhuma proposta para gerar.")
+        return
+
+    if st.button(f"🚀 Gerar {len(propostas)} PDFs", type="primary"):
+        barra = st.progress(0.0, text="Gerando PDFs...")
+
+        def ao_progredir(feitas, total):
+            barra.progress(feitas / total, text=f"Gerando PDFs... {feitas}/{total}")
+
+        _descartar_zip()
+        caminho, falhas = propostas_service.gerar_zip(propostas, ao_progredir=ao_progredir)
+        # Só o caminho fica na sessão; o conteúdo é lido no clique do download
+        st.session_state['lote_zip'] = {'caminho': caminho, 'assinatura': assinatura}
+        barra.progress(1.0, text="Concluído")
+        if falhas:
+            st.warning(f"⚠️ {len(falhas)} proposta(s) falharam e ficaram fora do ZIP.")
+
+    lote = st.session_state.get('lote_zip')
+    if lote:
+        st.download_button(
+            "⬇️ Baixar ZIP", _entregar_zip(lote['caminho']), file_name="propostas.zip", mime="application/zip",
+            type="primary", help="O arquivo é apagado do servidor depois do download; gere de novo se precisar."
+        )
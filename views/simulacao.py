@@ -1,6 +1,6 @@
 import streamlit as st
 import urllib.parse
-from core import calculos, relatorios
+from core import calculos, relatorios, monte_carlo
 from services import simulacao_service
 from components import ui, charts
 
@@ -66,19 +66,38 @@ def render():
             meses = st.select_slider("Prazo (Anos)", options=[10, 15, 20, 25, 30, 35], value=30) * 12
             escolha = st.radio("Sistema", ["SAC (Decrescente)", "PRICE (Fixa)"], horizontal=True)
 
+            # --- SEGUROS E TAXAS (para o C.E.T.) ---
+            with st.expander("🧾 Seguros e Taxas (C.E.T.)"):
+                st.caption("Valores típicos dos bancos. Entram no Custo Efetivo Total.")
+                mip_mensal = st.number_input("Seguro MIP (% a.m. do saldo)", 0.0, 1.0, 0.025, 0.005, format="%.4f")
+                dfi_mensal = st.number_input("Seguro DFI (% a.m. do imóvel)", 0.0, 1.0, 0.0071, 0.001, format="%.4f")
+                taxa_adm = st.number_input("Taxa de Administração (R$/mês)", 0.0, 500.0, 25.0, 5.0)
+                custos_iniciais = st.number_input("Tarifas Iniciais (R$)", 0.0, value=0.0, step=500.0, help="Avaliação do imóvel, IOF, etc.")
+
     # --- CÁLCULOS (Core) ---
     saldo_devedor = valor_imovel - entrada
-    df_sac = calculos.calcular_sac(saldo_devedor, taxa_anual, meses)
-    df_price = calculos.calcular_price(saldo_devedor, taxa_anual, meses)
-    
-    df_atual = df_sac if "SAC" in escolha else df_price
     tipo_tabela = "SAC" if "SAC" in escolha else "PRICE"
 
-    p1 = df_atual.iloc[0]['Parcela']
-    ult_p = df_atual.iloc[-1]['Parcela']
-    total_pago = df_atual['Parcela'].sum()
-    total_juros = df_atual['Juros'].sum()
-    renda_minima = p1 / 0.30
+    # Tabelas só são montadas quando o gráfico/tabela/exportação pedirem
+    tabelas = {
+        "SAC": calculos.TabelaLazy(saldo_devedor, taxa_anual, meses, "SAC"),
+        "PRICE": calculos.TabelaLazy(saldo_devedor, taxa_anual, meses, "PRICE"),
+    }
+    tabela_atual = tabelas[tipo_tabela]
+
+    # KPIs por fórmula fechada (O(1))
+    resumo = tabela_atual.resumo
+    p1 = resumo.primeira_parcela
+    ult_p = resumo.ultima_parcela
+    total_pago = resumo.total_pago
+    total_juros = resumo.total_juros
+    renda_minima = resumo.renda_minima
+
+    # C.E.T. também por fórmula fechada (não monta a tabela)
+    cet_anual = calculos.cet_financiamento(
+        saldo_devedor, taxa_anual, meses, tipo_tabela, valor_imovel,
+        mip_mensal, dfi_mensal, taxa_adm, custos_iniciais
+    )
 
     # ==========================================
     # 👉 COLUNA DA DIREITA: RESULTADOS
@@ -98,22 +117,28 @@ def render():
                 st.markdown(f"<h3 style='margin: 0; color: #64748b;'>{ui.formatar_moeda(renda_minima)}</h3>", unsafe_allow_html=True)
 
         # 2. RESUMO (KPIs)
-        c1, c2, c3 = st.columns(3)
+        c1, c2, c3, c4 = st.columns(4)
         c1.markdown(ui.card_html("Total Pago", ui.formatar_moeda(total_pago), "Imóvel + Juros"), unsafe_allow_html=True)
         c2.markdown(ui.card_html("Só Juros", ui.formatar_moeda(total_juros), f"Custo {tipo_tabela}"), unsafe_allow_html=True)
         c3.markdown(ui.card_html("Financiado", ui.formatar_moeda(saldo_devedor), f"{percentual:.0f}% Entrada"), unsafe_allow_html=True)
+        c4.markdown(ui.card_html("C.E.T.", f"{cet_anual:.2f}% a.a.", "Juros + Seguros + Taxas"), unsafe_allow_html=True)
 
         st.write("") 
 
         # 3. GRÁFICOS E TABELAS
         with st.container(border=True):
-            tab_graf, tab_dados = st.tabs(["📊 Análise Visual", "📄 Tabela Detalhada"])
-            
-            with tab_graf:
-                st.plotly_chart(charts.plot_amortizacao(df_atual), use_container_width=True)
-                
-            with tab_dados:
-                st.dataframe(df_atual, height=250, use_container_width=True, hide_index=True)
+            # A tabela completa só é montada (e enviada ao navegador) se o corretor pedir
+            if st.toggle("📊 Ver gráfico e tabela detalhada", key="sim_ver_tabela"):
+                tabela_completa = tabela_atual.completa()
+                tab_graf, tab_dados = st.tabs(["📊 Análise Visual", "📄 Tabela Detalhada"])
+
+                with tab_graf:
+                    st.plotly_chart(charts.plot_amortizacao(tabela_completa), use_container_width=True)
+
+                with tab_dados:
+                    st.dataframe(tabela_completa, height=250, use_container_width=True, hide_index=True)
+            else:
+                st.caption("Gráfico da composição da parcela e tabela mês a mês ficam ocultos até você pedir.")
 
         # 4. BOTÕES DE AÇÃO
         st.write("")
@@ -126,15 +151,19 @@ def render():
                     "cliente": cliente if cliente else "Visitante",
                     "valor_imovel": valor_imovel, "entrada": entrada,
                     "saldo_devedor": saldo_devedor, "meses": meses, "parcela": p1,
+                    "cet": f"{cet_anual:.2f}% a.a.".replace(".", ","),
                     "status_texto": f"Renda Min: {ui.formatar_moeda(renda_minima)}"
                 }
-                arquivo_pdf = relatorios.gerar_proposta_pdf(dados_pdf)
-                with open(arquivo_pdf, "rb") as f:
-                    st.download_button("📄 PDF", f, file_name=arquivo_pdf, mime="application/pdf", width="stretch")
+                # O PDF só é gerado no clique (pool de PDFs) e sai do cache se já existir
+                ui.botao_proposta_pdf(dados_pdf, "sim_pdf", width="stretch")
 
             with b_excel:
-                excel_data = relatorios.gerar_excel_comparativo(df_sac, df_price, {"cliente": cliente, "valor_imovel": valor_imovel, "entrada": entrada, "meses": meses})
-                st.download_button("📊 Excel", excel_data, file_name=f"Simulacao_{cliente}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", width="stretch")
+                dados_excel = {"cliente": cliente, "valor_imovel": valor_imovel, "entrada": entrada, "meses": meses}
+                # Planilha montada só no clique (uma aba por cenário)
+                st.download_button(
+                    "📊 Excel", lambda: relatorios.gerar_excel(tabelas, dados_excel),
+                    file_name=f"Simulacao_{cliente}.xlsx", mime=relatorios.MIME_EXCEL, width="stretch"
+                )
 
             with b_zap:
                 msg = f"*Simulação {cliente}*\n🏠 Imóvel: {ui.formatar_moeda(valor_imovel)}\n💰 1ª Parcela: {ui.formatar_moeda(p1)}"
@@ -146,8 +175,18 @@ def render():
                     else:
                         autor = st.session_state.get('username_logado', 'admin')
                         # AQUI MUDOU: simulacao_service em vez de database
-                        if simulacao_service.salvar_simulacao(cliente, valor_imovel, entrada, p1, "Simulação Web", autor):
+                        # Entradas + tabela mostrada ao cliente (para reabrir/reimprimir do histórico)
+                        entradas = {
+                            "sistema": tipo_tabela, "taxa_anual": taxa_anual, "meses": meses,
+                            "valor_financiado": saldo_devedor, "itbi_percentual": itbi_percentual,
+                            "mip_mensal": mip_mensal, "dfi_mensal": dfi_mensal, "taxa_adm": taxa_adm,
+                            "custos_iniciais": custos_iniciais, "cet_anual": cet_anual, "proposta": dados_pdf,
+                        }
+                        if simulacao_service.salvar_simulacao(cliente, valor_imovel, entrada, p1, "Simulação Web", autor,
+                                                              entradas=entradas, tabela=tabela_atual.completa()):
                             st.toast("Salvo!", icon="✅")
+                        else:
+                            st.error("❌ Não foi possível salvar a simulação. Tente novamente.")
 
     # ==========================================
     # 🚀 RODAPÉ: O PODER DA AMORTIZAÇÃO
@@ -158,20 +197,65 @@ def render():
         with c_extra:
             amortizacao_extra = st.number_input("Valor Extra Mensal (R$)", 0.0, step=100.0, format="%.2f")
             if amortizacao_extra > 0: st.caption(f"Visual: **{ui.formatar_moeda(amortizacao_extra)}**")
+            lance_anual = st.number_input("Lance Anual / FGTS (R$)", 0.0, step=1000.0, format="%.2f", help="Abatido a cada 12 meses")
+            modo_extra = st.radio("Abater em", ["Prazo", "Parcela"], horizontal=True)
 
         with c_resumo:
-            if amortizacao_extra > 0:
-                amortizacao_media = df_atual['Amortizacao'].mean()
-                novo_prazo = int(saldo_devedor / (amortizacao_media + amortizacao_extra))
+            if amortizacao_extra > 0 or lance_anual > 0:
+                # Cálculo exato (SAC ou PRICE), com o sistema escolhido acima
+                df_turbo = calculos.calcular_amortizacao_extra(
+                    saldo_devedor, taxa_anual, meses, tipo_tabela,
+                    extra_mensal=amortizacao_extra, extra_periodico=lance_anual,
+                    intervalo_periodico=12, modo=modo_extra.lower()
+                )
+                novo_prazo = len(df_turbo)
                 meses_eco = meses - novo_prazo
-                juros_eco = total_juros * (1 - (novo_prazo / meses))
+                juros_eco = total_juros - df_turbo['Juros'].sum()
+
+                if modo_extra == "Prazo":
+                    destaque = f"⏱️ Cai de {meses} para <b>{novo_prazo} meses</b>!"
+                    ganho = f"Você economiza <b>{meses_eco/12:.1f} anos</b> de pagamentos."
+                else:
+                    # Prazo não muda: o ganho aparece no valor da parcela
+                    nova_ult_p = df_turbo.iloc[-1]['Parcela']
+                    destaque = f"📉 Última parcela cai de {ui.formatar_moeda(ult_p)} para <b>{ui.formatar_moeda(nova_ult_p)}</b>!"
+                    ganho = f"Sua parcela fica <b>{ui.formatar_moeda(ult_p - nova_ult_p)} menor</b> no fim do contrato."
 
                 st.markdown(f"""
                 <div style="background-color: #f0fdf4; padding: 15px; border-radius: 8px; border: 1px solid #10b981;">
-                    <h4 style="color: #15803d; margin:0;">⏱️ Cai de {meses} para <b>{novo_prazo} meses</b>!</h4>
-                    <p style="margin: 5px 0; color: #166534;">Você economiza <b>{meses_eco/12:.1f} anos</b> de pagamentos.</p>
+                    <h4 style="color: #15803d; margin:0;">{destaque}</h4>
+                    <p style="margin: 5px 0; color: #166534;">{ganho}</p>
                     <p style="margin: 0; font-weight: bold; color: #15803d;">💰 Economia de Juros: {ui.formatar_moeda(juros_eco)}</p>
                 </div>
                 """, unsafe_allow_html=True)
             else:
-                st.info("Digite um valor extra (ex: R$ 500) para ver quanto tempo você economiza.")
\ No newline at end of file
+                st.info("Digite um valor extra (ex: R$ 500) para ver quanto tempo você economiza.")
+
+    # ==========================================
+    # 🎲 RODAPÉ: INDEXADOR (TR / IPCA)
+    # ==========================================
+    with st.expander("🎲 Cenários com Indexador (TR / IPCA)", expanded=False):
+        st.caption("Simula milhares de futuros possíveis do índice e mostra a faixa provável da parcela.")
+        c_idx1, c_idx2, c_idx3 = st.columns(3)
+        with c_idx1:
+            indexador = st.radio("Indexador", ["Corrige o Saldo (TR/IPCA)", "Taxa Pós-fixada"])
+        with c_idx2:
+            indice_atual = st.number_input("Índice Atual (% a.a.)", 0.0, 30.0, 4.0, 0.25)
+            indice_medio = st.number_input("Média de Longo Prazo (% a.a.)", 0.0, 30.0, 4.0, 0.25)
+        with c_idx3:
+            volatilidade = st.number_input("Volatilidade (p.p. a.a.)", 0.0, 10.0, 1.5, 0.25)
+
+        if st.button("🎲 Simular Cenários", width="stretch"):
+            modo_idx = "correcao" if "Saldo" in indexador else "flutuante"
+            # No pós-fixado a taxa do contrato vira spread sobre o índice
+            with st.spinner("Simulando 20 mil cenários..."):
+                df_faixas = monte_carlo.simular_monte_carlo(
+                    saldo_devedor, taxa_anual, meses, tipo_tabela, modo=modo_idx,
+                    processo="reversao", inicial=indice_atual, media=indice_medio,
+                    volatilidade=volatilidade, caminhos=20_000
+                )
+            st.plotly_chart(charts.plot_faixas_parcela(df_faixas), use_container_width=True)
+
+            p50_max = df_faixas['Parcela P50'].max()
+            p90_max = df_faixas['Parcela P90'].max()
+            st.markdown(f"📈 Parcela mais alta esperada: **{ui.formatar_moeda(p50_max)}** (mediana) · **{ui.formatar_moeda(p90_max)}** (cenário ruim, P90)")